@@ -54,6 +54,9 @@ BASH_COMPLETION_PATHS += [SCRIPTDIR + '/subprojects/gst-devtools/validate/data/b
 
 UPDATED_ENV = dict()
 
+# Bump when the content of the build paths cache changes
+ENV_CACHE_VERSION = 1
+
 def str_to_bool(value: Any) -> bool:
     """Return whether the provided string (or any value really) represents true. Otherwise false.
     Just like plugin server stringToBoolean.
@@ -89,20 +92,32 @@ def set_env_var(env, var, value, options):
 
 
 def prepend_env_var(env, var, value, options):
-    if var is None:
+    prepend_env_vars(env, var, [value], options)
+
+
+def prepend_env_vars(env, var, values, options):
+    '''
+    Same as calling prepend_env_var() for each of the values, in order, the
+    variable being split and joined only once
+    '''
+    if var is None or not values:
         return
-    if value.startswith(options.sysroot):
-        value = value[len(options.sysroot):]
-    # Try not to exceed maximum length limits for env vars on Windows
-    if os.name == 'nt':
-        value = win32_get_short_path_name(value)
-    env_val = env.get(var, '')
-    val = os.pathsep + value + os.pathsep
-    # Don't add the same value twice
-    if val in env_val or env_val.startswith(value + os.pathsep):
+    current = [p for p in env.get(var, '').split(os.pathsep) if p]
+    # Ordered sets
+    known = dict.fromkeys(current)
+    added = {}
+    for value in values:
+        if value.startswith(options.sysroot):
+            value = value[len(options.sysroot):]
+        # Try not to exceed maximum length limits for env vars on Windows
+        if os.name == 'nt':
+            value = win32_get_short_path_name(value)
+        # Don't add the same value twice
+        if value and value not in known and value not in added:
+            added[value] = None
+    if not added:
         return
-    set_env_var(env, var, val + env_val, options)
-    set_env_var(env, var, env[var].replace(os.pathsep + os.pathsep, os.pathsep).strip(os.pathsep), options)
+    set_env_var(env, var, os.pathsep.join(list(reversed(added)) + current), options)
 
 
 def get_target_install_filename(target, filename):
@@ -264,6 +279,165 @@ def is_bash_completion_available(options):
     return os.path.exists(os.path.join(options.builddir, 'subprojects/gstreamer/data/bash-completion/helpers/gst'))
 
 
+def get_build_paths_cache_key(options):
+    '''
+    The cached build paths are invalidated as soon as meson regenerates its
+    introspection data or the plugins paths change
+    '''
+    files = [os.path.join(options.builddir, 'meson-info', name) for name in
+             ['intro-targets.json', 'intro-buildoptions.json', 'intro-installed.json']]
+    files += [os.path.join(options.builddir, *sub_directories, 'GstPluginsPath.json')
+              for sub_directories in [[], ['subprojects', 'gstreamer']]]
+    mtimes = []
+    for f in files:
+        try:
+            mtimes.append(os.stat(f).st_mtime_ns)
+        except OSError:
+            mtimes.append(None)
+    return [ENV_CACHE_VERSION, options.srcdir, options.builddir] + mtimes
+
+
+def get_build_paths(options):
+    '''
+    Returns the paths of the build outputs, see compute_build_paths(), cached
+    in the build directory as computing them requires running meson
+    introspect
+    '''
+    cache_file = os.path.join(options.builddir, 'meson-private', 'gst-env-cache.json')
+    key = get_build_paths_cache_key(options)
+    try:
+        with open(cache_file) as f:
+            cache = json.load(f)
+        if cache['key'] == key:
+            return cache['paths']
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+
+    paths = compute_build_paths(options)
+    try:
+        os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        with tempfile.NamedTemporaryFile('w', dir=os.path.dirname(cache_file),
+                                         delete=False) as f:
+            json.dump({'key': key, 'paths': paths}, f)
+        os.replace(f.name, cache_file)
+    except OSError as e:
+        print('Could not cache the environment in {}: {}'.format(cache_file, e))
+
+    return paths
+
+
+def compute_build_paths(options):
+    '''
+    Returns the build directories to add to the environment variables, in
+    the order they have to be prepended
+    '''
+    meson = get_meson()
+    targets_s = subprocess.check_output(meson + ['introspect', options.builddir, '--targets'])
+    targets = json.loads(targets_s.decode())
+    # Ordered sets
+    typelibs = {}
+    libraries = {}
+    gio_modules = {}
+    plugins = {}
+    paths = set()
+    mono_paths = set()
+    srcdir_path = pathlib.Path(options.srcdir)
+
+    build_options_s = subprocess.check_output(meson + ['introspect', options.builddir, '--buildoptions'])
+    build_options = json.loads(build_options_s.decode())
+    libdir, = [o['value'] for o in build_options if o['name'] == 'libdir']
+    libdir = PurePath(libdir)
+    prefix, = [o['value'] for o in build_options if o['name'] == 'prefix']
+    bindir, = [o['value'] for o in build_options if o['name'] == 'bindir']
+    prefix = PurePath(prefix)
+    bindir = prefix / bindir
+
+    global GSTPLUGIN_FILEPATH_REG_TEMPLATE
+    GSTPLUGIN_FILEPATH_REG_TEMPLATE = GSTPLUGIN_FILEPATH_REG_TEMPLATE.format(libdir=libdir.as_posix())
+
+    for target in targets:
+        filenames = listify(target['filename'])
+        if not target['installed']:
+            continue
+        for filename in filenames:
+            root = os.path.dirname(filename)
+            if srcdir_path / "subprojects/gst-devtools/validate/plugins" in (srcdir_path / root).parents:
+                continue
+            if filename.endswith('.dll'):
+                mono_paths.add(os.path.join(options.builddir, root))
+            if TYPELIB_REG.search(filename):
+                typelibs[os.path.join(options.builddir, root)] = None
+            elif is_library_target_and_not_plugin(target, filename):
+                libraries[os.path.join(options.builddir, root)] = None
+            elif is_binary_target_and_in_path(target, filename, bindir):
+                paths.add(os.path.join(options.builddir, root))
+            elif is_gio_module(target, filename, options.builddir):
+                gio_modules[os.path.join(options.builddir, root)] = None
+
+    # Search for the Plugin paths file either in the build directory root
+    # or check if gstreamer is a subproject of another project
+    for sub_directories in [[], ['subprojects', 'gstreamer']]:
+        plugin_paths = os.path.join(options.builddir, *sub_directories, 'GstPluginsPath.json')
+        if os.path.exists(plugin_paths):
+            with open(plugin_paths) as f:
+                for plugin_path in json.load(f):
+                    plugins[plugin_path] = None
+            break
+
+    presets = set()
+    encoding_targets = set()
+    python_dirs = set()
+    overrides_dirs = set()
+    if '--installed' in subprocess.check_output(meson + ['introspect', '-h']).decode():
+        installed_s = subprocess.check_output(meson + ['introspect', options.builddir, '--installed'])
+        for path, installpath in json.loads(installed_s.decode()).items():
+            installpath_parts = pathlib.Path(installpath).parts
+
+            # We want to add all python modules to the PYTHONPATH
+            # in a manner consistent with the way they would be imported:
+            # For example if the source path /home/meh/foo/bar.py
+            # is to be installed in /usr/lib/python/site-packages/foo/bar.py,
+            # we want to add /home/meh to the PYTHONPATH.
+            # This will only work for projects where the paths to be installed
+            # mirror the installed directory layout, for example if the path
+            # is /home/meh/baz/bar.py and the install path is
+            # /usr/lib/site-packages/foo/bar.py , we will not add anything
+            # to PYTHONPATH, but the current approach works with pygobject
+            # and gst-python at least.
+            py_package = None
+            if 'site-packages' in installpath_parts:
+                py_package = 'site-packages'
+            elif 'dist-packages' in installpath_parts:
+                py_package = 'dist-packages'
+            if py_package:
+                install_subpath = os.path.join(*installpath_parts[installpath_parts.index(py_package) + 1:])
+                if path.endswith(install_subpath):
+                    if os.path.commonprefix(["gi/overrides", install_subpath]):
+                        overrides_dirs.add(os.path.dirname(path))
+                    else:
+                        python_dirs.add(path[:len(install_subpath) * -1])
+
+            if path.endswith('.prs'):
+                presets.add(os.path.dirname(path))
+            elif path.endswith('.gep'):
+                encoding_targets.add(
+                    os.path.abspath(os.path.join(os.path.dirname(path), '..')))
+
+    # Sort to iterate in a consistent order (`set`s and `hash`es are randomized)
+    return {
+        'typelibs': list(typelibs),
+        'libraries': list(libraries),
+        'gio_modules': list(gio_modules),
+        'plugins': list(plugins),
+        'binaries': sorted(paths),
+        'mono': sorted(mono_paths),
+        'python': sorted(python_dirs),
+        'overrides': sorted(overrides_dirs),
+        'presets': sorted(presets),
+        'encoding_targets': sorted(encoding_targets),
+    }
+
+
 def get_subprocess_env(options, gst_version):
     env = os.environ.copy()
 
@@ -367,124 +541,28 @@ def get_subprocess_env(options, gst_version):
         prepend_env_var(env, 'PATH', os.path.dirname(os.environ['QMAKE']),
                         options)
 
-    meson = get_meson()
-    targets_s = subprocess.check_output(meson + ['introspect', options.builddir, '--targets'])
-    targets = json.loads(targets_s.decode())
-    paths = set()
-    mono_paths = set()
-    srcdir_path = pathlib.Path(options.srcdir)
-
-    build_options_s = subprocess.check_output(meson + ['introspect', options.builddir, '--buildoptions'])
-    build_options = json.loads(build_options_s.decode())
-    libdir, = [o['value'] for o in build_options if o['name'] == 'libdir']
-    libdir = PurePath(libdir)
-    prefix, = [o['value'] for o in build_options if o['name'] == 'prefix']
-    bindir, = [o['value'] for o in build_options if o['name'] == 'bindir']
-    prefix = PurePath(prefix)
-    bindir = prefix / bindir
-
-    global GSTPLUGIN_FILEPATH_REG_TEMPLATE
-    GSTPLUGIN_FILEPATH_REG_TEMPLATE = GSTPLUGIN_FILEPATH_REG_TEMPLATE.format(libdir=libdir.as_posix())
-
-    for target in targets:
-        filenames = listify(target['filename'])
-        if not target['installed']:
-            continue
-        for filename in filenames:
-            root = os.path.dirname(filename)
-            if srcdir_path / "subprojects/gst-devtools/validate/plugins" in (srcdir_path / root).parents:
-                continue
-            if filename.endswith('.dll'):
-                mono_paths.add(os.path.join(options.builddir, root))
-            if TYPELIB_REG.search(filename):
-                prepend_env_var(env, "GI_TYPELIB_PATH",
-                                os.path.join(options.builddir, root),
-                                options)
-            elif is_library_target_and_not_plugin(target, filename):
-                prepend_env_var(env, lib_path_envvar,
-                                os.path.join(options.builddir, root),
-                                options)
-            elif is_binary_target_and_in_path(target, filename, bindir):
-                paths.add(os.path.join(options.builddir, root))
-            elif is_gio_module(target, filename, options.builddir):
-                prepend_env_var(env, 'GIO_EXTRA_MODULES',
-                                os.path.join(options.builddir, root),
-                                options)
-
-    # Search for the Plugin paths file either in the build directory root
-    # or check if gstreamer is a subproject of another project
-    for sub_directories in [[], ['subprojects', 'gstreamer']]:
-        plugin_paths = os.path.join(options.builddir, *sub_directories, 'GstPluginsPath.json')
-        if os.path.exists(plugin_paths):
-            with open(plugin_paths) as f:
-                for plugin_path in json.load(f):
-                    prepend_env_var(env, 'GST_PLUGIN_PATH', plugin_path,
-                                    options)
-            break
-
-    # Sort to iterate in a consistent order (`set`s and `hash`es are randomized)
-    for p in sorted(paths):
-        prepend_env_var(env, 'PATH', p, options)
+    build_paths = get_build_paths(options)
+    prepend_env_vars(env, "GI_TYPELIB_PATH", build_paths['typelibs'], options)
+    prepend_env_vars(env, lib_path_envvar, build_paths['libraries'], options)
+    prepend_env_vars(env, 'GIO_EXTRA_MODULES', build_paths['gio_modules'], options)
+    prepend_env_vars(env, 'GST_PLUGIN_PATH', build_paths['plugins'], options)
+    prepend_env_vars(env, 'PATH', build_paths['binaries'], options)
 
     if os.name != 'nt':
-        for p in sorted(mono_paths):
-            prepend_env_var(env, "MONO_PATH", p, options)
+        prepend_env_vars(env, "MONO_PATH", build_paths['mono'], options)
 
-    presets = set()
-    encoding_targets = set()
     python_dirs = setup_gdb(options)
-    overrides_dirs = set()
-    if '--installed' in subprocess.check_output(meson + ['introspect', '-h']).decode():
-        installed_s = subprocess.check_output(meson + ['introspect', options.builddir, '--installed'])
-        for path, installpath in json.loads(installed_s.decode()).items():
-            installpath_parts = pathlib.Path(installpath).parts
-
-            # We want to add all python modules to the PYTHONPATH
-            # in a manner consistent with the way they would be imported:
-            # For example if the source path /home/meh/foo/bar.py
-            # is to be installed in /usr/lib/python/site-packages/foo/bar.py,
-            # we want to add /home/meh to the PYTHONPATH.
-            # This will only work for projects where the paths to be installed
-            # mirror the installed directory layout, for example if the path
-            # is /home/meh/baz/bar.py and the install path is
-            # /usr/lib/site-packages/foo/bar.py , we will not add anything
-            # to PYTHONPATH, but the current approach works with pygobject
-            # and gst-python at least.
-            py_package = None
-            if 'site-packages' in installpath_parts:
-                py_package = 'site-packages'
-            elif 'dist-packages' in installpath_parts:
-                py_package = 'dist-packages'
-            if py_package:
-                install_subpath = os.path.join(*installpath_parts[installpath_parts.index(py_package) + 1:])
-                if path.endswith(install_subpath):
-                    if os.path.commonprefix(["gi/overrides", install_subpath]):
-                        overrides_dirs.add(os.path.dirname(path))
-                    else:
-                        python_dirs.add(path[:len(install_subpath) * -1])
-
-            if path.endswith('.prs'):
-                presets.add(os.path.dirname(path))
-            elif path.endswith('.gep'):
-                encoding_targets.add(
-                    os.path.abspath(os.path.join(os.path.dirname(path), '..')))
-
-        for p in sorted(presets):
-            prepend_env_var(env, 'GST_PRESET_PATH', p, options)
-
-        for t in sorted(encoding_targets):
-            prepend_env_var(env, 'GST_ENCODING_TARGET_PATH', t, options)
+    python_dirs.update(build_paths['python'])
+    prepend_env_vars(env, 'GST_PRESET_PATH', build_paths['presets'], options)
+    prepend_env_vars(env, 'GST_ENCODING_TARGET_PATH', build_paths['encoding_targets'], options)
 
     # Check if meson has generated -uninstalled pkgconfig files
     meson_uninstalled = pathlib.Path(options.builddir) / 'meson-uninstalled'
     if meson_uninstalled.is_dir():
         prepend_env_var(env, 'PKG_CONFIG_PATH', str(meson_uninstalled), options)
 
-    for python_dir in sorted(python_dirs):
-        prepend_env_var(env, 'PYTHONPATH', python_dir, options)
-
-    for python_dir in sorted(overrides_dirs):
-        prepend_env_var(env, '_GI_OVERRIDES_PATH', python_dir, options)
+    prepend_env_vars(env, 'PYTHONPATH', sorted(python_dirs), options)
+    prepend_env_vars(env, '_GI_OVERRIDES_PATH', build_paths['overrides'], options)
 
     mesonpath = os.path.join(SCRIPTDIR, "meson")
     if os.path.join(mesonpath):
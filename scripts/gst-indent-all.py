@@ -1,10 +1,19 @@
 #!/usr/bin/env python3
 
+from concurrent.futures import ThreadPoolExecutor
 from itertools import filterfalse
+import hashlib
+import json
 import os
 import re
 import subprocess
-from gst_indent_common import indent
+import sys
+import tempfile
+import time
+from gst_indent_common import find_indent, indent
+
+# Maximum number of files passed to each gst-indent-1.0 invocation
+BATCH_SIZE = 32
 
 
 def readfile(f):
@@ -25,21 +34,109 @@ def listfiles(single_glob):
                                        universal_newlines=True).splitlines()
 
 
+def get_cache_path():
+    path = os.environ.get('GST_INDENT_CACHE')
+    if path:
+        return path
+    git_dir = subprocess.check_output(['git', 'rev-parse', '--git-dir'],
+                                      universal_newlines=True).strip()
+    return os.path.join(git_dir, 'gst-indent-cache.json')
+
+
+def load_cache(path, version):
+    '''
+    Returns the {filename: hash} of the files known to be properly indented
+    by the @version of gst-indent-1.0
+    '''
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+        if cache['version'] == version:
+            return cache['files']
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+    return {}
+
+
+def save_cache(path, version, files):
+    try:
+        with tempfile.NamedTemporaryFile('w', encoding='utf-8', delete=False,
+                                         dir=os.path.dirname(os.path.abspath(path))) as f:
+            json.dump({'version': version, 'files': files}, f)
+        os.replace(f.name, path)
+    except OSError as e:
+        print(f'Could not save the indent cache to {path}: {e}', file=sys.stderr)
+
+
+def file_hash(filename):
+    with open(filename, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def indent_batch(batch):
+    '''
+    Indents the files of @batch and returns their new hashes, or None
+    if gst-indent-1.0 failed
+    '''
+    try:
+        indent(*batch)
+    except subprocess.CalledProcessError:
+        return None
+    return [file_hash(f) for f in batch]
+
+
 if __name__ == '__main__':
     basedir = os.path.dirname(__file__)
+    start = time.monotonic()
+    _, version = find_indent()
 
     filter_in_c = readfile('.indentignore')
     listing = listfiles('*.c')
     if filter_in_c:
         listing = filterfalse(filter_in_c, listing)
-
-    for entry in listing:
-        indent(entry)
+    files = list(listing)
 
     filter_in_cpp = readfile('.indent_cpp_list')
     listing = listfiles('*.cpp')
     if filter_in_cpp:
         listing = filter(filter_in_cpp, listing)
+    files += listing
+
+    cache_path = get_cache_path()
+    cache = load_cache(cache_path, version)
+    if os.environ.get("CI_PROJECT_NAME"):
+        # All the files are listed, forget about the removed ones
+        listed = set(files)
+        cache = {f: h for f, h in cache.items() if f in listed}
+
+    hashes = {f: file_hash(f) for f in files}
+    to_indent = [f for f in files if cache.get(f) != hashes[f]]
+
+    # Spread the files between all the jobs, several files per invocation
+    jobs = os.cpu_count() or 1
+    batch_size = max(1, min(BATCH_SIZE, -(-len(to_indent) // jobs)))
+    batches = [to_indent[i:i + batch_size] for i in range(0, len(to_indent), batch_size)]
+
+    changed = []
+    failed = []
+    # gst-indent-1.0 runs in its own process, threads are enough
+    with ThreadPoolExecutor(jobs) as executor:
+        for batch, new_hashes in zip(batches, executor.map(indent_batch, batches)):
+            if new_hashes is None:
+                failed += batch
+                continue
+            for f, h in zip(batch, new_hashes):
+                if h != hashes[f]:
+                    changed.append(f)
+                cache[f] = h
+
+    save_cache(cache_path, version, cache)
 
-    for entry in listing:
-        indent(entry)
+    for f in changed:
+        print(f'Indented {f}')
+    print(f'{len(files)} files checked in {time.monotonic() - start:.1f}s: '
+          f'{len(files) - len(to_indent)} unchanged since last run, '
+          f'{len(changed)} reindented, {len(failed)} failed')
+    if failed:
+        print('gst-indent-1.0 failed on:\n  ' + '\n  '.join(failed), file=sys.stderr)
+        sys.exit(1)
@@ -1,8 +1,13 @@
 import shutil
 import subprocess
+from functools import lru_cache
 
 
-def indent(*args):
+@lru_cache()
+def find_indent():
+    '''
+    Returns the path and the version of gst-indent-1.0
+    '''
     indent = shutil.which('gst-indent-1.0')
 
     if not indent:
@@ -14,4 +19,10 @@ def indent(*args):
         raise RuntimeError(f'''Did not find gst-indent-1.0, please install it before continuing.
       (Found {indent}, but it doesn't seem to be gst-indent-1.0)''')
 
+    return indent, version.stdout.strip()
+
+
+def indent(*args):
+    indent, _ = find_indent()
+
     subprocess.check_call([indent] + list(args))
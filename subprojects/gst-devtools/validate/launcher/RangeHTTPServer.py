@@ -55,6 +55,12 @@
             }
             Description: Get the current count of forced failures for the specified path.
             Returns 404 if the path is not being monitored.
+
+    Usage: RangeHTTPServer.py PORT [BANDWIDTH] [--bandwidth-scope=connection|global]
+
+    File content is sent with sendfile() when available. If BANDWIDTH (in
+    bytes per second) is set, the throughput is limited with a token bucket
+    either for each connection or shared between all connections.
 """
 
 
@@ -63,8 +69,10 @@ __version__ = "0.1"
 __all__ = ["RangeHTTPRequestHandler"]
 
 import os
+import argparse
 import json
 import sys
+import threading
 
 from socketserver import ThreadingMixIn
 
@@ -78,14 +86,56 @@ import io
 import time
 
 
-_bandwidth = 0
+# Maximum amount of data sent at once
+CHUNK_SIZE = 1024 * 1024
 
 
 def debug(msg):
     print(f'msg: {msg}', file=sys.stderr)
 
 
+class TokenBucket:
+    """Limits the throughput to @rate bytes per second.
+
+    Tokens are added at @rate and up to @burst bytes can be sent at once. The
+    bucket can be shared between threads, each one sleeping until the data it
+    took is paid back, which keeps the average rate exact whatever the number
+    of concurrent connections.
+    """
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        # Default to 100ms worth of data
+        self.burst = burst or max(1, min(CHUNK_SIZE, rate // 10))
+        self.tokens = self.burst
+        self.last_update = time.monotonic()
+        self.lock = threading.Lock()
+
+    def consume(self, size):
+        """Waits until @size bytes can be sent.
+
+        Returns the number of bytes that can be sent, which is smaller than
+        @size if it is bigger than the bucket.
+        """
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst,
+                              self.tokens + (now - self.last_update) * self.rate)
+            self.last_update = now
+
+            size = min(size, self.burst)
+            self.tokens -= size
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0
+
+        if wait > 0:
+            time.sleep(wait)
+
+        return size
+
+
 class ThreadingSimpleServer(ThreadingMixIn, http.server.HTTPServer):
+    daemon_threads = True
+
     def server_bind(self):
         super().server_bind()
         print(f"PORT: {self.server_port}")
@@ -107,6 +157,39 @@ class RangeHTTPRequestHandler(http.server.BaseHTTPRequestHandler):
     forced_failure_counts = {}
     server_version = "RangeHTTP/" + __version__
 
+    # Bandwidth limitation in bytes per second, 0 means no limitation
+    bandwidth = 0
+    # Bucket shared by all connections when the limitation is global
+    shared_bucket = None
+
+    def setup(self):
+        super().setup()
+        if self.shared_bucket is not None:
+            self.bucket = self.shared_bucket
+        elif self.bandwidth:
+            self.bucket = TokenBucket(self.bandwidth)
+        else:
+            self.bucket = None
+
+    def copy_range(self, f, start_range, end_range):
+        """Sends the [start_range, end_range[ range of @f to the client."""
+        offset = start_range
+        while offset < end_range:
+            chunk = min(CHUNK_SIZE, end_range - offset)
+            if self.bucket:
+                chunk = self.bucket.consume(chunk)
+
+            try:
+                # Uses os.sendfile() when possible, and falls back to
+                # read()/send() for in memory files like directory listings.
+                sent = self.connection.sendfile(f, offset, chunk)
+            except OSError:
+                break
+
+            if not sent:
+                break
+            offset += sent
+
     def start_counting_failure(self, data):
         if not isinstance(data, dict) or 'path' not in data:
             self.send_error(400, "Invalid request body format")
@@ -264,24 +347,10 @@ class RangeHTTPRequestHandler(http.server.BaseHTTPRequestHandler):
         f, start_range, end_range = self.send_head()
         debug("Got values of {} and {}".format(start_range, end_range))
         if f:
-            f.seek(start_range, 0)
-            chunk = 0x1000
-            total = 0
-            while chunk > 0:
-                if start_range + chunk > end_range:
-                    chunk = end_range - start_range
-
-                if _bandwidth != 0:
-                    time_to_sleep = float(float(chunk) / float(_bandwidth))
-                    time.sleep(time_to_sleep)
-
-                try:
-                    self.wfile.write(f.read(chunk))
-                except Exception:
-                    break
-                total += chunk
-                start_range += chunk
-            f.close()
+            try:
+                self.copy_range(f, start_range, end_range)
+            finally:
+                f.close()
 
     def do_HEAD(self):
         """Serve a HEAD request."""
@@ -477,6 +546,20 @@ def test(handler_class=RangeHTTPRequestHandler, server_class=http.server.HTTPSer
 
 
 if __name__ == "__main__":
-    httpd = ThreadingSimpleServer(("0.0.0.0", int(sys.argv[1])), RangeHTTPRequestHandler)
+    parser = argparse.ArgumentParser()
+    parser.add_argument("port", type=int)
+    parser.add_argument("bandwidth", type=int, nargs="?", default=0,
+                        help="Bandwidth limitation in bytes per second (0 means none)")
+    parser.add_argument("--bandwidth-scope", choices=["connection", "global"],
+                        default="connection",
+                        help="Whether the bandwidth is limited for each connection or shared"
+                        " between all of them")
+    args = parser.parse_args()
+
+    RangeHTTPRequestHandler.bandwidth = args.bandwidth
+    if args.bandwidth and args.bandwidth_scope == "global":
+        RangeHTTPRequestHandler.shared_bucket = TokenBucket(args.bandwidth)
+
+    httpd = ThreadingSimpleServer(("0.0.0.0", args.port), RangeHTTPRequestHandler)
     httpd.serve_forever()
     print("EXIT")
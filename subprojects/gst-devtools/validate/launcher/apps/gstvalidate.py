@@ -31,6 +31,7 @@ import configparser
 import json
 import glob
 import math
+import concurrent.futures as conc
 from launcher.loggable import Loggable, error
 
 from launcher.baseclasses import GstValidateTest, Test, \
@@ -709,6 +710,9 @@ class GstValidateSimpleTest(GstValidateTest):
         if self.options.mute:
             self.add_arguments('--use-fakesinks')
 
+    def get_fingerprint_files(self):
+        return super().get_fingerprint_files() + [self.test_file]
+
     def needs_http_server(self):
         try:
             return bool(self.test_info.needs_http_server)
@@ -887,7 +891,7 @@ class GstValidateBaseRTSPTest:
     def __init__(self, local_uri):
         self._local_uri = local_uri
         self.rtsp_server = None
-        self._unsetport_pipeline_desc = None
+        self.rtspserver_logs = None
         self.optional = True
 
     @classmethod
@@ -940,24 +944,25 @@ class GstValidateBaseRTSPTest:
             finally:
                 s.close()
 
-        if not self._unsetport_pipeline_desc:
-            self._unsetport_pipeline_desc = self.pipeline_desc
-
-        self.pipeline_desc = self._unsetport_pipeline_desc.replace(
-            "<RTSPPORTNUMBER>", str(self.server_port))
+        # The port is only known now, after the command was built
+        self.command = [arg.replace("<RTSPPORTNUMBER>", str(self.server_port))
+                        for arg in self.command]
 
         return ' '.join(command)
 
     def close_logfile(self):
         super().close_logfile()
-        if not self.options.redirect_logs:
+        if not self.options.redirect_logs and self.rtspserver_logs:
             self.rtspserver_logs.close()
+            self.rtspserver_logs = None
 
     def process_update(self):
         res = super().process_update()
-        if res:
+        if res and self.rtsp_server is not None:
+            # Not launched when the result was cached
             kill_subprocess(self, self.rtsp_server, DEFAULT_TIMEOUT)
             self.__used_ports.remove(self.server_port)
+            self.rtsp_server = None
 
         return res
 
@@ -972,6 +977,7 @@ class GstValidateRTSPTest(GstValidateBaseRTSPTest, GstValidateLaunchTest):
                                        media_descriptor)
         GstValidateBaseRTSPTest.__init__(self, local_uri)
         self.rtsp2 = rtsp2
+        self.exclusive_groups.add('rtsp-port-range')
 
     def get_subproc_env(self):
         env = super().get_subproc_env()
@@ -1102,6 +1108,8 @@ not been tested and explicitly activated if you set use --wanted-tests ALL""")
         for generator in self.get_generators():
             for test in generator.generate_tests(uris, scenarios):
                 self.add_test(test)
+        GstValidateMediaDescriptor.save_cache()
+        self.scenarios_manager.save_cache()
 
         if not self.tests and not uris and not self.options.wanted_tests:
             self.info("No valid uris present in the path. Check if media files and info files exist")
@@ -1144,6 +1152,13 @@ not been tested and explicitly activated if you set use --wanted-tests ALL""")
             self.debug("Exception: %s for %s", e, media_info)
 
     def _discover_file(self, uri, fpath):
+        """
+        Loads the media info files for @fpath, generating them when required.
+
+        This is called from the discovery thread pool and returns the list of
+        (media_descriptor, uri) to be added with _add_media.
+        """
+        medias = []
         for ext in (GstValidateMediaDescriptor.MEDIA_INFO_EXT,
                 GstValidateMediaDescriptor.PUSH_MEDIA_INFO_EXT,
                 GstValidateMediaDescriptor.SKIPPED_MEDIA_INFO_EXT):
@@ -1159,10 +1174,10 @@ not been tested and explicitly activated if you set use --wanted-tests ALL""")
                 args = GstValidateBaseTestManager.MEDIA_CHECK_COMMAND.split(" ")
                 args.append(uri)
                 if os.path.isfile(media_info) and not self.options.update_media_info and not is_skipped:
-                    self._add_media(media_info, uri)
+                    medias.append((GstValidateMediaDescriptor(media_info), uri))
                     continue
                 elif fpath.endswith(GstValidateMediaDescriptor.STREAM_INFO_EXT) and not is_skipped:
-                    self._add_media(fpath)
+                    medias.append((GstValidateMediaDescriptor(fpath), None))
                     continue
                 elif not self.options.generate_info and not self.options.update_media_info and not self.options.validate_uris:
                     continue
@@ -1184,45 +1199,64 @@ not been tested and explicitly activated if you set use --wanted-tests ALL""")
                 media_descriptor = GstValidateMediaDescriptor.new_from_uri(
                     uri, True, include_frames, is_push, is_skipped)
                 if media_descriptor:
-                    self._add_media(media_descriptor, uri)
+                    medias.append((media_descriptor, uri))
                 else:
                     self.warning("Could not get any descriptor for %s" % uri)
 
             except subprocess.CalledProcessError as e:
                 if self.options.generate_info:
-                    printc("Result: Failed", Colors.FAIL)
+                    printc("Result for %s: Failed" % media_info, Colors.FAIL)
                 else:
                     self.error("Exception: %s", e)
-                return False
-        return True
+        return medias
+
+    def _discover_files(self, files):
+        """
+        Discovers @files, a list of (uri, fpath), running at most
+        options.num_jobs media info generation or parsing at a time.
+        Medias are added in the order of @files so generated tests
+        do not depend on scheduling.
+        """
+        if not files:
+            return
+
+        assert self.options.num_jobs >= 0
+        with conc.ThreadPoolExecutor(max_workers=max(self.options.num_jobs, 1)) as executor:
+            for medias in executor.map(lambda f: self._discover_file(*f), files):
+                for media_descriptor, uri in medias:
+                    self._add_media(media_descriptor, uri)
 
     def _list_uris(self):
         if self._uris:
             return self._uris
 
         if self.options.validate_uris:
-            for uri in self.options.validate_uris:
-                self._discover_file(uri, uri)
+            self._discover_files([(uri, uri) for uri in self.options.validate_uris])
             return self._uris
 
         if not self.args:
             if isinstance(self.options.paths, str):
                 self.options.paths = [os.path.join(self.options.paths)]
 
+            to_discover = []
             for path in self.options.paths:
                 if os.path.isfile(path):
                     path = os.path.abspath(path)
-                    self._discover_file(path2url(path), path)
+                    to_discover.append((path2url(path), path))
                 else:
                     for root, dirs, files in os.walk(path):
+                        root = os.path.abspath(root)
+                        self.scenarios_manager.index_special_scenarios(root, files)
                         for f in files:
-                            fpath = os.path.abspath(os.path.join(root, f))
+                            fpath = os.path.join(root, f)
                             if os.path.isdir(fpath) or \
                                     fpath.endswith(GstValidateMediaDescriptor.MEDIA_INFO_EXT) or\
                                     fpath.endswith(ScenarioManager.FILE_EXTENSION):
                                 continue
                             else:
-                                self._discover_file(path2url(fpath), fpath)
+                                to_discover.append((path2url(fpath), fpath))
+
+            self._discover_files(to_discover)
 
         self.debug("Uris found: %s", self._uris)
 
@@ -1258,6 +1292,11 @@ not been tested and explicitly activated if you set use --wanted-tests ALL""")
         if options.validate_uris or options.validate_generate_ssim_reference_files:
             self.check_testslist = False
 
+        GstValidateMediaDescriptor.load_cache(
+            os.path.join(options.privatedir, "media_descriptors.dat"))
+        self.scenarios_manager.load_cache(
+            os.path.join(options.privatedir, "scenarios_defs.dat"))
+
         super(GstValidateTestManager, self).set_settings(
             options, args, reporter)
 
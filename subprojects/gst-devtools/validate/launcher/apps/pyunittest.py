@@ -16,12 +16,144 @@
 # License along with this program; if not, write to the
 # Free Software Foundation, Inc., 51 Franklin St, Fifth Floor,
 # Boston, MA 02110-1301, USA.
+import json
 import os
+import shutil
+import signal
+import socket
+import struct
+import subprocess
 import sys
+import tempfile
+import threading
 import unittest
+from types import SimpleNamespace
 
+import launcher
 from launcher.baseclasses import Test
 from launcher.baseclasses import TestsManager
+from launcher.loggable import Loggable
+from launcher.utils import Result, printc, Colors
+
+FORKSERVER_PATH = os.path.join(os.path.dirname(launcher.__file__), "pyunittest_forkserver.py")
+
+# Environment variables taken into account when the fork server loads and
+# initializes GStreamer, GST_DEBUG is applied by each forked test.
+FORKSERVER_ENV_PREFIXES = ('GST_', 'GI_', 'LD_')
+FORKSERVER_PER_TEST_ENV = {'GST_DEBUG'}
+
+
+def get_forkserver_env(env):
+    """Returns the part of @env the fork server running a test depends on."""
+    return frozenset((var, value) for var, value in env.items()
+                     if var.startswith(FORKSERVER_ENV_PREFIXES)
+                     and var not in FORKSERVER_PER_TEST_ENV)
+
+
+class ForkedTestProcess:
+    """
+    A test running in the fork server, implementing the subset of
+    subprocess.Popen used by the launcher.
+    """
+
+    def __init__(self, sock):
+        self.sock = sock
+        self.returncode = None
+        self.rusage = None
+        self.pid = self._read_message()['pid']
+
+    def _recv(self, size):
+        data = b''
+        while len(data) < size:
+            chunk = self.sock.recv(size - len(data))
+            if not chunk:
+                raise ConnectionError("Fork server connection closed")
+            data += chunk
+
+        return data
+
+    def _read_message(self):
+        size = struct.unpack('>I', self._recv(4))[0]
+        return json.loads(self._recv(size).decode())
+
+    def poll(self):
+        return self.returncode
+
+    def wait(self, timeout=None):
+        if self.returncode is not None:
+            return self.returncode
+
+        try:
+            message = self._read_message()
+            self.rusage = SimpleNamespace(**message['rusage'])
+            self.returncode = message['returncode']
+        except (ConnectionError, OSError, ValueError):
+            # The fork server died, consider the test as crashed
+            self.returncode = -signal.SIGKILL
+        self.sock.close()
+
+        return self.returncode
+
+    def communicate(self, *args, **kwargs):
+        self.wait()
+        return None, None
+
+    def send_signal(self, sig):
+        if self.returncode is None:
+            try:
+                os.kill(self.pid, sig)
+            except ProcessLookupError:
+                pass
+
+    def terminate(self):
+        self.send_signal(signal.SIGTERM)
+
+    def kill(self):
+        self.send_signal(signal.SIGKILL)
+
+
+class PythonForkServer(Loggable):
+    """
+    Long lived process which imported GStreamer once, from @env, and runs
+    each test in a forked child, see pyunittest_forkserver.py.
+    """
+
+    def __init__(self, preload, env):
+        Loggable.__init__(self)
+        self.tmpdir = tempfile.mkdtemp(prefix="gst-validate-pyunittest-")
+        self.socket_path = os.path.join(self.tmpdir, "forkserver")
+
+        command = [sys.executable, FORKSERVER_PATH]
+        for module in preload:
+            command += ['--preload', module]
+        command.append(self.socket_path)
+
+        self.info("Starting fork server: %s", command)
+        # The server exits when its standard input gets closed, which also
+        # happens if the launcher dies.
+        self.process = subprocess.Popen(command, stdin=subprocess.PIPE,
+                                        stdout=subprocess.PIPE, env=env)
+        if self.process.stdout.readline().strip() != b'READY':
+            self.stop()
+            raise RuntimeError("Could not start the Python tests fork server")
+
+    def run(self, testname, out, env, cwd):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect(self.socket_path)
+            data = json.dumps({'testname': testname, 'env': env, 'cwd': cwd}).encode()
+            socket.send_fds(sock, [struct.pack('>I', len(data)) + data], [out.fileno()])
+
+            return ForkedTestProcess(sock)
+        except BaseException:
+            sock.close()
+            raise
+
+    def stop(self):
+        if self.process.poll() is None:
+            self.process.stdin.close()
+            self.process.wait()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
 
 
 class PythonTest(Test):
@@ -29,18 +161,50 @@ class PythonTest(Test):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self._testname = self.classname
+        self.tests_manager = None
 
     def build_arguments(self):
         """Builds subprocess arguments."""
         self.add_arguments('-m', 'unittest', self._testname)
 
+    def thread_wrapper(self):
+        forkserver = None
+        if self.tests_manager and not (self.options.gdb or self.options.valgrind
+                                       or self.options.rr):
+            forkserver = self.tests_manager.get_forkserver(self.proc_env)
+
+        if forkserver is None:
+            return super().thread_wrapper()
+
+        try:
+            self.process = forkserver.run(self._testname, self.out,
+                                          self.proc_env, self.workdir)
+        except Exception as e:
+            self.warning("Could not run %s in the fork server, starting a new"
+                         " interpreter: %s", self._testname, e)
+            return super().thread_wrapper()
+
+        try:
+            self.process.wait()
+            self.rusage = self.process.rusage
+            if self.result is not Result.TIMEOUT and self.process.returncode == 0:
+                self.run_external_checks()
+        finally:
+            self.queue.put(None)
+
 
 class PythonTestsManager(TestsManager):
     name = "pyunittest"
     arggroup = None
+    # Maximum number of fork servers, one is started for each of the
+    # GStreamer environments the tests run with
+    MAX_FORKSERVERS = 4
 
     def __init__(self):
         super().__init__()
+        # GStreamer environment -> PythonForkServer
+        self.forkservers = {}
+        self.forkserver_lock = threading.Lock()
 
     def add_options(self, parser):
         if self.arggroup:
@@ -52,6 +216,16 @@ class PythonTestsManager(TestsManager):
                               action="append",
                               default=[],
                               help="Paths to look for Python tests.")
+        arggroup.add_argument("--pyunittest-forkserver",
+                              action="store_true",
+                              help="Run the Python tests in processes forked from a"
+                              " server which initialized GStreamer once instead"
+                              " of starting a new interpreter for each test.")
+        arggroup.add_argument("--pyunittest-preload",
+                              action="append",
+                              default=[],
+                              help="Python modules the fork server should import"
+                              " before running the tests, for example 'gi.repository.GES'.")
 
     def list_tests(self):
         if self.tests:
@@ -63,11 +237,43 @@ class PythonTestsManager(TestsManager):
             for testsuite in testsuites:
                 for _tests in testsuite:
                     if isinstance(_tests, unittest.loader._FailedTest):
-                        raise(_tests._exception)
+                        raise _tests._exception
                     for test in _tests:
-                        self.add_test(PythonTest(
+                        pytest = PythonTest(
                             sys.executable, test.id(),
                             self.options, self.reporter,
-                            extra_env_variables={'PYTHONPATH': _dir}))
+                            extra_env_variables={'PYTHONPATH': _dir})
+                        pytest.tests_manager = self
+                        self.add_test(pytest)
 
         return self.tests
+
+    def get_forkserver(self, env):
+        """
+        Returns the fork server to run a test with @env in, None if it should
+        run in a new interpreter.
+        """
+        if not self.options.pyunittest_forkserver or not hasattr(socket, 'send_fds'):
+            return None
+
+        key = get_forkserver_env(env)
+        with self.forkserver_lock:
+            forkserver = self.forkservers.get(key)
+            if forkserver is None:
+                if len(self.forkservers) >= self.MAX_FORKSERVERS:
+                    return None
+
+                try:
+                    forkserver = self.forkservers[key] = PythonForkServer(
+                        self.options.pyunittest_preload, env)
+                except RuntimeError as e:
+                    printc("%s, running each test in a new interpreter" % e, Colors.WARNING)
+                    self.options.pyunittest_forkserver = False
+                    return None
+
+        return forkserver
+
+    def stop(self):
+        for forkserver in self.forkservers.values():
+            forkserver.stop()
+        self.forkservers = {}
@@ -20,14 +20,19 @@
 """ Class representing tests and test managers. """
 
 from enum import Enum
+import hashlib
+import heapq
 import importlib.util
 import json
+import math
 import os
 import sys
 import re
 import copy
+import pickle
+import selectors
 import shlex
-import socketserver
+import socket
 import struct
 import time
 from . import utils
@@ -41,16 +46,17 @@ import xml
 import random
 import shutil
 import uuid
-from itertools import cycle
+from itertools import count, cycle
 from fractions import Fraction
 from pathlib import Path
+from types import SimpleNamespace
 
 from .utils import GstCaps, which
 from . import reporters
 from . import loggable
 from .loggable import Loggable
 
-from collections import defaultdict
+from collections import Counter, defaultdict, deque
 try:
     from lxml import etree as ET
 except ImportError:
@@ -61,7 +67,8 @@ from .vfb_server import get_virual_frame_buffer_server
 from .httpserver import HTTPServer
 from .utils import mkdir, Result, Colors, printc, DEFAULT_TIMEOUT, GST_SECOND, \
     Protocols, look_for_file_in_source_dir, get_data_file, BackTraceGenerator, \
-    check_bugs_resolution, is_tty
+    check_bugs_resolution, is_tty, get_file_signature, get_gst_plugins_files, \
+    RUSAGE_FIELDS
 
 # The factor by which we increase the hard timeout when running inside
 # Valgrind
@@ -78,6 +85,13 @@ EXITING_SIGNALS = dict([(-getattr(signal, s), s) for s in [
 EXITING_SIGNALS.update({139: "SIGSEGV"})
 EXITING_SIGNALS.update({(v, k) for k, v in EXITING_SIGNALS.items()})
 
+# Environment variables that change on each run without influencing the
+# test outcome, they are not taken into account when fingerprinting tests.
+FINGERPRINT_IGNORED_ENV_VARIABLES = ['GST_VALIDATE_UUID', 'GST_VALIDATE_SERVER',
+                                     '_RR_TRACE_DIR', 'GST_DEBUG_FILE',
+                                     'GST_DEBUG_DUMP_DOT_DIR',
+                                     'GST_VALIDATE_DEBUG_DUMP_DOT_URL']
+
 
 CI_ARTIFACTS_URL = os.environ.get('CI_ARTIFACTS_URL')
 DEBUGGER = None
@@ -190,6 +204,18 @@ class Test(Loggable):
         self.max_retries = 0
         self.html_log = None
         self.rr_logdir = None
+        # Fingerprint of the last successful run, set by the launcher when
+        # results caching is enabled
+        self.cached_fingerprint = None
+        # Resources the test needs, taken into account by the launcher when
+        # picking the tests to run in parallel, see get_resources(). The CPU
+        # weight is a number of cores and the memory usage is in bytes, when
+        # None they are learned from previous runs.
+        self.cpu_weight = None
+        self.memory_usage = None
+        # Tests sharing a group name are never run at the same time, unless
+        # the launcher allows more, see _TestsLauncher.BUILTIN_EXCLUSIVE_GROUPS
+        self.exclusive_groups = set()
 
         self.clean()
 
@@ -256,8 +282,54 @@ class Test(Loggable):
         self.__env_variable = []
         self.kill_subprocess()
         self.process = None
+        self.thread = None
         self.timeout = self.orig_timeout
         self.hard_timeout = self.orig_hard_timeout
+        self.fingerprint = None
+        self.cached = False
+        self.rusage = None
+        self.resources_stats = None
+        # Set once the process has been asked to exit after timing out
+        self.killing = False
+
+    def get_resources(self, learned=None):
+        """
+        Returns the (cpu, memory) the test is expected to use, @learned being
+        the one measured in a previous run, see get_measured_resources().
+        """
+        cpu, memory = learned if learned else (1, 0)
+        if self.cpu_weight is not None:
+            cpu = self.cpu_weight
+        if self.memory_usage is not None:
+            memory = self.memory_usage
+
+        return cpu, memory
+
+    def get_resources_stats(self):
+        """
+        Returns the resources used by the test process as a dict using the
+        struct rusage field names (CPU times, peak RSS in bytes, context
+        switches and block I/O operations), or None if unknown.
+        """
+        if self.rusage is None:
+            return None
+
+        stats = {field: getattr(self.rusage, 'ru_' + field) for field in RUSAGE_FIELDS}
+        # ru_maxrss is in bytes on macOS and in kilobytes everywhere else
+        stats['maxrss'] *= 1 if sys.platform == 'darwin' else 1024
+
+        return stats
+
+    def get_measured_resources(self):
+        """
+        Returns the average number of cores and the peak memory used by the
+        test process, or None if unknown.
+        """
+        stats = self.resources_stats
+        if stats is None or self.time_taken <= 0:
+            return None
+
+        return (stats['utime'] + stats['stime']) / self.time_taken, stats['maxrss']
 
     def __str__(self):
         string = self.classname
@@ -521,6 +593,9 @@ class Test(Loggable):
         Returns True when process has finished running or has timed out.
         """
 
+        if self.cached:
+            return True
+
         if self.process is None:
             # Process has not started running yet
             return False
@@ -529,9 +604,23 @@ class Test(Loggable):
         if self.process.returncode is not None:
             return True
 
+        if self.killing:
+            # Timed out, waiting for the process to exit
+            return False
+
         val = self.get_current_value()
 
         self.debug("Got value: %s" % val)
+        if val is Result.FAILED:
+            return True
+        elif val is Result.KNOWN_ERROR:
+            return True
+
+        if self.hard_timeout and time.time() - self.start_ts > self.hard_timeout:
+            self.set_result(
+                Result.TIMEOUT, "Hard timeout reached: %d secs" % self.hard_timeout)
+            return True
+
         if val is Result.NOT_RUN:
             # The get_current_value logic is not implemented... dumb
             # timeout
@@ -542,10 +631,6 @@ class Test(Loggable):
                                 "timeout")
                 return True
             return False
-        elif val is Result.FAILED:
-            return True
-        elif val is Result.KNOWN_ERROR:
-            return True
 
         self.log("New val %s" % val)
 
@@ -559,16 +644,23 @@ class Test(Loggable):
                                 self.timeout,
                                 "timeout")
                 return True
-        elif self.hard_timeout and time.time() - self.start_ts > self.hard_timeout:
-            self.set_result(
-                Result.TIMEOUT, "Hard timeout reached: %d secs" % self.hard_timeout)
-            return True
         else:
             self.last_change_ts = time.time()
             self.last_val = val
 
         return False
 
+    def get_timeout_deadline(self):
+        """
+        Returns the time at which process_update() should next be called
+        for the test to be timed out as soon as possible.
+        """
+        deadline = self.last_change_ts + self.timeout
+        if self.hard_timeout:
+            deadline = min(deadline, self.start_ts + self.hard_timeout)
+
+        return deadline
+
     def get_subproc_env(self):
         return os.environ.copy()
 
@@ -587,6 +679,32 @@ class Test(Loggable):
 
         utils.kill_subprocess(self, self.process, DEFAULT_TIMEOUT, subprocs_id)
 
+    def kill_subprocess_async(self, watchdog):
+        """
+        Asks the timed out process to exit without waiting for it, @watchdog
+        sends it SIGKILL if it is still alive after a grace period. The
+        process is reaped by the test thread, which wakes the launcher up.
+        """
+        self.killing = True
+        if utils.is_windows() or self.options.rr:
+            # Killing rr requires signaling its subprocesses
+            self.kill_subprocess()
+            return
+
+        def sigkill():
+            if self.process.poll() is None:
+                self.debug("Subprocess is still alive, sending SIGKILL")
+                try:
+                    self.process.send_signal(signal.SIGKILL)
+                except OSError:
+                    pass
+
+        try:
+            self.process.send_signal(signal.SIGINT)
+        except OSError:
+            pass
+        watchdog.add(self, time.time() + DEFAULT_TIMEOUT / 4, sigkill)
+
     def run_external_checks(self):
         pass
 
@@ -607,11 +725,49 @@ class Test(Loggable):
                                         env=self.proc_env,
                                         cwd=self.workdir,
                                         preexec_fn=preexec_fn)
-        self.process.wait()
-        if self.result is not Result.TIMEOUT:
-            if self.process.returncode == 0:
-                self.run_external_checks()
-            self.queue.put(None)
+        self.rusage = self._wait_process()
+        if self.result is not Result.TIMEOUT and self.process.returncode == 0:
+            self.run_external_checks()
+        self.queue.put(None)
+
+    def _wait_process(self):
+        """
+        Waits for the test process to exit and returns its resource usage,
+        when the platform allows to retrieve it.
+        """
+        if not hasattr(os, 'wait4') or not hasattr(os, 'waitid'):
+            self.process.wait()
+            return None
+
+        # The main thread polls the process too: only wait for it to exit
+        # here, and reap it while holding the lock Popen uses so that it
+        # never sees ECHILD and mistakes the process for having succeeded.
+        try:
+            os.waitid(os.P_PID, self.process.pid, os.WEXITED | os.WNOWAIT)
+        except ChildProcessError:
+            pass
+
+        # Private to Popen, which does not use it on all platforms
+        waitpid_lock = getattr(self.process, '_waitpid_lock', None)
+        if waitpid_lock is None:
+            self.process.wait()
+            return None
+
+        with waitpid_lock:
+            if self.process.returncode is not None:
+                return None
+
+            try:
+                _, status, rusage = os.wait4(self.process.pid, 0)
+            except ChildProcessError:
+                rusage = None
+            else:
+                self.process.returncode = os.waitstatus_to_exitcode(status)
+
+        if rusage is None:
+            self.process.wait()
+
+        return rusage
 
     def get_valgrind_suppression_file(self, subdir, name):
         p = get_data_file(subdir, name)
@@ -731,10 +887,54 @@ class Test(Loggable):
 
         return message
 
+    def get_fingerprint_files(self):
+        """
+        Lists the files the test depends on, cached results are invalidated
+        as soon as one of them changes.
+        """
+        if not self.command:
+            return []
+
+        return [which(self.command[0]) or self.command[0]]
+
+    def get_fingerprint(self):
+        """
+        Computes a hash of everything the outcome of the test depends on:
+        the command line, the environment, the files returned by
+        get_fingerprint_files and the GStreamer plugins that can be loaded.
+        The logs directory, which can change between runs, is left out.
+        """
+        def strip_logsdir(value):
+            if not os.path.isabs(self.options.logsdir):
+                # Logs redirected to stdout or stderr
+                return value
+            return value.replace(self.options.logsdir, '<LOGSDIR>')
+
+        fingerprint = hashlib.sha256()
+        command = [strip_logsdir(arg) for arg in self.command]
+        fingerprint.update(repr(command).encode('utf-8', 'surrogateescape'))
+        env = [(var, strip_logsdir(value)) for var, value in sorted(self.proc_env.items())
+               if var not in FINGERPRINT_IGNORED_ENV_VARIABLES]
+        fingerprint.update(repr(env).encode('utf-8', 'surrogateescape'))
+        files = [get_file_signature(f) or f
+                 for f in sorted(set(self.get_fingerprint_files()))]
+        fingerprint.update(repr(files).encode('utf-8', 'surrogateescape'))
+        fingerprint.update(repr(get_gst_plugins_files(self.proc_env)).encode(
+            'utf-8', 'surrogateescape'))
+
+        return fingerprint.hexdigest()
+
+    def _set_cached_result(self):
+        self.cached = True
+        if not self.options.redirect_logs:
+            self.out.write("Inputs did not change since the test last passed,"
+                           " reusing cached result.\n")
+        self.set_result(Result.PASSED, "cached")
+        self.queue.put(None)
+
     def test_start(self, queue):
         self.open_logfile()
 
-        self.server_command = self.launch_server()
         self.queue = queue
         self.command = [self.application]
         self._starting_time = time.time()
@@ -760,6 +960,17 @@ class Test(Loggable):
         if self.options.rr:
             self.command = self.use_rr(self.command, self.proc_env)
 
+        cached = False
+        if self.options.cache_results:
+            # Computed before launching the server, so that its per run
+            # settings are not taken into account
+            self.fingerprint = self.get_fingerprint()
+            cached = self.fingerprint == self.cached_fingerprint
+
+        self.server_command = None
+        if not cached:
+            self.server_command = self.launch_server()
+
         if not self.options.redirect_logs:
             self.out.write("# `%s`\n\n"
                            "## Command\n\n``` bash\n%s\n```\n\n" % (
@@ -772,13 +983,17 @@ class Test(Loggable):
                                        self.get_command_repr())
             printc(message, Colors.OKBLUE)
 
-        self.thread = threading.Thread(target=self.thread_wrapper)
-        self.thread.start()
-
         self.last_val = 0
         self.last_change_ts = time.time()
         self.start_ts = time.time()
 
+        if cached:
+            self._set_cached_result()
+            return
+
+        self.thread = threading.Thread(target=self.thread_wrapper)
+        self.thread.start()
+
     def _dump_log_file(self, logfile):
         if which('bat'):
             try:
@@ -810,8 +1025,10 @@ class Test(Loggable):
 
     def test_end(self, retry_on_failures=False):
         self.kill_subprocess()
-        self.thread.join()
+        if self.thread:
+            self.thread.join()
         self.time_taken = time.time() - self._starting_time
+        self.resources_stats = self.get_resources_stats()
 
         if self.options.gdb:
             signal.signal(signal.SIGINT, self.previous_sigint_handler)
@@ -830,82 +1047,516 @@ class Test(Loggable):
         return self.result
 
 
-class GstValidateTCPServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
-    pass
+class FramedMessagesReader:
+    """
+    Reads messages prefixed with their length, as a 4 bytes big endian
+    integer, from a socket into a preallocated buffer.
+    """
+    HEADER_SIZE = 4
+
+    def __init__(self, sock, bufsize=64 * 1024):
+        self.sock = sock
+        self.buffer = bytearray(bufsize)
+        self.view = memoryview(self.buffer)
+        # Pending data is in buffer[start:end]
+        self.start = 0
+        self.end = 0
+
+    def _make_room(self):
+        pending = self.end - self.start
+        if self.start:
+            self.buffer[:pending] = self.buffer[self.start:self.end]
+            self.start, self.end = 0, pending
+
+        needed = pending + 1
+        if pending >= self.HEADER_SIZE:
+            needed = self.HEADER_SIZE + struct.unpack_from('>I', self.buffer)[0]
+        if needed > len(self.buffer):
+            self.view.release()
+            self.buffer.extend(bytes(max(needed, 2 * len(self.buffer)) - len(self.buffer)))
+            self.view = memoryview(self.buffer)
+
+    def read(self):
+        """
+        Reads the available data and returns the complete messages received
+        so far, or None if the connection has been closed.
+        """
+        if self.end == len(self.buffer):
+            self._make_room()
+
+        try:
+            received = self.sock.recv_into(self.view[self.end:])
+        except (BlockingIOError, InterruptedError):
+            return []
+        except OSError:
+            received = 0
+
+        if not received:
+            return None
+
+        self.end += received
+        messages = []
+        while self.end - self.start >= self.HEADER_SIZE:
+            msglen = struct.unpack_from('>I', self.buffer, self.start)[0]
+            msgstart = self.start + self.HEADER_SIZE
+            if self.end - msgstart < msglen:
+                break
+
+            messages.append(bytes(self.view[msgstart:msgstart + msglen]))
+            self.start = msgstart + msglen
+
+        if self.start == self.end:
+            self.start = self.end = 0
 
+        return messages
 
-class GstValidateListener(socketserver.BaseRequestHandler, Loggable):
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
+class GstValidateListener(Loggable):
+    """
+    Receives the messages (reports, positions, actions...) sent by the
+    GstValidate processes, all connections being handled from a single
+    thread.
+    """
+
+    def __init__(self, launcher):
         Loggable.__init__(self, "GstValidateListener")
+        self.launcher = launcher
+        self.selector = None
+        self.socket = None
+        self.thread = None
+        self._stopping = False
+
+    def start(self):
+        """Starts listening on localhost and returns the port used."""
+        self.socket = socket.create_server(('localhost', 0))
+        self.socket.setblocking(False)
+        self.selector = selectors.DefaultSelector()
+        self.selector.register(self.socket, selectors.EVENT_READ)
+        self._stopping = False
+        self.thread = threading.Thread(target=self._serve)
+        self.thread.start()
 
-    def handle(self):
-        """Implements BaseRequestHandler handle method"""
-        test = None
-        self.logCategory = "GstValidateListener"
-        while True:
-            raw_len = self.request.recv(4)
-            if raw_len == b'':
-                return
-            msglen = struct.unpack('>I', raw_len)[0]
-            e = None
-            raw_msg = bytes()
-            while msglen != len(raw_msg):
-                raw_msg += self.request.recv(msglen - len(raw_msg))
-            if e is not None:
+        return self.socket.getsockname()[1]
+
+    def stop(self):
+        self._stopping = True
+        self.thread.join()
+        for key in list(self.selector.get_map().values()):
+            key.fileobj.close()
+        self.selector.close()
+
+    def _serve(self):
+        while not self._stopping:
+            for key, _ in self.selector.select(timeout=0.05):
+                if key.fileobj is self.socket:
+                    self._accept()
+                elif not self._read(key.data):
+                    self.selector.unregister(key.fileobj)
+                    key.fileobj.close()
+
+    def _accept(self):
+        try:
+            conn, _ = self.socket.accept()
+        except (BlockingIOError, InterruptedError):
+            return
+
+        conn.setblocking(False)
+        connection = SimpleNamespace(reader=FramedMessagesReader(conn), test=None)
+        self.selector.register(conn, selectors.EVENT_READ, connection)
+
+    def _read(self, connection):
+        """Returns False when the connection should be closed."""
+        messages = connection.reader.read()
+        if messages is None:
+            return False
+
+        # Only the last position of a batch matters, it is applied before any
+        # other message so that their relative order is preserved.
+        position = None
+        for raw_msg in messages:
+            obj = self._decode(connection.test, raw_msg)
+            if obj is False:
+                return False
+            elif obj is None:
                 continue
-            try:
-                msg = raw_msg.decode('utf-8', 'ignore')
-            except UnicodeDecodeError as e:
-                self.error("%s Could not decode message: %s - %s" % (test.classname if test else "unknown", msg, e))
+
+            if connection.test is None:
+                # First message must contain the uuid
+                uuid = obj.get("uuid", None)
+                if uuid is None:
+                    return False
+                connection.test = self.launcher.get_test_by_uuid(uuid)
+                if connection.test is None:
+                    self.launcher.error(
+                        "Could not find test for UUID %s" % uuid)
+                    return False
+
+            if obj.get("type", '') == 'position':
+                position = obj
                 continue
 
-            if msg == '':
-                return
+            if position is not None:
+                self.handle_message(connection.test, position)
+                position = None
+            self.handle_message(connection.test, obj)
+
+        if position is not None:
+            self.handle_message(connection.test, position)
+
+        return True
 
+    def _decode(self, test, raw_msg):
+        """
+        Returns the message as a dict, None if it should be ignored
+        or False if the connection should be closed.
+        """
+        msg = raw_msg.decode('utf-8', 'ignore')
+        if msg == '':
+            return False
+
+        try:
+            return json.loads(msg)
+        except json.decoder.JSONDecodeError as e:
+            self.error("%s Could not decode message: %s - %s" % (test.classname if test else "unknown", msg, e))
+            return None
+
+    def handle_message(self, test, obj):
+        obj_type = obj.get("type", '')
+        if obj_type == 'position':
+            test.set_position(obj['position'], obj['duration'],
+                              obj['speed'])
+        elif obj_type == 'buffering':
+            test.set_position(obj['position'], 100)
+        elif obj_type == 'action':
+            test.add_action_execution(obj)
+            # Make sure that action is taken into account when checking if process
+            # is updating
+            test.position += 1
+        elif obj_type == 'action-done':
+            # Make sure that action end is taken into account when checking if process
+            # is updating
+            test.position += 1
+            if test.actions_infos:
+                test.actions_infos[-1]['execution-duration'] = obj['execution-duration']
+        elif obj_type == 'report':
+            test.add_report(obj)
+        elif obj_type == 'skip-test':
+            test.set_result(Result.SKIPPED)
+
+
+def send_framed_message(sock, obj):
+    """Sends @obj as JSON, framed to be read by a FramedMessagesReader."""
+    data = json.dumps(obj).encode()
+    sock.sendall(struct.pack('>I', len(data)) + data)
+
+
+class TestsCoordinator(Loggable):
+    """
+    Hands the tests out to the TestsWorker-s connecting to it, one at a time
+    as they request them so that the load is balanced between the workers,
+    and reports the results they send back.
+    """
+
+    def __init__(self, launcher, address):
+        Loggable.__init__(self, "TestsCoordinator")
+        self.launcher = launcher
+        self.address = address
+        self.selector = None
+        self.socket = None
+        self.tests = {}
+        self.tests_left = deque()
+        # Connection -> tests it is running
+        self.running = {}
+        # Connections waiting for a test while the remaining ones are running
+        # on other workers, and might be handed out again if those die
+        self.waiting = []
+        self.num_done = 0
+
+    def run(self, tests):
+        self.tests = {test.classname: test for test in tests}
+        # Tests that have to run alone are handed out last
+        self.tests_left = deque([t for t in tests if t.is_parallel]
+                                + [t for t in tests if not t.is_parallel])
+        self.num_done = 0
+
+        self.socket = socket.create_server(self.address)
+        self.socket.setblocking(False)
+        self.selector = selectors.DefaultSelector()
+        self.selector.register(self.socket, selectors.EVENT_READ)
+        printc("\nServing %d tests to workers on %s:%d..." % (
+            len(tests), self.address[0], self.socket.getsockname()[1]), Colors.HEADER)
+
+        self.launcher.reporter.init_timer()
+        try:
+            while self.num_done < len(self.tests):
+                for key, _ in self.selector.select(timeout=1):
+                    if key.fileobj is self.socket:
+                        self._accept()
+                    elif not self._read(key.fileobj, key.data):
+                        self._close(key.fileobj)
+
+            for conn in self.waiting:
+                send_framed_message(conn, {'type': 'done'})
+        finally:
+            for key in list(self.selector.get_map().values()):
+                key.fileobj.close()
+            self.selector.close()
+
+        return all(test.result in [Result.PASSED, Result.SKIPPED, Result.KNOWN_ERROR]
+                   for test in self.tests.values())
+
+    def _accept(self):
+        try:
+            conn, address = self.socket.accept()
+        except (BlockingIOError, InterruptedError):
+            return
+
+        self.info("Worker connected from %s:%d", *address[:2])
+        # Replies are small, sending them blocking is fine
+        conn.setblocking(True)
+        self.running[conn] = set()
+        self.selector.register(conn, selectors.EVENT_READ, FramedMessagesReader(conn))
+
+    def _close(self, conn):
+        self.selector.unregister(conn)
+        conn.close()
+        if conn in self.waiting:
+            self.waiting.remove(conn)
+
+        lost = self.running.pop(conn, set())
+        if lost:
+            printc("Worker disconnected while running %s, rescheduling" % (
+                ', '.join(test.classname for test in lost)), Colors.WARNING)
+            self.tests_left.extendleft(lost)
+            while self.waiting and self.tests_left:
+                self._send_next_test(self.waiting.pop(0))
+
+    def _read(self, conn, reader):
+        """Returns False when the connection should be closed."""
+        messages = reader.read()
+        if messages is None:
+            return False
+
+        for raw_msg in messages:
             try:
-                obj = json.loads(msg)
+                msg = json.loads(raw_msg.decode('utf-8', 'replace'))
             except json.decoder.JSONDecodeError as e:
-                self.error("%s Could not decode message: %s - %s" % (test.classname if test else "unknown", msg, e))
+                self.error("Could not decode worker message: %s", e)
+                return False
+
+            if msg.get('type') == 'request':
+                self._send_next_test(conn)
+            elif msg.get('type') == 'log':
+                if not self._handle_log(conn, msg):
+                    return False
+            elif msg.get('type') == 'result':
+                if not self._handle_result(conn, msg):
+                    return False
+
+        return True
+
+    def _send_next_test(self, conn):
+        if self.tests_left:
+            test = self.tests_left.popleft()
+            self.running[conn].add(test)
+            send_framed_message(conn, {'type': 'test', 'classname': test.classname})
+        elif self.running[conn]:
+            # The worker will ask again once one of its tests is done
+            send_framed_message(conn, {'type': 'wait'})
+        elif any(self.running.values()):
+            self.waiting.append(conn)
+        else:
+            send_framed_message(conn, {'type': 'done'})
+
+    def _handle_result(self, conn, msg):
+        test = self.tests.get(msg.get('classname'))
+        if test is None or test not in self.running[conn]:
+            self.error("Got result for unexpected test %s", msg.get('classname'))
+            return False
+
+        self.running[conn].remove(test)
+        # Results are compared by identity
+        results = [getattr(Result, attr) for attr in dir(Result) if not attr.startswith('_')]
+        test.result = next((r for r in results if r == msg['result']), Result.FAILED)
+        test.message = msg.get('message', '')
+        test.error_str = msg.get('error', '')
+        test.time_taken = msg.get('time_taken', 0.0)
+        test.resources_stats = msg.get('resources_stats')
+
+        self.num_done += 1
+        self.launcher.print_result(self.num_done, test, len(self.tests))
+        self.launcher.reporter.after_test(test)
+
+        return True
+
+    def _handle_log(self, conn, msg):
+        """
+        Writes a chunk of a log the worker sent in the local logs directory.
+        """
+        test = self.tests.get(msg.get('classname'))
+        if test is None or test not in self.running[conn]:
+            self.error("Got logs for unexpected test %s", msg.get('classname'))
+            return False
+
+        if self.launcher.options.redirect_logs:
+            return True
+
+        test.logfile = os.path.join(self.launcher.options.logsdir,
+                                    test.classname.replace(".", os.sep) + '.md')
+        path = test.logfile
+        if not msg['main']:
+            path = os.path.join(os.path.dirname(test.logfile), msg['name'])
+            test.extra_logfiles.add(path)
+
+        mkdir(os.path.dirname(path))
+        with open(path, 'w' if msg['first'] else 'a') as f:
+            f.write(msg['data'])
+
+        return True
+
+
+class TestsWorker(Loggable):
+    """
+    Runs the tests a TestsCoordinator hands out, requesting a new one each
+    time a job slot is free, and sends their results and logs back.
+    """
+    # Maximum number of characters of a log sent in a single message
+    LOG_CHUNK_SIZE = 256 * 1024
+
+    def __init__(self, launcher, address):
+        Loggable.__init__(self, "TestsWorker")
+        self.launcher = launcher
+        self.address = address
+        self.socket = None
+        self.reader = None
+        self.num_done = 0
+
+    def _receive(self):
+        while True:
+            messages = self.reader.read()
+            if messages is None:
+                raise ConnectionError("Coordinator closed the connection")
+            if messages:
+                return json.loads(messages[0].decode('utf-8', 'replace'))
+
+    def _request_test(self):
+        """
+        Returns the name of the next test to run, None if there is none for
+        now or False if all tests have been handed out.
+        """
+        try:
+            send_framed_message(self.socket, {'type': 'request'})
+            msg = self._receive()
+        except OSError:
+            # The coordinator exits as soon as all the results are in
+            return False
+
+        if msg.get('type') == 'wait':
+            return None
+        elif msg.get('type') != 'test':
+            return False
+
+        return msg['classname']
+
+    def run(self, tests):
+        tests = {test.classname: test for test in tests}
+        num_jobs = self.launcher.options.num_jobs
+        self.socket = socket.create_connection(self.address)
+        self.reader = FramedMessagesReader(self.socket)
+        printc("\nRunning tests from %s:%d..." % self.address, Colors.HEADER)
+
+        self.launcher.reporter.init_timer()
+        res = True
+        try:
+            exhausted = False
+            while True:
+                while not exhausted and len(self.launcher.jobs) < num_jobs and \
+                        all(job.is_parallel for job in self.launcher.jobs):
+                    classname = self._request_test()
+                    if not classname:
+                        exhausted = classname is False
+                        break
+
+                    test = tests.get(classname)
+                    if test is None:
+                        self._send_result(classname, Result.FAILED,
+                                          "Test not found on worker")
+                        res = False
+                        continue
+
+                    tests_left = _WaitingTests(self.launcher, [test])
+                    max_jobs = num_jobs if test.is_parallel else 1
+                    while not self.launcher.start_new_job(tests_left, max_jobs):
+                        res &= self._test_done(self.launcher.tests_wait())
+
+                if not self.launcher.jobs:
+                    break
+
+                res &= self._test_done(self.launcher.tests_wait())
+        finally:
+            self.socket.close()
+
+        return res
+
+    def _test_done(self, test):
+        res = test.test_end()
+        self.launcher._update_results_cache(test)
+        self.launcher._update_resources_usage(test)
+
+        if not self.launcher.options.redirect_logs:
+            self._send_logs(test)
+        self._send_result(test.classname, res, test.message, test.error_str,
+                          test.time_taken, test.resources_stats)
+
+        self.num_done += 1
+        printc("[%d] %s" % (self.num_done, test),
+               color=utils.get_color_for_result(test.result))
+        self.launcher.reporter.after_test(test)
+        if res == Result.PASSED and not self.launcher.options.keep_logs:
+            test.remove_logs()
+
+        return res in [Result.PASSED, Result.SKIPPED, Result.KNOWN_ERROR]
+
+    def _send_logs(self, test):
+        """
+        Sends the logs of @test, in chunks so that they are never loaded in
+        memory at once.
+        """
+        logfiles = [test.logfile] if test.logfile else []
+        for logfile in logfiles + sorted(test.extra_logfiles):
+            try:
+                f = open(logfile, errors='replace')
+            except OSError:
                 continue
 
-            if test is None:
-                # First message must contain the uuid
-                uuid = obj.get("uuid", None)
-                if uuid is None:
-                    return
-                # Find test from launcher
-                for t in self.server.launcher.tests:
-                    if uuid == t.get_uuid():
-                        test = t
+            with f:
+                first = True
+                while True:
+                    data = f.read(self.LOG_CHUNK_SIZE)
+                    if not data and not first:
                         break
-                if test is None:
-                    self.server.launcher.error(
-                        "Could not find test for UUID %s" % uuid)
-                    return
 
-            obj_type = obj.get("type", '')
-            if obj_type == 'position':
-                test.set_position(obj['position'], obj['duration'],
-                                  obj['speed'])
-            elif obj_type == 'buffering':
-                test.set_position(obj['position'], 100)
-            elif obj_type == 'action':
-                test.add_action_execution(obj)
-                # Make sure that action is taken into account when checking if process
-                # is updating
-                test.position += 1
-            elif obj_type == 'action-done':
-                # Make sure that action end is taken into account when checking if process
-                # is updating
-                test.position += 1
-                if test.actions_infos:
-                    test.actions_infos[-1]['execution-duration'] = obj['execution-duration']
-            elif obj_type == 'report':
-                test.add_report(obj)
-            elif obj_type == 'skip-test':
-                test.set_result(Result.SKIPPED)
+                    send_framed_message(self.socket, {
+                        'type': 'log',
+                        'classname': test.classname,
+                        'name': os.path.basename(logfile),
+                        'main': logfile == test.logfile,
+                        'first': first,
+                        'data': data,
+                    })
+                    first = False
+
+    def _send_result(self, classname, result, message, error="",
+                     time_taken=0.0, resources_stats=None):
+        send_framed_message(self.socket, {
+            'type': 'result',
+            'classname': classname,
+            'result': result,
+            'message': message,
+            'error': error,
+            'time_taken': time_taken,
+            'resources_stats': resources_stats,
+        })
 
 
 class GstValidateTest(Test):
@@ -978,6 +1629,10 @@ class GstValidateTest(Test):
         else:
             self.scenario = scenario
 
+        if self.options.http_bandwith and self.needs_http_server():
+            # Tests using the HTTP server share its throttled bandwidth
+            self.exclusive_groups.add('uses-http-server-bandwidth')
+
     def needs_http_server(self):
         if self.media_descriptor is None:
             return False
@@ -1021,6 +1676,22 @@ class GstValidateTest(Test):
 
         return None
 
+    def get_fingerprint_files(self):
+        files = super().get_fingerprint_files()
+        if self.scenario is not None and self.scenario.path:
+            files.append(self.scenario.path)
+
+        if self.media_descriptor is not None:
+            for path in [self.media_descriptor.get_path(),
+                         self.media_descriptor.get_media_filepath()]:
+                if path:
+                    files.append(path)
+
+        files += [c for c in self.proc_env.get('GST_VALIDATE_CONFIG', '').split(os.pathsep) if c]
+        files += [o for o in self.proc_env.get('GST_VALIDATE_OVERRIDE', '').split(os.pathsep) if o]
+
+        return files
+
     def get_current_position(self):
         return self.position
 
@@ -1576,6 +2247,77 @@ class GstValidateEncodingTestInterface(object):
             os.remove(result_descriptor.get_path())
 
 
+class TestsPatterns:
+    """
+    A list of compiled regexes which are matched against tests names all at
+    once through a single alternation regex.
+    """
+
+    def __init__(self, patterns=None):
+        self._patterns = []
+        self._combined = None
+        for pattern in patterns or []:
+            self.append(pattern)
+
+    def append(self, pattern):
+        if isinstance(pattern, str):
+            pattern = re.compile(pattern)
+        self._patterns.append(pattern)
+        self._combined = None
+
+    def __iter__(self):
+        return iter(self._patterns)
+
+    def __len__(self):
+        return len(self._patterns)
+
+    @staticmethod
+    def _scoped_pattern(pattern):
+        # Global inline flags (as in `(?i)foo`) are only allowed at the start
+        # of a regex so turn them into scoped ones.
+        flags = re.match(r'\(\?([imsx]+)\)', pattern)
+        if flags:
+            return '(?%s:%s)' % (flags.group(1), pattern[flags.end():])
+        return '(?:%s)' % pattern
+
+    def _get_combined(self):
+        if self._combined is None:
+            self._combined = False
+            # Flags passed to re.compile() and backreferences would be lost
+            # or broken once combined.
+            if any(p.flags != re.compile(p.pattern).flags or re.search(r'\\\d|\(\?P=', p.pattern)
+                   for p in self._patterns):
+                return self._combined
+
+            try:
+                self._combined = re.compile('|'.join(
+                    self._scoped_pattern(p.pattern) for p in self._patterns))
+            except re.error:
+                # Can't be combined (duplicated group names...)
+                pass
+
+        return self._combined
+
+    def search(self, name):
+        """Returns whether any of the patterns matches @name."""
+        if not self._patterns:
+            return False
+
+        combined = self._get_combined()
+        if combined is False:
+            return self.first_match(name) is not None
+
+        return combined.search(name) is not None
+
+    def first_match(self, name):
+        """Returns the first pattern matching @name, or None."""
+        for pattern in self._patterns:
+            if pattern.search(name):
+                return pattern
+
+        return None
+
+
 class TestsManager(Loggable):
 
     """ A class responsible for managing tests. """
@@ -1589,15 +2331,17 @@ class TestsManager(Loggable):
 
         self.tests = []
         self.unwanted_tests = []
+        self._registered_tests = set()
         self.options = None
         self.args = None
         self.reporter = None
-        self.wanted_tests_patterns = []
-        self.blacklisted_tests_patterns = []
+        self.wanted_tests_patterns = TestsPatterns()
+        self.blacklisted_tests_patterns = TestsPatterns()
         self._generators = []
         self.check_testslist = True
         self.all_tests = None
         self.expected_issues = {}
+        self._expected_issues_patterns = TestsPatterns()
         self.blacklisted_tests = []
 
     def init(self):
@@ -1608,38 +2352,12 @@ class TestsManager(Loggable):
 
     def find_tests(self, classname):
         regex = re.compile(classname)
-        return [test for test in self.list_tests() if regex.findall(test.classname)]
+        return [test for test in self.list_tests() if regex.search(test.classname)]
 
-    def add_expected_issues(self, expected_issues):
-        for bugid, failure_def in list(expected_issues.items()):
-            tests_regexes = []
-            for test_name_regex in failure_def['tests']:
-                regex = re.compile(test_name_regex)
-                tests_regexes.append(regex)
-                for test in self.tests:
-                    if regex.findall(test.classname):
-                        max_retries = failure_def.get('allow_flakiness', failure_def.get('max_retries'))
-                        if max_retries:
-                            test.max_retries = int(max_retries)
-                            self.debug(f"{test.classname} allow {test.max_retries}")
-                        else:
-                            for issue in failure_def['issues']:
-                                issue['bug'] = bugid
-                            test.expected_issues.extend(failure_def['issues'])
-                            self.debug("%s added expected issues from %s" % (
-                                test.classname, bugid))
-            failure_def['tests'] = tests_regexes
-
-        self.expected_issues.update(expected_issues)
-
-    def add_test(self, test):
-        if test.generator is None:
-            test.classname = self.loading_testsuite + '.' + test.classname
-
-        for bugid, failure_def in list(self.expected_issues.items()):
-            failure_def['bug'] = bugid
+    def _apply_expected_issues(self, test, expected_issues):
+        for bugid, failure_def in expected_issues:
             for regex in failure_def['tests']:
-                if regex.findall(test.classname):
+                if regex.search(test.classname):
                     max_retries = failure_def.get('allow_flakiness', failure_def.get('max_retries'))
                     if max_retries:
                         test.max_retries = int(max_retries)
@@ -1651,12 +2369,38 @@ class TestsManager(Loggable):
                         self.debug("%s added expected issues from %s" % (
                             test.classname, bugid))
 
+    def add_expected_issues(self, expected_issues):
+        patterns = TestsPatterns()
+        for bugid, failure_def in list(expected_issues.items()):
+            failure_def['bug'] = bugid
+            failure_def['tests'] = [re.compile(regex) for regex in failure_def['tests']]
+            for regex in failure_def['tests']:
+                patterns.append(regex)
+                self._expected_issues_patterns.append(regex)
+
+        for test in self.tests:
+            if patterns.search(test.classname):
+                self._apply_expected_issues(test, expected_issues.items())
+
+        self.expected_issues.update(expected_issues)
+
+    def add_test(self, test):
+        if test.generator is None:
+            test.classname = self.loading_testsuite + '.' + test.classname
+
+        # Most tests do not have any expected issue, check them all at once
+        # before looking for the matching ones.
+        if self._expected_issues_patterns.search(test.classname):
+            self._apply_expected_issues(test, self.expected_issues.items())
+
+        if test in self._registered_tests:
+            return
+
         if self._is_test_wanted(test):
-            if test not in self.tests:
-                self.tests.append(test)
+            self._registered_tests.add(test)
+            self.tests.append(test)
         else:
-            if test not in self.tests:
-                self.unwanted_tests.append(test)
+            self.unwanted_tests.append(test)
 
     def get_tests(self):
         return self.tests
@@ -1755,23 +2499,24 @@ class TestsManager(Loggable):
         return check_bugs_resolution(bugs_definitions.items())
 
     def _check_blacklisted(self, test):
-        for pattern in self.blacklisted_tests_patterns:
-            if pattern.findall(test.classname):
-                self.info("%s is blacklisted by %s", test.classname, pattern)
-                return True
+        if self.blacklisted_tests_patterns.search(test.classname):
+            pattern = self.blacklisted_tests_patterns.first_match(test.classname)
+            self.info("%s is blacklisted by %s", test.classname, pattern)
+            return True
 
         return False
 
     def _check_whitelisted(self, test):
-        for pattern in self.wanted_tests_patterns:
-            if pattern.findall(test.classname):
-                if self._check_blacklisted(test):
-                    # If explicitly white listed that specific test
-                    # bypass the blacklisting
-                    if pattern.pattern != test.classname:
-                        return False
-                return True
-        return False
+        if not self.wanted_tests_patterns.search(test.classname):
+            return False
+
+        if self._check_blacklisted(test):
+            # If explicitly white listed that specific test
+            # bypass the blacklisting
+            pattern = self.wanted_tests_patterns.first_match(test.classname)
+            if pattern.pattern != test.classname:
+                return False
+        return True
 
     def _check_duration(self, test):
         if test.duration > 0 and int(self.options.long_limit) < int(test.duration):
@@ -1802,6 +2547,10 @@ class TestsManager(Loggable):
     def needs_http_server(self):
         return False
 
+    def stop(self):
+        """Called once all the tests ran, to release resources."""
+        pass
+
     def print_valgrind_bugs(self):
         pass
 
@@ -1839,8 +2588,129 @@ class GstValidateTestsGenerator(TestsGenerator):
         return super(GstValidateTestsGenerator, self).generate_tests()
 
 
+class TestsWatchdog(Loggable):
+    """
+    Thread calling callbacks when the deadlines of running tests are reached,
+    so that timeouts are detected and timed out processes killed right on
+    time without the launcher having to poll.
+    """
+
+    def __init__(self):
+        Loggable.__init__(self)
+        self._deadlines = []
+        self._cond = threading.Condition()
+        self._seq = count()
+        self._thread = None
+        self._stopping = False
+
+    def start(self):
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, daemon=True,
+                                        name="TestsWatchdog")
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+
+        with self._cond:
+            self._stopping = True
+            self._deadlines = []
+            self._cond.notify()
+        self._thread.join()
+        self._thread = None
+
+    def add(self, test, deadline, callback):
+        """
+        Calls @callback from the watchdog thread at @deadline, unless @test
+        gets removed first.
+        """
+        with self._cond:
+            heapq.heappush(self._deadlines, (deadline, next(self._seq), test, callback))
+            if self._deadlines[0][2] is test:
+                self._cond.notify()
+
+    def remove(self, test):
+        with self._cond:
+            self._deadlines = [d for d in self._deadlines if d[2] is not test]
+            heapq.heapify(self._deadlines)
+
+    def _run(self):
+        with self._cond:
+            while not self._stopping:
+                if not self._deadlines:
+                    self._cond.wait()
+                    continue
+
+                timeout = self._deadlines[0][0] - time.time()
+                if timeout > 0:
+                    self._cond.wait(min(timeout, threading.TIMEOUT_MAX))
+                    continue
+
+                _, _, test, callback = heapq.heappop(self._deadlines)
+                self.debug("%s reached its deadline", test)
+                try:
+                    callback()
+                except Exception as e:
+                    self.error("Watchdog callback for %s failed: %s", test, e)
+
+
+class _WaitingTests:
+    """
+    Tests waiting to be started, bucketed by exclusive groups and resource
+    class so that picking the next test to start only needs to look at the
+    oldest test of each bucket instead of scanning all of them.
+    """
+
+    def __init__(self, launcher, tests):
+        self._buckets = defaultdict(deque)
+        for i, test in enumerate(tests):
+            self._buckets[self._get_key(launcher, test)].append((i, test))
+
+    @staticmethod
+    def _get_key(launcher, test):
+        cpu, memory = launcher._get_test_resources(test)
+        step = launcher.MIN_TEST_CPU_WEIGHT
+        cpu = math.ceil(cpu / step) * step
+        memory = 1 << (int(memory) - 1).bit_length() if memory > 0 else 0
+
+        return frozenset(test.exclusive_groups), cpu, memory
+
+    def __len__(self):
+        return sum(len(bucket) for bucket in self._buckets.values())
+
+    def candidates(self):
+        """Yields the oldest test of each bucket, in their original order."""
+        heads = [bucket[0] + (key,) for key, bucket in self._buckets.items()]
+        for _, test, key in sorted(heads, key=lambda head: head[0]):
+            yield test, key
+
+    def pop(self, key):
+        bucket = self._buckets[key]
+        _, test = bucket.popleft()
+        if not bucket:
+            del self._buckets[key]
+
+        return test
+
+
 class _TestsLauncher(Loggable):
 
+    # Minimum number of cores a test is considered to use when scheduling
+    # tests according to their resources usage
+    MIN_TEST_CPU_WEIGHT = 0.25
+
+    # Number of tests of the exclusive groups set by the launcher allowed to
+    # run at the same time with --resource-scheduling, they are not limited
+    # otherwise unless set with --exclusive-group. Other groups default to 1.
+    BUILTIN_EXCLUSIVE_GROUPS = {
+        # Each RTSP test runs its own server on a port picked from the
+        # ephemeral range, keep the number of servers competing for it low
+        'rtsp-port-range': 4,
+        # Tests using the HTTP server share its throttled bandwidth
+        'uses-http-server-bandwidth': 1,
+    }
+
     def __init__(self):
 
         Loggable.__init__(self)
@@ -1854,12 +2724,19 @@ class _TestsLauncher(Loggable):
         self.wanted_tests_patterns = []
 
         self.queue = queue.Queue()
+        self.watchdog = TestsWatchdog()
         self.jobs = []
         self.total_num_tests = 0
         self.current_progress = -1
         self.server = None
         self.httpsrv = None
         self.vfb_server = None
+        self.results_cache = None
+        self.resources_usage = None
+        self.tests_by_uuid = {}
+        # Group -> number of its tests allowed to run at the same time, 0
+        # for no limit
+        self.exclusive_groups_max_jobs = {}
 
     def _list_app_dirs(self):
         app_dirs = []
@@ -2011,6 +2888,11 @@ class _TestsLauncher(Loggable):
             self.reporter = reporters.Reporter(options)
 
         self.options = options
+        self.exclusive_groups_max_jobs = {
+            group: max_jobs if options.resource_scheduling else 0
+            for group, max_jobs in self.BUILTIN_EXCLUSIVE_GROUPS.items()}
+        self.exclusive_groups_max_jobs.update(options.exclusive_groups)
+
         wanted_testers = None
         for tester in self.testers:
             if tester.name in args:
@@ -2071,8 +2953,73 @@ class _TestsLauncher(Loggable):
                 return False
             os.environ["DISPLAY"] = self.vfb_server.display_id
 
+        if options.cache_results:
+            self.load_results_cache()
+
+        if options.resource_scheduling:
+            self.load_resources_usage()
+
         return True
 
+    def _get_results_cache_path(self):
+        return os.path.join(self.options.privatedir, "results_cache.dat")
+
+    def load_results_cache(self):
+        """
+        Loads the fingerprints of the tests that passed in previous runs,
+        associated to their classname.
+        """
+        try:
+            with open(self._get_results_cache_path(), 'rb') as f:
+                self.results_cache = pickle.load(f)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            self.results_cache = {}
+
+    def save_results_cache(self):
+        if self.results_cache is None:
+            return
+
+        with open(self._get_results_cache_path(), 'wb') as f:
+            pickle.dump(self.results_cache, f)
+
+    def _update_results_cache(self, test):
+        if self.results_cache is None:
+            return
+
+        if test.result == Result.PASSED and test.fingerprint:
+            self.results_cache[test.classname] = test.fingerprint
+        else:
+            self.results_cache.pop(test.classname, None)
+
+    def _get_resources_usage_path(self):
+        return os.path.join(self.options.privatedir, "resources_usage.dat")
+
+    def load_resources_usage(self):
+        """
+        Loads the resources used by the tests in previous runs, associated
+        to their classname.
+        """
+        try:
+            with open(self._get_resources_usage_path(), 'rb') as f:
+                self.resources_usage = pickle.load(f)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            self.resources_usage = {}
+
+    def save_resources_usage(self):
+        if self.resources_usage is None:
+            return
+
+        with open(self._get_resources_usage_path(), 'wb') as f:
+            pickle.dump(self.resources_usage, f)
+
+    def _update_resources_usage(self, test):
+        if self.resources_usage is None or test.cached:
+            return
+
+        resources = test.get_measured_resources()
+        if resources:
+            self.resources_usage[test.classname] = resources
+
     def _check_tester_has_other_testsuite(self, testsuite, tester):
         if tester.name != testsuite.TEST_MANAGER[0]:
             return True
@@ -2170,36 +3117,28 @@ class _TestsLauncher(Loggable):
                 return True
         return False
 
-    def server_wrapper(self, ready):
-        self.server = GstValidateTCPServer(
-            ('localhost', 0), GstValidateListener)
-        self.server.socket.settimeout(None)
-        self.server.launcher = self
-        self.serverport = self.server.socket.getsockname()[1]
-        self.info("%s server port: %s" % (self, self.serverport))
-        ready.set()
-
-        self.server.serve_forever(poll_interval=0.05)
+    def get_test_by_uuid(self, uuid):
+        return self.tests_by_uuid.get(uuid)
 
     def _start_server(self):
         self.info("Starting TCP Server")
-        ready = threading.Event()
-        self.server_thread = threading.Thread(target=self.server_wrapper,
-                                              kwargs={'ready': ready})
-        self.server_thread.start()
-        ready.wait()
+        self.server = GstValidateListener(self)
+        self.serverport = self.server.start()
+        self.info("%s server port: %s" % (self, self.serverport))
         os.environ["GST_VALIDATE_SERVER"] = "tcp://localhost:%s" % self.serverport
 
     def _stop_server(self):
         if self.server:
-            self.server.shutdown()
-            self.server_thread.join()
-            self.server.server_close()
+            self.server.stop()
             self.server = None
 
+    def _wake_up(self):
+        self.queue.put(None)
+
     def test_wait(self):
         while True:
-            # Check process every second for timeout
+            # Values are sampled every second to track the progress of the
+            # tests, timeouts are signaled by the watchdog
             try:
                 self.queue.get(timeout=1)
             except queue.Empty:
@@ -2207,13 +3146,26 @@ class _TestsLauncher(Loggable):
 
             for test in self.jobs:
                 if test.process_update():
+                    if test.process and test.process.returncode is None:
+                        # Timed out, wait for the process to be reaped
+                        self.watchdog.remove(test)
+                        test.kill_subprocess_async(self.watchdog)
+                        continue
+
+                    self.watchdog.remove(test)
                     self.jobs.remove(test)
                     return test
 
+                if test.process and not test.killing:
+                    self.watchdog.remove(test)
+                    self.watchdog.add(test, test.get_timeout_deadline(),
+                                      self._wake_up)
+
     def tests_wait(self):
         try:
             test = self.test_wait()
-            test.check_results()
+            if not test.cached:
+                test.check_results()
         except KeyboardInterrupt:
             for test in self.jobs:
                 test.kill_subprocess()
@@ -2221,12 +3173,62 @@ class _TestsLauncher(Loggable):
 
         return test
 
-    def start_new_job(self, tests_left):
-        try:
-            test = tests_left.pop(0)
-        except IndexError:
+    def _get_test_resources(self, test):
+        if self.resources_usage is None:
+            # Only count jobs
+            return 1, 0
+
+        cpu, memory = test.get_resources(self.resources_usage.get(test.classname))
+
+        # Mostly idle tests still use a thread and a process each
+        return max(cpu, self.MIN_TEST_CPU_WEIGHT), memory
+
+    def _can_start_job(self, test, running_groups, cpu, memory):
+        for group in test.exclusive_groups:
+            max_jobs = self.exclusive_groups_max_jobs.get(group, 1)
+            if max_jobs and running_groups[group] >= max_jobs:
+                return False
+
+        # Always start a test when none is running, even if it needs more
+        # resources than available
+        if not self.jobs:
+            return True
+
+        test_cpu, test_memory = self._get_test_resources(test)
+        if cpu + test_cpu > self.options.num_jobs:
+            return False
+
+        if self.options.memory_budget and memory + test_memory > self.options.memory_budget:
+            return False
+
+        return True
+
+    def start_new_job(self, tests_left, max_jobs):
+        """
+        Starts the first test of @tests_left, a _WaitingTests, that can run
+        along the running jobs. Returns False if none could be started.
+        """
+        if self.jobs and len(self.jobs) >= max_jobs:
+            return False
+
+        running_groups = Counter()
+        cpu = memory = 0
+        for job in self.jobs:
+            running_groups.update(job.exclusive_groups)
+            job_cpu, job_memory = self._get_test_resources(job)
+            cpu += job_cpu
+            memory += job_memory
+
+        for test, key in tests_left.candidates():
+            if self._can_start_job(test, running_groups, cpu, memory):
+                tests_left.pop(key)
+                break
+        else:
             return False
 
+        if self.results_cache is not None:
+            test.cached_fingerprint = self.results_cache.get(test.classname)
+        self.tests_by_uuid[test.get_uuid()] = test
         test.test_start(self.queue)
 
         self.jobs.append(test)
@@ -2265,6 +3267,9 @@ class _TestsLauncher(Loggable):
 
         # use max to defend against the case where all tests are alone_tests
         max_num_jobs = max(min(self.options.num_jobs, len(tests)), 1)
+        if self.resources_usage is not None:
+            # Only bounded by the CPU and memory budgets
+            max_num_jobs = max(len(tests), 1)
         jobs_running = 0
 
         if self.options.forever and len(tests) < self.options.num_jobs and len(tests):
@@ -2293,10 +3298,8 @@ class _TestsLauncher(Loggable):
         current_test_num = 1
         to_retry = []
         for num_jobs, tests in [(max_num_jobs, tests), (1, alone_tests)]:
-            tests_left = list(tests)
-            for i in range(num_jobs):
-                if not self.start_new_job(tests_left):
-                    break
+            tests_left = _WaitingTests(self, tests)
+            while self.start_new_job(tests_left, num_jobs):
                 jobs_running += 1
 
             while jobs_running != 0:
@@ -2304,6 +3307,8 @@ class _TestsLauncher(Loggable):
                 jobs_running -= 1
                 current_test_num += 1
                 res = test.test_end(retry_on_failures=retry_on_failures)
+                self._update_results_cache(test)
+                self._update_resources_usage(test)
                 to_report = True
                 if res not in [Result.PASSED, Result.SKIPPED, Result.KNOWN_ERROR]:
                     if self.options.forever or self.options.fatal_error:
@@ -2336,7 +3341,7 @@ class _TestsLauncher(Loggable):
                 if res == Result.PASSED and not self.options.keep_logs:
                     test.remove_logs()
 
-                if self.start_new_job(tests_left):
+                while self.start_new_job(tests_left, num_jobs):
                     jobs_running += 1
 
         if to_retry:
@@ -2368,7 +3373,14 @@ class _TestsLauncher(Loggable):
         r = 0
         try:
             self._start_server()
-            if self.options.forever:
+            self.watchdog.start()
+            if self.options.coordinator or self.options.worker:
+                if not self.all_tests:
+                    self.all_tests = self.list_tests()
+                if self.options.coordinator:
+                    return TestsCoordinator(self, self.options.coordinator).run(self.tests)
+                return TestsWorker(self, self.options.worker).run(self.tests)
+            elif self.options.forever:
                 r = 1
                 while True:
                     self.current_progress = -1
@@ -2404,7 +3416,12 @@ class _TestsLauncher(Loggable):
                 self.httpsrv.stop()
             if self.vfb_server:
                 self.vfb_server.stop()
+            self.watchdog.stop()
+            self.save_results_cache()
+            self.save_resources_usage()
             self.clean_tests(True)
+            for tester in self.testers:
+                tester.stop()
 
     def final_report(self):
         return self.reporter.final_report()
@@ -2489,8 +3506,19 @@ class ScenarioManager(Loggable):
     _instance = None
     system_scenarios = []
     special_scenarios = {}
+    # Scenario files present in each media directory, see
+    # index_special_scenarios()
+    special_scenarios_files = {}
 
     FILE_EXTENSION = "scenario"
+    CACHE_VERSION = 1
+
+    # Maps the scenario paths passed to discover_scenarios() to the
+    # signature of the files involved and the resulting scenarios
+    # definitions, see load_cache()
+    _cache = {}
+    _cache_path = None
+    _cache_modified = False
 
     def __new__(cls, *args, **kwargs):
         if not cls._instance:
@@ -2502,25 +3530,101 @@ class ScenarioManager(Loggable):
 
         return cls._instance
 
+    def index_special_scenarios(self, dirname, files):
+        """
+        Registers the scenario files among @files, the content of @dirname,
+        so that looking for the special scenarios of the medias it contains
+        does not require listing it again.
+        """
+        suffix = "." + self.FILE_EXTENSION
+        self.special_scenarios_files[dirname] = [f for f in files if f.endswith(suffix)]
+
     def find_special_scenarios(self, mfile):
         scenarios = []
         mfile_bname = os.path.basename(mfile)
+        dirname = os.path.dirname(mfile)
 
-        for f in os.listdir(os.path.dirname(mfile)):
-            if re.findall(r'%s\..*\.%s$' % (re.escape(mfile_bname), self.FILE_EXTENSION), f):
-                scenarios.append(os.path.join(os.path.dirname(mfile), f))
+        if dirname not in self.special_scenarios_files:
+            self.index_special_scenarios(dirname, os.listdir(dirname))
+
+        # Special scenarios are named: MEDIAFILENAME.REALNAME.scenario
+        prefix = mfile_bname + "."
+        min_len = len(prefix) + len(self.FILE_EXTENSION) + 1
+        for f in self.special_scenarios_files[dirname]:
+            if f.startswith(prefix) and len(f) >= min_len:
+                scenarios.append(os.path.join(dirname, f))
 
         if scenarios:
             scenarios = self.discover_scenarios(scenarios, mfile)
 
         return scenarios
 
-    def discover_scenarios(self, scenario_paths=[], mfile=None):
+    @classmethod
+    def load_cache(cls, path):
         """
-        Discover scenarios specified in scenario_paths or the default ones
-        if nothing specified there
+        Loads the scenarios definitions previously discovered from @path so
+        that gst-validate only needs to be run when the scenario files, the
+        gst-validate binary or the plugins changed.
         """
-        scenarios = []
+        cls._cache_path = path
+        cls._cache_modified = False
+        try:
+            with open(path, 'rb') as f:
+                version, cache = pickle.load(f)
+        except (FileNotFoundError, EOFError, ValueError, pickle.UnpicklingError):
+            version, cache = None, {}
+
+        cls._cache = cache if version == cls.CACHE_VERSION else {}
+
+    @classmethod
+    def save_cache(cls):
+        if not cls._cache_path or not cls._cache_modified:
+            return
+
+        with open(cls._cache_path, 'wb') as f:
+            pickle.dump((cls.CACHE_VERSION, cls._cache), f)
+        cls._cache_modified = False
+
+    def _get_scenarios_files(self, scenario_paths):
+        """
+        Lists the files gst-validate parses when discovering @scenario_paths,
+        or all the scenarios it knows about if empty.
+        """
+        if scenario_paths:
+            return list(scenario_paths)
+
+        user_data_dir = os.environ.get("XDG_DATA_HOME",
+                                       os.path.expanduser("~/.local/share"))
+        dirs = [os.path.join(user_data_dir, "gstreamer-1.0", "validate", "scenarios"),
+                os.path.join(utils.config.DATADIR, "gstreamer-1.0", "validate", "scenarios")]
+        dirs += [d for d in os.environ.get("GST_VALIDATE_SCENARIOS_PATH", "").split(":") if d]
+        dirs.append(os.path.abspath(os.path.join("data", "scenarios")))
+
+        files = []
+        for dirname in dirs:
+            try:
+                files += [os.path.join(dirname, f) for f in sorted(os.listdir(dirname))]
+            except OSError:
+                continue
+
+        return files
+
+    def _get_scenarios_signature(self, scenario_paths):
+        files = [which(GstValidateBaseTestManager.COMMAND)]
+        files += self._get_scenarios_files(scenario_paths)
+
+        return [get_file_signature(f) for f in files], get_gst_plugins_files(os.environ)
+
+    def _get_scenarios_defs(self, scenario_paths):
+        key = tuple(scenario_paths)
+        signature = self._get_scenarios_signature(scenario_paths)
+        try:
+            cached_signature, defs = self._cache[key]
+            if cached_signature == signature:
+                return defs
+        except KeyError:
+            pass
+
         scenario_defs = os.path.join(self.config.main_dir, "scenarios.def")
         log_path = os.path.join(self.config.logsdir, "scenarios_discovery.log")
         logs = open(log_path, 'w')
@@ -2533,11 +3637,26 @@ class ScenarioManager(Loggable):
         except subprocess.CalledProcessError as e:
             self.error(e)
             self.error('See %s' % log_path)
-            pass
+            # Do not cache the result of a failed discovery
+            signature = None
 
+        with open(scenario_defs) as f:
+            defs = f.read()
+
+        if signature is not None:
+            self._cache[key] = (signature, defs)
+            ScenarioManager._cache_modified = True
+
+        return defs
+
+    def discover_scenarios(self, scenario_paths=[], mfile=None):
+        """
+        Discover scenarios specified in scenario_paths or the default ones
+        if nothing specified there
+        """
+        scenarios = []
         config = configparser.RawConfigParser()
-        f = open(scenario_defs)
-        config.read_file(f)
+        config.read_string(self._get_scenarios_defs(scenario_paths))
 
         for section in config.sections():
             name = None
@@ -2803,7 +3922,15 @@ class GstValidateMediaDescriptor(MediaDescriptor):
     PUSH_MEDIA_INFO_EXT = "media_info.push"
     STREAM_INFO_EXT = "stream_info"
 
+    # Bump when the data returned by _extract_data changes
+    CACHE_VERSION = 1
+
     __all_descriptors = {}
+    # Maps media info file paths to their signature and the data
+    # extracted from them, see load_cache()
+    __cache = {}
+    __cache_path = None
+    __cache_modified = False
 
     @classmethod
     def get(cls, xml_path):
@@ -2811,6 +3938,31 @@ class GstValidateMediaDescriptor(MediaDescriptor):
             return cls.__all_descriptors[xml_path]
         return GstValidateMediaDescriptor(xml_path)
 
+    @classmethod
+    def load_cache(cls, path):
+        """
+        Loads the data previously extracted from media info files from
+        @path so that only files modified since then need to be parsed.
+        """
+        cls.__cache_path = path
+        cls.__cache_modified = False
+        try:
+            with open(path, 'rb') as f:
+                version, cache = pickle.load(f)
+        except (FileNotFoundError, EOFError, ValueError, pickle.UnpicklingError):
+            version, cache = None, {}
+
+        cls.__cache = cache if version == cls.CACHE_VERSION else {}
+
+    @classmethod
+    def save_cache(cls):
+        if not cls.__cache_path or not cls.__cache_modified:
+            return
+
+        with open(cls.__cache_path, 'wb') as f:
+            pickle.dump((cls.CACHE_VERSION, cls.__cache), f)
+        cls.__cache_modified = False
+
     def __init__(self, xml_path):
         super(GstValidateMediaDescriptor, self).__init__()
 
@@ -2822,16 +3974,33 @@ class GstValidateMediaDescriptor(MediaDescriptor):
             self.__all_descriptors[xml_path] = self
 
             self._xml_path = xml_path
-            try:
-                media_xml = ET.parse(xml_path).getroot()
-            except xml.etree.ElementTree.ParseError:
-                printc("Could not parse %s" % xml_path,
-                    Colors.FAIL)
-                raise
-            self._extract_data(media_xml)
+            self._load_data(self.__get_data(xml_path))
 
         self.set_protocol(urllib.parse.urlparse(self.get_uri()).scheme)
 
+    def __get_data(self, xml_path):
+        signature = get_file_signature(xml_path)
+        try:
+            cached_signature, data = self.__cache[xml_path]
+            if cached_signature == signature:
+                return data
+        except KeyError:
+            pass
+
+        try:
+            media_xml = ET.parse(xml_path).getroot()
+        except xml.etree.ElementTree.ParseError:
+            printc("Could not parse %s" % xml_path,
+                Colors.FAIL)
+            raise
+
+        data = self._extract_data(media_xml)
+        if signature:
+            self.__cache[xml_path] = (signature, data)
+            GstValidateMediaDescriptor.__cache_modified = True
+
+        return data
+
     def skip_parsers(self):
         return self._skip_parsers
 
@@ -2843,39 +4012,53 @@ class GstValidateMediaDescriptor(MediaDescriptor):
             setattr(self, attr, getattr(main_descriptor, attr))
 
     def _extract_data(self, media_xml):
-        # Extract the information we need from the xml
-        self._caps = media_xml.findall("streams")[0].attrib["caps"]
-        self._track_caps = []
+        """
+        Extracts the information we need from the xml, the result only
+        depends on the content of the media info file and gets cached.
+        """
+        data = {}
+        data['caps'] = media_xml.findall("streams")[0].attrib["caps"]
+        data['track_caps'] = []
         try:
             streams = media_xml.findall("streams")[0].findall("stream")
         except IndexError:
             pass
         else:
             for stream in streams:
-                self._track_caps.append(
+                data['track_caps'].append(
                     (stream.attrib["type"], stream.attrib["caps"]))
 
-        self._skip_parsers = bool(int(media_xml.attrib.get('skip-parsers', 0)))
-        self._has_frames = bool(int(media_xml.attrib["frame-detection"]))
-        self._duration = int(media_xml.attrib["duration"])
-        self._uri = media_xml.attrib["uri"]
+        data['skip_parsers'] = bool(int(media_xml.attrib.get('skip-parsers', 0)))
+        data['has_frames'] = bool(int(media_xml.attrib["frame-detection"]))
+        data['duration'] = int(media_xml.attrib["duration"])
+        data['uri'] = media_xml.attrib["uri"]
+        data['protocol'] = media_xml.get("protocol")
+        data['is_seekable'] = media_xml.attrib["seekable"].lower() == "true"
+        data['is_live'] = media_xml.get("live", "false").lower() == "true"
+        data['track_types'] = [stream.attrib["type"] for stream in
+                               media_xml.findall("streams")[0].findall("stream")]
+
+        return data
+
+    def _load_data(self, data):
+        self._caps = data['caps']
+        self._track_caps = list(data['track_caps'])
+        self._skip_parsers = data['skip_parsers']
+        self._has_frames = data['has_frames']
+        self._duration = data['duration']
+        self._uri = data['uri']
         parsed_uri = urllib.parse.urlparse(self.get_uri())
-        self._protocol = media_xml.get("protocol", parsed_uri.scheme)
+        self._protocol = data['protocol'] or parsed_uri.scheme
         if parsed_uri.scheme == "file":
             if not os.path.exists(parsed_uri.path) and os.path.exists(self.get_media_filepath()):
                 self._uri = "file://" + self.get_media_filepath()
         elif parsed_uri.scheme == Protocols.IMAGESEQUENCE:
             self._media_file_path = os.path.join(os.path.dirname(self.__cleanup_media_info_ext()), os.path.basename(parsed_uri.path))
             self._uri = parsed_uri._replace(path=os.path.join(os.path.dirname(self.__cleanup_media_info_ext()), os.path.basename(self._media_file_path))).geturl()
-        self._is_seekable = media_xml.attrib["seekable"].lower() == "true"
-        self._is_live = media_xml.get("live", "false").lower() == "true"
-        self._is_image = False
-        for stream in media_xml.findall("streams")[0].findall("stream"):
-            if stream.attrib["type"] == "image":
-                self._is_image = True
-        self._track_types = []
-        for stream in media_xml.findall("streams")[0].findall("stream"):
-            self._track_types.append(stream.attrib["type"])
+        self._is_seekable = data['is_seekable']
+        self._is_live = data['is_live']
+        self._track_types = list(data['track_types'])
+        self._is_image = "image" in self._track_types
 
     def __cleanup_media_info_ext(self):
         for ext in [self.MEDIA_INFO_EXT, self.PUSH_MEDIA_INFO_EXT, self.STREAM_INFO_EXT,
@@ -2931,14 +4114,14 @@ class GstValidateMediaDescriptor(MediaDescriptor):
             subprocess.check_output(args, stderr=open(os.devnull))
         except subprocess.CalledProcessError as e:
             if verbose:
-                printc("Result: Failed", Colors.FAIL)
+                printc("Result for %s: Failed" % media_path, Colors.FAIL)
             else:
                 loggable.warning("GstValidateMediaDescriptor",
                                  "Exception: %s" % e)
             return None
 
         if verbose:
-            printc("Result: Passed", Colors.OKGREEN)
+            printc("Result for %s: Passed" % media_path, Colors.OKGREEN)
 
         try:
             return GstValidateMediaDescriptor(descriptor_path)
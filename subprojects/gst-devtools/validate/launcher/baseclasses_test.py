@@ -0,0 +1,83 @@
+import io
+import time
+import unittest
+from types import SimpleNamespace
+
+from launcher.baseclasses import Test
+from launcher.utils import GST_SECOND, Result
+
+
+class FakeProcess:
+    pid = 0
+    returncode = None
+
+    def poll(self):
+        return self.returncode
+
+
+class StalledTest(Test):
+    """A test that keeps reporting the same position"""
+
+    def get_current_value(self):
+        return GST_SECOND
+
+    def add_stack_trace_to_logfile(self):
+        pass
+
+
+class TestTimeouts(unittest.TestCase):
+
+    def create_test(self, timeout, hard_timeout, running_for):
+        options = SimpleNamespace(timeout_factor=1, redirect_logs=False,
+                                  rr=False, debug=False)
+        test = StalledTest("fake", "fake.stalled", options, None,
+                           timeout=timeout, hard_timeout=hard_timeout)
+        test.out = io.StringIO()
+        test.process = FakeProcess()
+        test.start_ts = test.last_change_ts = time.time() - running_for
+        test.last_val = test.get_current_value()
+
+        return test
+
+    def test_stalled_before_hard_timeout(self):
+        test = self.create_test(timeout=2, hard_timeout=1.5, running_for=1)
+        self.assertFalse(test.process_update())
+        self.assertEqual(test.result, Result.NOT_RUN)
+        self.assertGreater(test.get_timeout_deadline(), time.time())
+
+    def test_stalled_after_hard_timeout(self):
+        test = self.create_test(timeout=2, hard_timeout=1.5, running_for=1.6)
+        self.assertLessEqual(test.get_timeout_deadline(), time.time())
+        self.assertTrue(test.process_update())
+        self.assertEqual(test.result, Result.TIMEOUT)
+        self.assertIn("Hard timeout", test.message)
+
+    def test_stalled_after_timeout(self):
+        test = self.create_test(timeout=1, hard_timeout=None, running_for=1.1)
+        self.assertTrue(test.process_update())
+        self.assertEqual(test.result, Result.TIMEOUT)
+        self.assertIn("Application timed out", test.message)
+
+
+class TestFingerprint(unittest.TestCase):
+
+    def get_fingerprint(self, logsdir, env):
+        options = SimpleNamespace(timeout_factor=1, logsdir=logsdir, rr=False)
+        test = Test("true", "fake.fingerprint", options, None)
+        test.command = ["true", "--output", logsdir + "/fake/fingerprint.log"]
+        test.proc_env = dict(env, GST_VALIDATE_LOGSDIR=logsdir,
+                             GST_DEBUG_FILE=logsdir + "/fake/fingerprint.gstdebug")
+
+        return test.get_fingerprint()
+
+    def test_logsdir_ignored(self):
+        self.assertEqual(self.get_fingerprint("/tmp/run1", {}),
+                         self.get_fingerprint("/tmp/run2", {}))
+
+    def test_env_changed(self):
+        self.assertNotEqual(self.get_fingerprint("/tmp/run1", {}),
+                            self.get_fingerprint("/tmp/run1", {"GST_DEBUG": "5"}))
+
+
+if __name__ == '__main__':
+    unittest.main()
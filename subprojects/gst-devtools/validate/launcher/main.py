@@ -189,6 +189,26 @@ def _positive_integer_type(value):
     return cast
 
 
+def _exclusive_group_type(value):
+    group, sep, max_jobs = value.partition('=')
+    try:
+        max_jobs = int(max_jobs) if sep else 1
+    except ValueError:
+        max_jobs = -1
+    if not group or max_jobs < 0:
+        raise argparse.ArgumentTypeError(f'`{value}\' is not a valid GROUP[=MAX_JOBS] limit')
+    return (group, max_jobs)
+
+
+def _address_type(value):
+    host, sep, port = value.rpartition(':')
+    try:
+        port = int(port)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'`{value}\' is not a valid [HOST:]PORT address')
+    return (host if sep else 'localhost', port)
+
+
 class LauncherConfig(Loggable):
 
     def __init__(self):
@@ -213,6 +233,12 @@ class LauncherConfig(Loggable):
         self.no_display = False
         self.rr = False
         self.xunit_file = None
+        self.xunit_log_limit = -1
+        self.xunit_passed_log_limit = 64 * 1024
+        self.xunit_total_log_limit = -1
+        self.perf_history = None
+        self.compare_perf = None
+        self.perf_threshold = 20
         self.main_dir = utils.DEFAULT_MAIN_DIR
         self.output_dir = None
         self.logsdir = None
@@ -230,7 +256,7 @@ class LauncherConfig(Loggable):
         self.clone_dir = None
 
         self.http_server_port = 8079
-        self.http_bandwith = 1024 * 1024
+        self.http_bandwith = 0
         self.http_server_dir = None
         self.httponly = False
         self.get_assets_command = "git clone"
@@ -242,6 +268,12 @@ class LauncherConfig(Loggable):
         self.check_bugs_status = False
         self.retry_on_failures = False
         self.html = False
+        self.cache_results = False
+        self.resource_scheduling = False
+        self.memory_budget = 0
+        self.exclusive_groups = []
+        self.coordinator = None
+        self.worker = None
 
     def cleanup(self):
         """
@@ -271,6 +303,19 @@ class LauncherConfig(Loggable):
         if self.xunit_file:
             self.keep_logs = True
 
+        if self.forever or self.n_runs:
+            # Repeated runs are meant to actually execute the tests
+            self.cache_results = False
+
+        if self.memory_budget:
+            self.memory_budget *= 1024 * 1024
+        elif self.resource_scheduling:
+            try:
+                self.memory_budget = int(os.sysconf('SC_PAGE_SIZE')
+                                         * os.sysconf('SC_PHYS_PAGES') * 0.8)
+            except (AttributeError, ValueError, OSError):
+                self.memory_budget = 0
+
         # other output directories
         if self.logsdir in ['stdout', 'stderr']:
             # Allow -l stdout/stderr to work like -rl stdout/stderr
@@ -514,6 +559,31 @@ class LauncherConfig(Loggable):
         parser.add_argument('--xunit-file', dest='xunit_file',
                             action='store', metavar="FILE",
                             help=("Path to xml file to store the xunit report in."))
+        parser.add_argument('--xunit-log-limit', dest='xunit_log_limit',
+                            type=int, metavar="BYTES",
+                            help="Maximum size of the logs of a failing test to include"
+                            " in the xunit report, only the end of the logs is kept"
+                            " (-1, the default, means unlimited)")
+        parser.add_argument('--xunit-passed-log-limit', dest='xunit_passed_log_limit',
+                            type=int, metavar="BYTES",
+                            help="Maximum size of the logs of a passing test to include"
+                            " in the xunit report (Defaults to 65536, -1 means unlimited)")
+        parser.add_argument('--xunit-total-log-limit', dest='xunit_total_log_limit',
+                            type=int, metavar="BYTES",
+                            help="Maximum size of all the logs included in the xunit report,"
+                            " tests reported once it is reached only reference their logs"
+                            " (-1, the default, means unlimited)")
+        parser.add_argument('--perf-history', dest='perf_history', metavar="FILE",
+                            help="Append the resources used by each test (CPU time, peak RSS,"
+                            " context switches and block I/O) to the FILE JSON history")
+        parser.add_argument('--compare-perf', dest='compare_perf', metavar="BASELINE",
+                            help="Report the tests using more resources than in the"
+                            " BASELINE --perf-history file")
+        parser.add_argument('--perf-threshold', dest='perf_threshold',
+                            type=_positive_integer_type, metavar="PERCENT",
+                            help="Increase of the resources used by a test, compared to"
+                            " the --compare-perf baseline, considered as a regression"
+                            " (Defaults to 20%%)")
         parser.add_argument('--shuffle', dest="shuffle", action="store_true",
                             help="Runs the test in a random order. Can help speed up the overall"
                             " test time by running synchronized and unsynchronized tests"
@@ -524,6 +594,11 @@ class LauncherConfig(Loggable):
                             help="Disable retrying on failure, event for known to be flaky tests.")
         parser.add_argument('--html', dest="html", action="store_true",
                             help="Write logs as html")
+        parser.add_argument("--cache-results", dest="cache_results",
+                            action="store_true",
+                            help="Do not rerun tests that passed previously if none of their"
+                            " inputs (command line, environment, scenario, media info,"
+                            " binaries and plugins) changed, they are reported as cached")
         parser.add_argument("--keep-logs", dest="keep_logs",
                             action="store_true",
                             help="Keep the logs in the output directory on success, by default logs are removed unless the test passes")
@@ -556,6 +631,32 @@ class LauncherConfig(Loggable):
                                help="Number of tests to execute simultaneously"
                                " (Defaults to the number of cores of the processor)",
                                type=_positive_integer_type)
+        dir_group.add_argument("--resource-scheduling", dest="resource_scheduling",
+                               action="store_true",
+                               help="Run as many tests simultaneously as the CPU (the --jobs count"
+                               " being the number of cores to use) and memory budgets allow,"
+                               " based on the resources each test used in previous runs")
+        dir_group.add_argument("--memory-budget", dest="memory_budget",
+                               type=_positive_integer_type, metavar="MB",
+                               help="Memory the tests running simultaneously can use with"
+                               " --resource-scheduling (Defaults to 80%% of the physical memory)")
+        dir_group.add_argument("--exclusive-group", dest="exclusive_groups",
+                               type=_exclusive_group_type, action="append", default=[],
+                               metavar="GROUP[=MAX_JOBS]",
+                               help="Run at most MAX_JOBS (1 by default, 0 for no limit) tests"
+                               " of GROUP at the same time. The groups set by the launcher,"
+                               " 'rtsp-port-range' (4) and 'uses-http-server-bandwidth' (1),"
+                               " are only limited with --resource-scheduling otherwise")
+        dir_group.add_argument("--coordinator", dest="coordinator",
+                               type=_address_type, metavar="[HOST:]PORT",
+                               help="Do not run the tests but hand them out to the workers"
+                               " started with --worker, HOST defaults to localhost, use"
+                               " 0.0.0.0 to accept workers from other machines")
+        dir_group.add_argument("--worker", dest="worker",
+                               type=_address_type, metavar="HOST:PORT",
+                               help="Run the tests handed out by the launcher started with"
+                               " --coordinator on HOST:PORT, which must list the same tests,"
+                               " up to --jobs at a time")
         dir_group.add_argument("--ignore-numfailures", dest="ignore_numfailures",
                                help="Ignore the number of failed test in exit code",
                                default=False, action='store_true')
@@ -573,8 +674,9 @@ class LauncherConfig(Loggable):
             "--http-server-port", dest="http_server_port",
             help="Port on which to run the http server on localhost", type=int)
         http_server_group.add_argument(
-            "--http-bandwith-limitation", dest="http_bandwith",
-            help="The artificial bandwith limitation to introduce to the local server (in Bytes/sec) (default: 1 MBps)")
+            "--http-bandwith-limitation", dest="http_bandwith", type=int,
+            help="The artificial bandwith limitation to introduce to the local server (in Bytes/sec),"
+            " 0 means unlimited (default: 0)")
         http_server_group.add_argument(
             "-s", "--folder-for-http-server", dest="http_server_dir",
             help="Folder in which to create an http server on localhost. Default is PATHS")
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this program; if not, write to the
+# Free Software Foundation, Inc., 51 Franklin St, Fifth Floor,
+# Boston, MA 02110-1301, USA.
+
+"""
+Fork server running Python unit tests for gst-validate-launcher.
+
+GStreamer (and any module passed with --preload) is imported and
+initialized once, then each test runs in a forked child so that it does not
+pay for the interpreter startup and the registry loading. GStreamer being
+initialized from the server environment, the launcher starts one server for
+each set of GStreamer environment variables the tests use.
+
+Usage: pyunittest_forkserver.py [--preload MODULE]... SOCKET_PATH
+
+Requests are received on the SOCKET_PATH unix socket, one per connection, as
+JSON messages prefixed with their size as a 4 bytes big endian integer (the
+framing used by gst-validate to talk to the launcher). The file descriptor the
+test output has to go to is passed along with the request:
+
+    {"testname": "module.Class.test", "env": {...}, "cwd": "/path/or/null"}
+
+The server replies with {"pid": PID} once the test started, then with
+{"returncode": N, "rusage": {...}} when it exited. The server exits when its
+standard input is closed.
+"""
+
+import argparse
+import importlib
+import json
+import os
+import selectors
+import socket
+import struct
+import sys
+import unittest
+
+
+def send_message(sock, obj):
+    data = json.dumps(obj).encode()
+    sock.sendall(struct.pack('>I', len(data)) + data)
+
+
+def receive_request(conn):
+    data, fds, _, _ = socket.recv_fds(conn, 64 * 1024, 1)
+    if len(data) < 4:
+        raise ConnectionError("Incomplete request")
+
+    if not fds:
+        raise ConnectionError("No log file descriptor passed")
+
+    size = struct.unpack('>I', data[:4])[0]
+    while len(data) < size + 4:
+        chunk = conn.recv(size + 4 - len(data))
+        if not chunk:
+            raise ConnectionError("Incomplete request")
+        data += chunk
+
+    return json.loads(data[4:].decode()), fds
+
+
+def preload(modules):
+    try:
+        import gi
+        gi.require_version('Gst', '1.0')
+        from gi.repository import Gst
+        Gst.init(None)
+    except (ImportError, ValueError) as e:
+        print("Could not preload GStreamer: %s" % e, file=sys.stderr)
+
+    for module in modules:
+        importlib.import_module(module)
+
+
+def run_test(request, logfd):
+    """Runs in the forked child, never returns."""
+    os.dup2(logfd, 1)
+    os.dup2(logfd, 2)
+    os.close(logfd)
+    os.environ.clear()
+    os.environ.update(request['env'])
+    if request.get('cwd'):
+        os.chdir(request['cwd'])
+    for path in reversed(request['env'].get('PYTHONPATH', '').split(os.pathsep)):
+        if path and path not in sys.path:
+            sys.path.insert(0, path)
+
+    # GStreamer was initialized with the server environment
+    if 'GST_DEBUG' in request['env'] and 'gi.repository.Gst' in sys.modules:
+        Gst = sys.modules['gi.repository.Gst']
+        Gst.debug_set_active(True)
+        Gst.debug_set_threshold_from_string(request['env']['GST_DEBUG'], True)
+
+    returncode = 1
+    try:
+        res = unittest.main(module=None, argv=['python -m unittest', request['testname']],
+                            exit=False)
+        returncode = 0 if res.result.wasSuccessful() else 1
+    except SystemExit as e:
+        returncode = e.code if isinstance(e.code, int) else 1
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os._exit(returncode)
+
+
+def serve(socket_path):
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(socket_path)
+    server.listen(64)
+
+    selector = selectors.DefaultSelector()
+    selector.register(server, selectors.EVENT_READ)
+    selector.register(sys.stdin, selectors.EVENT_READ)
+    children = {}
+
+    print("READY", flush=True)
+    while True:
+        for key, _ in selector.select(timeout=0.05):
+            if key.fileobj is sys.stdin:
+                if not os.read(sys.stdin.fileno(), 1024):
+                    return
+                continue
+
+            conn, _ = server.accept()
+            try:
+                request, fds = receive_request(conn)
+            except (ConnectionError, ValueError, OSError) as e:
+                print("Invalid request: %s" % e, file=sys.stderr)
+                conn.close()
+                continue
+
+            pid = os.fork()
+            if pid == 0:
+                selector.close()
+                server.close()
+                conn.close()
+                for child_conn in children.values():
+                    child_conn.close()
+                run_test(request, fds[0])
+
+            for fd in fds:
+                os.close(fd)
+            children[pid] = conn
+            try:
+                send_message(conn, {'pid': pid})
+            except OSError:
+                pass
+
+        while children:
+            try:
+                pid, status, rusage = os.wait4(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid == 0:
+                break
+
+            conn = children.pop(pid, None)
+            if conn is None:
+                continue
+            try:
+                send_message(conn, {
+                    'returncode': os.waitstatus_to_exitcode(status),
+                    'rusage': {field: getattr(rusage, field) for field in
+                               ['ru_utime', 'ru_stime', 'ru_maxrss', 'ru_nvcsw',
+                                'ru_nivcsw', 'ru_inblock', 'ru_oublock']}})
+            except OSError:
+                pass
+            conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--preload', action='append', default=[],
+                        help="Module to import before forking the tests")
+    parser.add_argument('socket_path')
+    args = parser.parse_args()
+
+    preload(args.preload)
+    serve(args.socket_path)
@@ -21,13 +21,14 @@
 
 import os
 import re
+import json
 import time
 import codecs
 import datetime
 import tempfile
 from .loggable import Loggable
 from xml.sax import saxutils
-from .utils import Result, printc, Colors
+from .utils import Result, printc, Colors, RUSAGE_FIELDS
 
 UNICODE_STRINGS = (type(str()) == type(str()))  # noqa
 
@@ -49,6 +50,19 @@ def escape_cdata(cdata):
     return xml_safe(cdata).replace(']]>', ']]>]]&gt;<![CDATA[')
 
 
+# Metrics compared with --compare-perf, as (name, getter, minimum increase
+# considered as a regression). Context switches are too dependent on the
+# system load to be compared.
+PERF_METRICS = [
+    ('cpu-time', lambda s: s['utime'] + s['stime'], 0.1),
+    ('max-rss', lambda s: s['maxrss'], 4 * 1024 * 1024),
+    ('block-io', lambda s: s['inblock'] + s['oublock'], 100),
+]
+
+# Number of runs kept in the --perf-history file
+PERF_HISTORY_MAX_RUNS = 20
+
+
 class Reporter(Loggable):
     name = 'simple'
 
@@ -61,9 +75,16 @@ class Reporter(Loggable):
                       'failures': 0,
                       'passed': 0,
                       'skipped': 0,
-                      'known_error': 0
+                      'known_error': 0,
+                      'cached': 0,
                       }
         self.results = []
+        self.perf_baseline = None
+        self.perf_regressions = {}
+        # Tests are cleaned before the final report, their stats are kept here
+        self.perf_stats = {}
+        if getattr(options, 'compare_perf', None):
+            self.perf_baseline = self._load_perf_tests(options.compare_perf)
 
     def init_timer(self):
         """Initialize a timer before starting tests."""
@@ -81,8 +102,58 @@ class Reporter(Loggable):
         else:
             self.stats["passed"] += 1
 
+    def _load_perf_tests(self, path):
+        """
+        Returns the {classname: resources_stats} dict of the tests in the
+        --perf-history file at @path, the latest runs taking precedence.
+        """
+        tests = {}
+        try:
+            with open(path) as f:
+                for run in json.load(f)['runs']:
+                    tests.update(run['tests'])
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            printc("Could not load performance history from %s: %s" % (path, e),
+                   Colors.WARNING)
+
+        return tests
+
+    def check_perf(self, test):
+        """
+        Compares the resources used by @test to the --compare-perf baseline
+        and returns the list of (metric, baseline, value) that regressed.
+        """
+        stats = getattr(test, 'resources_stats', None)
+        if not self.perf_baseline or not stats:
+            return []
+
+        baseline = self.perf_baseline.get(test.classname)
+        if not baseline:
+            return []
+
+        threshold = 1 + self.options.perf_threshold / 100
+        regressions = []
+        for name, getter, min_increase in PERF_METRICS:
+            try:
+                base_value, value = getter(baseline), getter(stats)
+            except KeyError:
+                continue
+
+            if value > base_value * threshold and value - base_value >= min_increase:
+                regressions.append((name, base_value, value))
+
+        return regressions
+
     def add_results(self, test):
         self.debug("%s", test)
+        stats = getattr(test, 'resources_stats', None)
+        if stats and not getattr(test, 'cached', False):
+            self.perf_stats[test.classname] = stats
+        regressions = self.check_perf(test)
+        if regressions:
+            self.perf_regressions[test.classname] = regressions
+        if getattr(test, 'cached', False):
+            self.stats["cached"] += 1
         if test.result == Result.PASSED or \
                 test.result == Result.KNOWN_ERROR:
             self.set_passed(test)
@@ -116,6 +187,9 @@ class Reporter(Loggable):
                (lenstat * " ", self.stats["failures"]), Colors.FAIL)
         printc("%sKnown error: %d" %
                (lenstat * " ", self.stats["known_error"]), Colors.OKBLUE)
+        if self.stats["cached"]:
+            printc("%sCached: %d (included in passed)" %
+                   (lenstat * " ", self.stats["cached"]), Colors.OKGREEN)
         printc("%s%s" %
                (lenstat * " ", (len("Failed: 0")) * "-"), Colors.OKBLUE)
 
@@ -128,8 +202,43 @@ class Reporter(Loggable):
 
         printc("%sTotal: %d" % (lenstat * " ", total), color)
 
+        if self.perf_regressions:
+            printc("\nPerformance regressions compared to %s:" % self.options.compare_perf,
+                   Colors.WARNING)
+            for classname, regressions in sorted(self.perf_regressions.items()):
+                printc("  * %s: %s" % (classname, ", ".join(
+                    "%s %s -> %s" % (name, round(base, 3), round(value, 3))
+                    for name, base, value in regressions)), Colors.WARNING)
+
+        if getattr(self.options, 'perf_history', None):
+            self.save_perf_history()
+
         return self.stats["failures"]
 
+    def save_perf_history(self):
+        """Appends the resources used by the tests to the --perf-history file."""
+        path = self.options.perf_history
+        if not self.perf_stats:
+            return
+
+        try:
+            with open(path) as f:
+                runs = json.load(f)['runs']
+        except FileNotFoundError:
+            runs = []
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            printc("Could not load performance history from %s, overwriting it: %s"
+                   % (path, e), Colors.WARNING)
+            runs = []
+
+        runs.append({'date': datetime.datetime.now().isoformat(timespec='seconds'),
+                     'fields': RUSAGE_FIELDS,
+                     'tests': self.perf_stats})
+        with tempfile.NamedTemporaryFile('w', delete=False,
+                                         dir=os.path.dirname(os.path.abspath(path))) as f:
+            json.dump({'runs': runs[-PERF_HISTORY_MAX_RUNS:]}, f)
+        os.replace(f.name, path)
+
 
 class XunitReporter(Reporter):
 
@@ -137,33 +246,118 @@ class XunitReporter(Reporter):
     name = 'xunit'
     encoding = 'UTF-8'
 
+    # Size of the chunks logs are copied by
+    CHUNK_SIZE = 64 * 1024
+    # The <testsuite> element attributes are only known at the end, room is
+    # kept for them at the beginning of the file so that the report can be
+    # written in place.
+    HEADER_TEMPLATE = '<?xml version="1.0" encoding="%(encoding)s"?>' \
+        '<testsuite name="gst-validate-launcher" tests="%(total)d" ' \
+        'errors="%(timeout)d" failures="%(failures)d" ' \
+        'skipped="%(skipped)d">'
+    HEADER_SIZE = 512
+
     def __init__(self, options):
         super(XunitReporter, self).__init__(options)
 
-        self._createTmpFile()
+        self.tmp_xml_file = None
+        self._captured_size = 0
 
     def final_report(self):
         self.report()
         return super(XunitReporter, self).final_report()
 
-    def _get_all_logs_data(self, test):
-        if self.options.redirect_logs:
-            return ""
-
-        captured = ""
-        value = test.get_log_content()
-        if value:
-            captured += escape_cdata(value)
-        for extralog in test.extra_logfiles:
-            captured += "\n\n===== %s =====\n\n" % escape_cdata(
-                os.path.basename(extralog))
-            value = test.get_extra_log_content(extralog)
-            captured += escape_cdata(value)
+    def _write(self, data):
+        if self.tmp_xml_file is None:
+            self._createTmpFile()
+        self.tmp_xml_file.write(data.encode(self.encoding, errors='replace'))
 
-        return captured
-
-    def _get_captured(self, test):
-        return '<system-out><![CDATA[%s]]></system-out>' % self._get_all_logs_data(test)
+    def _get_logs_limits(self, test, limit):
+        """
+        Shares @limit bytes between the logs of @test, smaller logs getting
+        captured entirely, and returns a {logfile: (size, limit)} dict.
+        """
+        sizes = {}
+        for logfile in [test.logfile] + sorted(test.extra_logfiles):
+            try:
+                sizes[logfile] = os.path.getsize(logfile)
+            except (OSError, TypeError):
+                continue
+
+        if limit < 0:
+            return {logfile: (size, size) for logfile, size in sizes.items()}
+
+        limits = {}
+        remaining = limit
+        for i, (logfile, size) in enumerate(sorted(sizes.items(), key=lambda s: s[1])):
+            log_limit = min(size, remaining // (len(sizes) - i))
+            limits[logfile] = (size, log_limit)
+            remaining -= log_limit
+
+        return {logfile: limits[logfile] for logfile in sizes}
+
+    def _write_log(self, logfile, size, limit):
+        """Writes the last @limit bytes of @logfile, escaped for CDATA."""
+        with open(logfile, 'rb') as f:
+            if limit < size:
+                f.seek(size - limit)
+                self._write(escape_cdata("[... %d bytes skipped, see [[ATTACHMENT|%s]] ...]\n"
+                                         % (size - limit, os.path.abspath(logfile))))
+
+            decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+            # Keep the ']' ending a chunk for the next one so that a ']]>'
+            # sequence spanning two chunks is escaped
+            pending = ''
+            remaining = limit
+            while remaining > 0:
+                data = f.read(min(self.CHUNK_SIZE, remaining))
+                if not data:
+                    break
+                remaining -= len(data)
+                pending += decoder.decode(data)
+                head = pending.rstrip(']')
+                self._write(escape_cdata(head))
+                pending = pending[len(head):]
+            self._write(escape_cdata(pending + decoder.decode(b'', final=True)))
+
+    def _write_captured(self, test):
+        """Streams the logs of @test into a <system-out> element."""
+        self._write('<system-out><![CDATA[')
+        if not self.options.redirect_logs:
+            if test.result in [Result.PASSED, Result.KNOWN_ERROR]:
+                limit = self.options.xunit_passed_log_limit
+            else:
+                limit = self.options.xunit_log_limit
+
+            total_limit = self.options.xunit_total_log_limit
+            if total_limit >= 0:
+                total_remaining = max(0, total_limit - self._captured_size)
+                limit = total_remaining if limit < 0 else min(limit, total_remaining)
+
+            for logfile, (size, log_limit) in self._get_logs_limits(test, limit).items():
+                if logfile != test.logfile:
+                    self._write("\n\n===== %s =====\n\n" % escape_cdata(
+                        os.path.basename(logfile)))
+                self._write_log(logfile, size, log_limit)
+                self._captured_size += log_limit
+        self._write(']]></system-out>')
+
+    def _write_properties(self, test):
+        """Writes the resources used by @test as <properties>."""
+        stats = getattr(test, 'resources_stats', None)
+        if not stats:
+            return
+
+        self._write('<properties>')
+        for field in RUSAGE_FIELDS:
+            if field in stats:
+                self._write('<property name=%s value=%s/>' % (
+                    self._quoteattr(field), self._quoteattr(str(stats[field]))))
+        for name, base, value in self.perf_regressions.get(test.classname, []):
+            self._write('<property name=%s value=%s/>' % (
+                self._quoteattr('regression-' + name),
+                self._quoteattr("%s -> %s" % (round(base, 3), round(value, 3)))))
+        self._write('</properties>')
 
     def _quoteattr(self, attr):
         """Escape an XML attribute. Value can be unicode."""
@@ -179,72 +373,51 @@ class XunitReporter(Reporter):
 
         """
         self.debug("Writing XML file to: %s", self.options.xunit_file)
-        xml_file = codecs.open(self.options.xunit_file, 'w',
-                               self.encoding, errors = 'replace')
 
         self.stats['encoding'] = self.encoding
         self.stats['total'] = (self.stats['timeout'] + self.stats['failures']
                                + self.stats['passed'] + self.stats['skipped'])
 
-        xml_file.write('<?xml version="1.0" encoding="%(encoding)s"?>'
-                       '<testsuite name="gst-validate-launcher" tests="%(total)d" '
-                       'errors="%(timeout)d" failures="%(failures)d" '
-                       'skipped="%(skipped)d">' % self.stats)
-
-        tmp_xml_file = codecs.open(self.tmp_xml_file.name, 'r',
-                                   self.encoding, errors = 'replace')
-
-        for l in tmp_xml_file:
-            xml_file.write(l)
-
-        xml_file.write('</testsuite>')
-        xml_file.close()
-        tmp_xml_file.close()
-        os.remove(self.tmp_xml_file.name)
-
-        self._createTmpFile()
+        self._write('</testsuite>')
+        self.tmp_xml_file.seek(0)
+        self.tmp_xml_file.write((self.HEADER_TEMPLATE % self.stats).ljust(
+            self.HEADER_SIZE).encode(self.encoding))
+        self.tmp_xml_file.close()
+        os.replace(self.tmp_xml_file.name, self.options.xunit_file)
+        self.tmp_xml_file = None
 
     def _createTmpFile(self):
-        self.tmp_xml_file = tempfile.NamedTemporaryFile(delete=False)
-        self.tmp_xml_file.close()
+        # Created next to the final file so that it can simply be renamed
+        self.tmp_xml_file = tempfile.NamedTemporaryFile(
+            dir=os.path.dirname(os.path.abspath(self.options.xunit_file)),
+            prefix='.' + os.path.basename(self.options.xunit_file),
+            delete=False)
+        self.tmp_xml_file.write(b' ' * self.HEADER_SIZE)
+        self._captured_size = 0
 
     def set_failed(self, test):
         """Add failure output to Xunit report.
         """
         super().set_failed(test)
 
-        xml_file = codecs.open(self.tmp_xml_file.name, 'a',
-                               self.encoding, errors = 'replace')
-        xml_file.write(self._forceUnicode(
-            '<testcase name=%(name)s time="%(taken).3f">%(systemout)s'
-            '<failure type=%(errtype)s message=%(message)s>'
-            '</failure></testcase>' %
-            {'name': self._quoteattr(test.get_classname() + '.' + test.get_name()),
-             'taken': test.time_taken,
-             'systemout': self._get_captured(test),
-             'errtype': self._quoteattr(test.result),
-             'message': self._quoteattr(test.message),
-             }))
-        xml_file.close()
+        self._write('<testcase name=%(name)s time="%(taken).3f">' %
+                    {'name': self._quoteattr(test.get_classname() + '.' + test.get_name()),
+                     'taken': test.time_taken})
+        self._write_properties(test)
+        self._write_captured(test)
+        self._write('<failure type=%(errtype)s message=%(message)s>'
+                    '</failure></testcase>' %
+                    {'errtype': self._quoteattr(test.result),
+                     'message': self._quoteattr(test.message)})
 
     def set_passed(self, test):
         """Add success output to Xunit report.
         """
         self.stats['passed'] += 1
 
-        xml_file = codecs.open(self.tmp_xml_file.name, 'a',
-                               self.encoding, errors = 'replace')
-        xml_file.write(self._forceUnicode(
-            '<testcase name=%(name)s '
-            'time="%(taken).3f">%(systemout)s</testcase>' %
-            {'name': self._quoteattr(test.get_classname() + '.' + test.get_name()),
-             'taken': test.time_taken,
-             'systemout': self._get_captured(test),
-             }))
-        xml_file.close()
-
-    def _forceUnicode(self, s):
-        if not UNICODE_STRINGS:
-            if isinstance(s, str):
-                s = s.decode(self.encoding, errors = 'replace')
-        return s
+        self._write('<testcase name=%(name)s time="%(taken).3f">' %
+                    {'name': self._quoteattr(test.get_classname() + '.' + test.get_name()),
+                     'taken': test.time_taken})
+        self._write_properties(test)
+        self._write_captured(test)
+        self._write('</testcase>')
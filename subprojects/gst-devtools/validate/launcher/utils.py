@@ -63,6 +63,8 @@ DEFAULT_TESTSUITES_DIRS = [os.path.join(DEFAULT_GST_QA_ASSETS, "testsuites")]
 DISCOVERER_COMMAND = "gst-discoverer-1.0"
 # Use to set the duration from which a test is considered as being 'long'
 LONG_TEST = 40
+# The struct rusage fields (without 'ru_' prefix) recorded for each test
+RUSAGE_FIELDS = ['utime', 'stime', 'maxrss', 'nvcsw', 'nivcsw', 'inblock', 'oublock']
 
 
 class Result(object):
@@ -361,6 +363,55 @@ def get_gst_build_valgrind_suppressions():
     return get_gst_build_valgrind_suppressions.data
 
 
+def get_file_signature(path):
+    """Returns a (path, mtime, size) tuple or None if @path does not exist."""
+    try:
+        stat = os.stat(path)
+    except (OSError, TypeError):
+        return None
+
+    return (path, stat.st_mtime_ns, stat.st_size)
+
+
+def get_gst_plugins_files(env):
+    """
+    Lists the signatures of the GStreamer plugin files that can be loaded
+    with @env. Plugins are not expected to change while the launcher is
+    running so the result is cached for each set of plugin paths.
+    """
+    if not hasattr(get_gst_plugins_files, "data"):
+        get_gst_plugins_files.data = {}
+
+    paths = []
+    for var in ['GST_PLUGIN_PATH_1_0', 'GST_PLUGIN_PATH',
+                'GST_PLUGIN_SYSTEM_PATH_1_0', 'GST_PLUGIN_SYSTEM_PATH']:
+        paths += [p for p in env.get(var, '').split(os.pathsep) if p]
+    if not paths:
+        paths = [os.path.join(config.LIBDIR, 'gstreamer-1.0')]
+    paths = tuple(paths)
+
+    try:
+        return get_gst_plugins_files.data[paths]
+    except KeyError:
+        pass
+
+    files = set()
+    for path in paths:
+        if os.path.isfile(path):
+            files.add(path)
+            continue
+
+        for root, _, fnames in os.walk(path):
+            for fname in fnames:
+                if os.path.splitext(fname)[1] in ['.so', '.dylib', '.dll']:
+                    files.add(os.path.join(root, fname))
+
+    res = get_gst_plugins_files.data[paths] = [
+        s for s in map(get_file_signature, sorted(files)) if s]
+
+    return res
+
+
 class BackTraceGenerator(Loggable):
     __instance = None
     _command_line_regex = re.compile(r'Command Line: (.*)\n')
@@ -21,6 +21,8 @@
 # Boston, MA 02110-1301, USA.
 
 import sys
+import bisect
+import contextlib
 from ..overrides import override
 from ..importer import modules
 from gi.repository import GObject
@@ -57,12 +59,27 @@ def __timeline_element__repr__(self):
 
 __prev_set_child_property = GES.TimelineElement.set_child_property
 def __timeline_element_set_child_property(self, prop_name, prop_value):
-    res, _, pspec = GES.TimelineElement.lookup_child(self, prop_name)
-    if not res:
-        return res
+    batch = None
+    timeline = self.get_timeline()
+    if timeline is not None:
+        batch = getattr(timeline, '_ges_batch', None)
+
+    v = None
+    if batch is not None:
+        v = batch.child_values.get((self, prop_name))
+
+    if v is None:
+        res, _, pspec = GES.TimelineElement.lookup_child(self, prop_name)
+        if not res:
+            return res
+
+        v = GObject.Value()
+        v.init(pspec.value_type)
+        # Children can not be added or removed while in a batch, so the
+        # lookup result can be reused
+        if batch is not None:
+            batch.child_values[(self, prop_name)] = v
 
-    v = GObject.Value()
-    v.init(pspec.value_type)
     v.set_value(prop_value)
 
     return __prev_set_child_property(self, prop_name, v)
@@ -87,6 +104,241 @@ def __timeline_iter_clips(self):
 
 GES.Timeline.iter_clips = __timeline_iter_clips
 
+
+class _LayerClipsIndex:
+    """Clips of a layer sorted by start.
+
+    As the duration of the clips is bounded by the longest one, the clips
+    overlapping a range are found by bisecting the starts.
+    """
+
+    def __init__(self, layer):
+        self.starts = []
+        self.clips = []
+        # {clip: (start, end)} as indexed
+        self.positions = {}
+        # {duration: number of clips with that duration}
+        self.durations = {}
+        self.max_duration = 0
+        for clip in layer.get_clips():
+            self.add(clip)
+
+    def add(self, clip):
+        start = clip.props.start
+        duration = clip.props.duration
+        i = bisect.bisect_right(self.starts, start)
+        self.starts.insert(i, start)
+        self.clips.insert(i, clip)
+        self.positions[clip] = (start, start + duration)
+        self.durations[duration] = self.durations.get(duration, 0) + 1
+        self.max_duration = max(self.max_duration, duration)
+
+    def remove(self, clip):
+        start, end = self.positions.pop(clip)
+        i = bisect.bisect_left(self.starts, start)
+        while self.clips[i] is not clip:
+            i += 1
+        del self.starts[i]
+        del self.clips[i]
+
+        duration = end - start
+        self.durations[duration] -= 1
+        if not self.durations[duration]:
+            del self.durations[duration]
+            if duration == self.max_duration:
+                self.max_duration = max(self.durations, default=0)
+
+    def update(self, clip):
+        self.remove(clip)
+        self.add(clip)
+
+    def in_range(self, start, end):
+        first = bisect.bisect_right(self.starts, start - self.max_duration)
+        last = bisect.bisect_left(self.starts, end)
+        positions = self.positions
+        return [clip for clip in self.clips[first:last]
+                if positions[clip][1] > start]
+
+
+class _TimelineClipsIndex:
+    """Per layer clip indexes of a timeline, kept up to date from the signals
+    of the timeline, its layers and their clips.
+    """
+
+    def __init__(self, timeline):
+        self.layers = {}
+        # {object: [(layer the handler belongs to, handler id)]}
+        self.handlers = {}
+        # Layers with clips changed while in a batch, reindexed when it ends
+        self.dirty = set()
+        self.batching = False
+
+        self._connect(None, timeline, 'layer-added', self._layer_added_cb)
+        self._connect(None, timeline, 'layer-removed', self._layer_removed_cb)
+        for layer in timeline.get_layers():
+            self._layer_added_cb(timeline, layer)
+
+    def _connect(self, layer, obj, signal, callback, *args):
+        handler = obj.connect(signal, callback, *args)
+        self.handlers.setdefault(obj, []).append((layer, handler))
+
+    def _disconnect(self, layer, objs):
+        """Disconnects the handlers of @objs belonging to @layer"""
+        for obj in objs:
+            handlers = []
+            for handler in self.handlers.get(obj, ()):
+                if handler[0] is layer:
+                    obj.disconnect(handler[1])
+                else:
+                    handlers.append(handler)
+            if handlers:
+                self.handlers[obj] = handlers
+            else:
+                self.handlers.pop(obj, None)
+
+    def _layer_added_cb(self, unused_timeline, layer):
+        self._connect(layer, layer, 'clip-added', self._clip_added_cb)
+        self._connect(layer, layer, 'clip-removed', self._clip_removed_cb)
+        for clip in layer.get_clips():
+            self._watch_clip(layer, clip)
+        self.layers[layer] = _LayerClipsIndex(layer)
+
+    def _layer_removed_cb(self, unused_timeline, layer):
+        self.layers.pop(layer, None)
+        self.dirty.discard(layer)
+        self._disconnect(layer, [obj for obj, handlers in self.handlers.items()
+                                 if any(h[0] is layer for h in handlers)])
+
+    def _watch_clip(self, layer, clip):
+        self._connect(layer, clip, 'notify::start', self._clip_moved_cb, layer)
+        self._connect(layer, clip, 'notify::duration', self._clip_moved_cb, layer)
+
+    def _clip_added_cb(self, layer, clip):
+        self._watch_clip(layer, clip)
+        if self.batching:
+            self.dirty.add(layer)
+        elif layer in self.layers:
+            self.layers[layer].add(clip)
+
+    def _clip_removed_cb(self, layer, clip):
+        self._disconnect(layer, [clip])
+        if self.batching:
+            self.dirty.add(layer)
+        elif layer in self.layers:
+            self.layers[layer].remove(clip)
+
+    def _clip_moved_cb(self, clip, unused_pspec, layer):
+        if self.batching:
+            self.dirty.add(layer)
+        elif layer in self.layers:
+            self.layers[layer].update(clip)
+
+    def reindex(self):
+        for layer in self.dirty:
+            self.layers[layer] = _LayerClipsIndex(layer)
+        self.dirty = set()
+
+    def in_range(self, start, end, layer):
+        self.reindex()
+        if layer is not None:
+            layers = [layer]
+        else:
+            layers = sorted(self.layers, key=lambda layer: layer.props.priority)
+
+        clips = []
+        for layer in layers:
+            clips.extend(self.layers[layer].in_range(start, end))
+        return clips
+
+
+def __timeline_clips_in_range(self, start, end, layer=None):
+    """Returns the clips overlapping [start, end[ in @layer or all layers if
+    None, sorted by layer priority then by start.
+
+    @layer can be a GES.Layer or a layer priority. The clips are indexed on
+    first use, and the index is kept up to date afterward.
+    """
+    index = getattr(self, '_ges_clips_index', None)
+    if index is None:
+        index = self._ges_clips_index = _TimelineClipsIndex(self)
+
+    if isinstance(layer, int):
+        layer = self.get_layer(layer)
+        if layer is None:
+            return []
+
+    return index.in_range(start, end, layer)
+
+GES.Timeline.clips_in_range = __timeline_clips_in_range
+
+
+class _TimelineBatch:
+    """State of a Timeline.batch()"""
+
+    def __init__(self):
+        self.depth = 0
+        self.commit = None
+        # {(element, child property name): GObject.Value}
+        self.child_values = {}
+
+
+__prev_timeline_commit = GES.Timeline.commit
+__prev_timeline_commit_sync = GES.Timeline.commit_sync
+def __timeline_commit(self):
+    batch = getattr(self, '_ges_batch', None)
+    if batch is not None:
+        batch.commit = batch.commit or __prev_timeline_commit
+        return True
+
+    return __prev_timeline_commit(self)
+
+
+def __timeline_commit_sync(self):
+    batch = getattr(self, '_ges_batch', None)
+    if batch is not None:
+        batch.commit = __prev_timeline_commit_sync
+        return True
+
+    return __prev_timeline_commit_sync(self)
+
+
+@contextlib.contextmanager
+def __timeline_batch(self):
+    """Context manager for large edits of the timeline.
+
+    Commits requested inside the batch are done once when it ends, the clips
+    index used by clips_in_range() is only updated at that point too, and
+    the child properties set with set_child_property() are only looked up
+    once. Children must not be added to or removed from the elements while
+    in a batch.
+    """
+    batch = getattr(self, '_ges_batch', None)
+    if batch is None:
+        batch = self._ges_batch = _TimelineBatch()
+    index = getattr(self, '_ges_clips_index', None)
+    if index is not None:
+        index.batching = True
+
+    batch.depth += 1
+    try:
+        yield self
+    finally:
+        batch.depth -= 1
+        if not batch.depth:
+            # Also done if the batch is interrupted by an exception: the edits
+            # done until then are in the timeline and get committed as they
+            # would have been outside of a batch.
+            self._ges_batch = None
+            if index is not None:
+                index.batching = False
+                index.reindex()
+            if batch.commit is not None:
+                batch.commit(self)
+
+GES.Timeline.commit = __timeline_commit
+GES.Timeline.commit_sync = __timeline_commit_sync
+GES.Timeline.batch = __timeline_batch
+
 try:
     from gi.repository import Gst
     Gst
@@ -111,6 +111,66 @@ class TestTimeline(common.GESSimpleTimelineTest):
                 all_clips.add(self.append_clip(l))
         self.assertEqual(set(self.timeline.iter_clips()), all_clips)
 
+    def test_clips_in_range(self):
+        clip1 = self.add_clip(0, 0, 10)
+        clip2 = self.add_clip(20, 0, 10)
+        clip3 = self.add_clip(40, 0, 10)
+        layer1 = self.timeline.append_layer()
+        clip4 = layer1.add_asset(GES.Asset.request(GES.TestClip, None), 5, 0, 30, GES.TrackType.UNKNOWN)
+
+        self.assertEqual(self.timeline.clips_in_range(5, 25), [clip1, clip2, clip4])
+        self.assertEqual(self.timeline.clips_in_range(5, 25, 0), [clip1, clip2])
+        self.assertEqual(self.timeline.clips_in_range(5, 25, layer1), [clip4])
+        self.assertEqual(self.timeline.clips_in_range(10, 20, 0), [])
+        self.assertEqual(self.timeline.clips_in_range(0, 100, 2), [])
+
+        # The index follows the changes of the timeline
+        clip2.set_start(60)
+        clip3.set_start(22)
+        self.assertEqual(self.timeline.clips_in_range(5, 25, 0), [clip1, clip3])
+        clip1.move_to_layer(layer1)
+        self.assertEqual(self.timeline.clips_in_range(5, 25, 0), [clip3])
+        self.assertEqual(self.timeline.clips_in_range(5, 25, layer1), [clip1, clip4])
+        layer1.remove_clip(clip4)
+        self.assertEqual(self.timeline.clips_in_range(5, 25, layer1), [clip1])
+
+    def test_batch(self):
+        clip = self.add_clip(0, 0, 10)
+        self.assertEqual(self.timeline.clips_in_range(0, 10), [clip])
+
+        commits = []
+        self.timeline.connect("commited", lambda timeline: commits.append(True))
+        with self.timeline.batch():
+            for i in range(10):
+                clip.set_start(i * 20)
+                self.assertTrue(clip.set_child_property("posx", i))
+                self.timeline.commit_sync()
+            self.assertEqual(commits, [])
+
+        self.assertEqual(commits, [True])
+        self.assertEqual(self.timeline.clips_in_range(0, 100), [])
+        self.assertEqual(self.timeline.clips_in_range(180, 190), [clip])
+        self.assertEqual(clip.get_child_property("posx"), (True, 9))
+
+    def test_batch_error(self):
+        clip = self.add_clip(0, 0, 10)
+        self.assertEqual(self.timeline.clips_in_range(0, 10), [clip])
+
+        commits = []
+        self.timeline.connect("commited", lambda timeline: commits.append(True))
+        with self.assertRaises(RuntimeError):
+            with self.timeline.batch():
+                clip.set_start(20)
+                self.timeline.commit_sync()
+                raise RuntimeError("interrupted")
+
+        # The edits done before the error are committed and indexed
+        self.assertEqual(commits, [True])
+        self.assertEqual(self.timeline.clips_in_range(20, 30), [clip])
+
+        # And the index is not left batching the changes
+        clip.set_start(40)
+        self.assertEqual(self.timeline.clips_in_range(40, 50), [clip])
 
     def test_nested_serialization(self):
         nested_timeline = common.create_project(with_group=True, saved=True)
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+#
+# Load test for the signalling server: simulates many room-based peers
+# exchanging messages and reports the latencies seen by them
+#
+
+import os
+import sys
+import ssl
+import time
+import random
+import asyncio
+import resource
+import subprocess
+import websockets
+import argparse
+
+parser = argparse.ArgumentParser(formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+parser.add_argument('--url', default='wss://localhost:8443', help='URL to connect to')
+parser.add_argument('--peers', default=1000, type=int, help='Number of simulated peers')
+parser.add_argument('--rooms', default=100, type=int, help='Number of rooms the peers are spread over')
+parser.add_argument('--messages', default=10, type=int, help='Number of messages sent by each peer to the other peers of its room')
+parser.add_argument('--message-size', default=512, type=int, help='Size of the messages, in bytes')
+parser.add_argument('--concurrent-connects', default=100, type=int, help='Maximum number of peers connecting at the same time')
+parser.add_argument('--timeout', default=60, type=int, help='Timeout for all the messages to be received (in seconds)')
+parser.add_argument('--spawn-server', default=None, type=int, metavar='PORT',
+                    help='Run simple_server.py without TLS on PORT and test it instead of --url')
+parser.add_argument('--server-workers', default=1, type=int, help='Number of worker processes of the spawned server')
+
+options = parser.parse_args(sys.argv[1:])
+
+sslctx = None
+if options.url.startswith(('wss://', 'https://')):
+    sslctx = ssl.create_default_context()
+    # FIXME
+    sslctx.check_hostname = False
+    sslctx.verify_mode = ssl.CERT_NONE
+
+
+def percentile(values, percent):
+    if not values:
+        return float('nan')
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * percent / 100))]
+
+
+class LoadTest:
+    def __init__(self, options):
+        self.options = options
+        self.join_latencies = []
+        self.msg_latencies = []
+        self.sent = 0
+        self.received = 0
+        self.errors = 0
+        self.all_joined = asyncio.Event()
+        self.all_sent = asyncio.Event()
+        self.all_received = asyncio.Event()
+        self.n_joined = 0
+        self.n_done_sending = 0
+        self.padding = 'x' * options.message_size
+
+    def peer_joined(self):
+        self.n_joined += 1
+        if self.n_joined == self.options.peers:
+            self.all_joined.set()
+
+    def peer_done_sending(self):
+        self.n_done_sending += 1
+        if self.n_done_sending == self.options.peers:
+            self.all_sent.set()
+
+    def message_received(self, payload):
+        sent_time, _ = payload.split(maxsplit=1)
+        self.msg_latencies.append(time.monotonic() - float(sent_time))
+        self.received += 1
+        if self.all_sent.is_set() and self.received == self.sent:
+            self.all_received.set()
+
+    async def receive(self, ws, room_peers):
+        async for msg in ws:
+            if msg.startswith('ROOM_PEER_MSG'):
+                _, _, payload = msg.split(maxsplit=2)
+                self.message_received(payload)
+            elif msg.startswith('ROOM_PEER_JOINED'):
+                room_peers.add(msg.split(maxsplit=1)[1])
+            elif msg.startswith('ROOM_PEER_LEFT'):
+                room_peers.discard(msg.split(maxsplit=1)[1])
+            elif msg.startswith('ERROR'):
+                self.errors += 1
+
+    async def run_peer(self, index, connect_sem):
+        peer_id = 'load-test-peer-{}'.format(index)
+        room_id = 'load-test-room-{}'.format(index % self.options.rooms)
+
+        try:
+            async with connect_sem:
+                ws = await websockets.connect(self.options.url, ssl=sslctx, max_size=None)
+                start = time.monotonic()
+                await ws.send('HELLO ' + peer_id)
+                assert await ws.recv() == 'HELLO'
+                await ws.send('ROOM {}'.format(room_id))
+                msg = await ws.recv()
+                assert msg.startswith('ROOM_OK')
+                self.join_latencies.append(time.monotonic() - start)
+        except Exception as e:
+            if not self.errors:
+                print('Peer {!r} failed to join: {!r}'.format(peer_id, e))
+            self.errors += 1
+            self.peer_joined()
+            self.peer_done_sending()
+            return
+
+        room_peers = set(msg.split()[1:])
+        receiver = asyncio.create_task(self.receive(ws, room_peers))
+        self.peer_joined()
+        try:
+            await self.all_joined.wait()
+            for _ in range(self.options.messages):
+                if not room_peers:
+                    break
+                other_id = random.choice(tuple(room_peers))
+                await ws.send('ROOM_PEER_MSG {} {} {}'.format(other_id, time.monotonic(), self.padding))
+                self.sent += 1
+                # Let the other peers send too
+                await asyncio.sleep(0)
+            self.peer_done_sending()
+            if self.received == self.sent:
+                self.all_received.set()
+            await self.all_received.wait()
+        finally:
+            receiver.cancel()
+            await ws.close()
+
+    async def run(self):
+        connect_sem = asyncio.Semaphore(self.options.concurrent_connects)
+        start = time.monotonic()
+        peers = [asyncio.create_task(self.run_peer(i, connect_sem)) for i in range(self.options.peers)]
+        await self.all_joined.wait()
+        joined = time.monotonic()
+        print('{} peers joined {} rooms in {:.2f}s'.format(self.options.peers, self.options.rooms, joined - start))
+
+        try:
+            await asyncio.wait_for(self.all_received.wait(), self.options.timeout)
+        except asyncio.TimeoutError:
+            print('Timed out waiting for the messages')
+        elapsed = time.monotonic() - joined
+        await asyncio.gather(*peers, return_exceptions=True)
+
+        print('{}/{} messages received in {:.2f}s ({:.0f} messages/s), {} errors'.format(
+            self.received, self.sent, elapsed, self.received / elapsed, self.errors))
+        for name, values in (('join', self.join_latencies), ('message', self.msg_latencies)):
+            print('{} latency: p50 {:.1f}ms, p95 {:.1f}ms, p99 {:.1f}ms, max {:.1f}ms'.format(
+                name, *[percentile(values, p) * 1000 for p in (50, 95, 99, 100)]))
+
+        return self.received == self.sent and not self.errors
+
+
+def raise_fd_limit():
+    # Each peer needs a socket on both the client and the server side
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft != hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+
+async def wait_server(port):
+    for _ in range(50):
+        try:
+            _, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.close()
+            return
+        except OSError:
+            await asyncio.sleep(0.1)
+    raise RuntimeError('Server did not start')
+
+
+async def main():
+    server = None
+    if options.spawn_server:
+        options.url = 'ws://127.0.0.1:{}'.format(options.spawn_server)
+        global sslctx
+        sslctx = None
+        server = subprocess.Popen([sys.executable, os.path.join(os.path.dirname(__file__), 'simple_server.py'),
+                                   '--disable-ssl', '--addr', '127.0.0.1', '--port', str(options.spawn_server),
+                                   '--workers', str(options.server_workers)],
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        if server:
+            await wait_server(options.spawn_server)
+        return await LoadTest(options).run()
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+
+
+raise_fd_limit()
+try:
+    sys.exit(0 if asyncio.run(main()) else 1)
+except websockets.exceptions.InvalidHandshake:
+    print('Invalid handshake: are you sure this is a websockets server?\n')
+    raise
+except ssl.SSLError:
+    print('SSL Error: are you sure the server is using TLS?\n')
+    raise
@@ -0,0 +1,322 @@
+#
+# Peer directory of the signalling server, optionally shared between several
+# server processes through a broker
+#
+
+import os
+import json
+import asyncio
+
+# Maximum size of a message exchanged with the broker, SDPs can be big
+BROKER_LINE_LIMIT = 16 * 1024 * 1024
+
+
+class PeerDirectory(object):
+    '''
+    Keeps track of all the peers, sessions and rooms of the server.
+
+    The peers are reached through @router, which must implement:
+      * send(uid, msg): queue @msg to be sent to peer @uid
+      * close_peer(uid): close the connection to peer @uid
+      * set_status(uid, status): peer @uid is now in a session or a room
+      * log_msg(fmt, *args): log a message relayed to a peer
+    '''
+
+    def __init__(self, router):
+        self.router = router
+        # Format: {uid: [owner, <'session'|room_id|None>]}
+        # where owner identifies the process the peer is connected to
+        self.peers = dict()
+        # Format: {caller_uid: callee_uid,
+        #          callee_uid: caller_uid}
+        # Bidirectional mapping between the two peers
+        self.sessions = dict()
+        # Format: {room_id: {peer1_id, peer2_id, peer3_id, ...}}
+        # Room dict with a set of peers in each room
+        self.rooms = dict()
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    async def register(self, uid, owner=None):
+        if uid in self.peers:
+            return False
+        self.peers[uid] = [owner, None]
+        return True
+
+    async def unregister(self, uid):
+        self.cleanup_session(uid)
+        if uid in self.peers:
+            _, status = self.peers.pop(uid)
+            if status and status != 'session':
+                self.cleanup_room(uid, status)
+
+    def cleanup_session(self, uid):
+        if uid in self.sessions:
+            other_id = self.sessions[uid]
+            del self.sessions[uid]
+            print("Cleaned up {} session".format(uid))
+            if other_id in self.sessions:
+                del self.sessions[other_id]
+                print("Also cleaned up {} session".format(other_id))
+                # If there was a session with this peer, also
+                # close the connection to reset its state.
+                if other_id in self.peers:
+                    self.router.close_peer(other_id)
+                    del self.peers[other_id]
+
+    def cleanup_room(self, uid, room_id):
+        room_peers = self.rooms[room_id]
+        if uid not in room_peers:
+            return
+        room_peers.remove(uid)
+        if not room_peers:
+            del self.rooms[room_id]
+            return
+        msg = 'ROOM_PEER_LEFT {}'.format(uid)
+        for pid in room_peers:
+            self.router.log_msg('room {}: {} -> {}: {}', room_id, uid, pid, msg)
+            self.router.send(pid, msg)
+
+    # The replies to the SESSION and ROOM commands are sent from here, so
+    # they are always sent to the peer before the messages of the other peers
+    # of the session or room
+
+    async def start_session(self, uid, callee_id):
+        '''
+        Returns whether the session could be started
+        '''
+        if callee_id not in self.peers:
+            self.router.send(uid, 'ERROR peer {!r} not found'.format(callee_id))
+            return False
+        if self.peers[uid][1] is not None:
+            self.router.send(uid, 'ERROR you are already in a session, reconnect '
+                             'to the server to start a new session, or use'
+                             'a ROOM for multi-peer sessions')
+            return False
+        if self.peers[callee_id][1] is not None:
+            self.router.send(uid, 'ERROR peer {!r} busy'.format(callee_id))
+            return False
+        self.router.send(uid, 'SESSION_OK')
+        self.peers[uid][1] = 'session'
+        self.sessions[uid] = callee_id
+        self.peers[callee_id][1] = 'session'
+        self.sessions[callee_id] = uid
+        self.router.set_status(callee_id, 'session')
+        return True
+
+    async def session_peer(self, uid):
+        return self.sessions.get(uid)
+
+    async def join_room(self, uid, room_id):
+        if room_id in self.rooms:
+            if uid in self.rooms[room_id]:
+                raise AssertionError('How did we accept a ROOM command '
+                                     'despite already being in a room?')
+        else:
+            # Create room if required
+            self.rooms[room_id] = set()
+        room_peers = self.rooms[room_id]
+        self.router.send(uid, 'ROOM_OK {}'.format(' '.join(room_peers)))
+        # Enter room
+        self.peers[uid][1] = room_id
+        self.rooms[room_id].add(uid)
+        msg = 'ROOM_PEER_JOINED {}'.format(uid)
+        for pid in room_peers:
+            if pid == uid:
+                continue
+            self.router.log_msg('room {}: {} -> {}: {}', room_id, uid, pid, msg)
+            self.router.send(pid, msg)
+
+    async def room_peers(self, room_id):
+        return list(self.rooms.get(room_id, ()))
+
+    def deliver(self, uid, msg):
+        self.router.send(uid, msg)
+
+    def room_msg(self, uid, other_id, room_id, msg):
+        '''
+        Relay @msg from @uid to @other_id if it is in room @room_id, or send
+        an error back to @uid
+        '''
+        if other_id not in self.peers:
+            self.router.send(uid, 'ERROR peer {!r} not found'.format(other_id))
+            return
+        if self.peers[other_id][1] != room_id:
+            self.router.send(uid, 'ERROR peer {!r} is not in the room'.format(other_id))
+            return
+        msg = 'ROOM_PEER_MSG {} {}'.format(uid, msg)
+        self.router.log_msg('room {}: {} -> {}: {}', room_id, uid, other_id, msg)
+        self.router.send(other_id, msg)
+
+
+class BrokerDirectory(object):
+    '''
+    PeerDirectory shared with other server processes through the broker
+    listening on the UNIX socket at @address, see run_broker().
+
+    Queries are answered by the broker, and messages for peers connected to
+    other processes are forwarded through it.
+    '''
+
+    def __init__(self, router, address):
+        self.router = router
+        self.address = address
+        self.pending = dict()
+        self.next_id = 0
+
+    async def start(self):
+        self.reader, self.writer = await asyncio.open_unix_connection(
+            self.address, limit=BROKER_LINE_LIMIT)
+        self.reader_task = asyncio.create_task(self.read_events())
+
+    async def stop(self):
+        self.reader_task.cancel()
+        self.writer.close()
+
+    def post(self, op, *args):
+        self.writer.write(json.dumps([None, op, *args]).encode() + b'\n')
+
+    async def request(self, op, *args):
+        self.next_id += 1
+        future = asyncio.get_running_loop().create_future()
+        self.pending[self.next_id] = future
+        self.writer.write(json.dumps([self.next_id, op, *args]).encode() + b'\n')
+        return await future
+
+    async def read_events(self):
+        try:
+            while True:
+                line = await self.reader.readline()
+                if not line:
+                    break
+                event, *args = json.loads(line)
+                if event == 'reply':
+                    req_id, result = args
+                    self.pending.pop(req_id).set_result(result)
+                elif event in ('send', 'close_peer', 'set_status'):
+                    getattr(self.router, event)(*args)
+        finally:
+            for future in self.pending.values():
+                future.set_exception(ConnectionError('Lost connection to the broker'))
+            self.pending = dict()
+        print('Lost connection to the broker')
+        self.router.stop()
+
+    async def register(self, uid):
+        return await self.request('register', uid)
+
+    async def unregister(self, uid):
+        self.post('unregister', uid)
+
+    async def start_session(self, uid, callee_id):
+        return await self.request('start_session', uid, callee_id)
+
+    async def session_peer(self, uid):
+        return await self.request('session_peer', uid)
+
+    async def join_room(self, uid, room_id):
+        return await self.request('join_room', uid, room_id)
+
+    async def room_peers(self, room_id):
+        return await self.request('room_peers', room_id)
+
+    def deliver(self, uid, msg):
+        self.post('deliver', uid, msg)
+
+    def room_msg(self, uid, other_id, room_id, msg):
+        self.post('room_msg', uid, other_id, room_id, msg)
+
+
+class Broker(object):
+    '''
+    Owns the PeerDirectory shared by the server processes connected to it,
+    and routes the messages to the process each peer is connected to.
+    '''
+    QUERIES = ('start_session', 'session_peer', 'join_room', 'room_peers')
+    POSTS = ('deliver', 'room_msg')
+
+    def __init__(self, path):
+        self.path = path
+        self.directory = PeerDirectory(self)
+
+    def post(self, writer, event, *args):
+        writer.write(json.dumps([event, *args]).encode() + b'\n')
+
+    def owner(self, uid):
+        if uid in self.directory.peers:
+            return self.directory.peers[uid][0]
+        return None
+
+    # Router implementation, see PeerDirectory
+    def send(self, uid, msg):
+        writer = self.owner(uid)
+        if writer:
+            self.post(writer, 'send', uid, msg)
+
+    def close_peer(self, uid):
+        writer = self.owner(uid)
+        if writer:
+            self.post(writer, 'close_peer', uid)
+
+    def set_status(self, uid, status):
+        writer = self.owner(uid)
+        if writer:
+            self.post(writer, 'set_status', uid, status)
+
+    def log_msg(self, fmt, *args):
+        pass
+
+    async def handle_process(self, reader, writer):
+        registered = set()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                req_id, op, *args = json.loads(line)
+                result = None
+                if op == 'register':
+                    result = await self.directory.register(args[0], writer)
+                    if result:
+                        registered.add(args[0])
+                elif op == 'unregister':
+                    registered.discard(args[0])
+                    await self.directory.unregister(args[0])
+                elif op in self.QUERIES:
+                    result = await getattr(self.directory, op)(*args)
+                elif op in self.POSTS:
+                    getattr(self.directory, op)(*args)
+                else:
+                    print('Ignoring unknown broker operation {!r}'.format(op))
+                if req_id is not None:
+                    self.post(writer, 'reply', req_id, result)
+        except (ConnectionError, ValueError) as e:
+            print('Error handling server process: {!r}'.format(e))
+        finally:
+            # Forget about the peers of the process, unless they got closed and
+            # registered again from another process in the meantime
+            for uid in registered:
+                if self.owner(uid) is writer:
+                    await self.directory.unregister(uid)
+            writer.close()
+
+    async def run(self):
+        server = await asyncio.start_unix_server(self.handle_process, self.path,
+                                                 limit=BROKER_LINE_LIMIT)
+        print('Broker listening on {!r}'.format(self.path))
+        async with server:
+            await server.serve_forever()
+
+
+def run_broker(path):
+    try:
+        asyncio.run(Broker(path).run())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if os.path.exists(path):
+            os.unlink(path)
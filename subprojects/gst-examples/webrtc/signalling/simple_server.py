@@ -10,12 +10,20 @@
 import os
 import sys
 import ssl
+import time
 import logging
 import asyncio
 import websockets
 import argparse
 import http
+import signal
+import importlib
 import concurrent
+import tempfile
+import multiprocessing
+import multiprocessing.connection
+
+from peer_directory import PeerDirectory, run_broker
 
 
 class WebRTCSimpleServer(object):
@@ -23,17 +31,20 @@ class WebRTCSimpleServer(object):
     def __init__(self, options):
         ############### Global data ###############
 
+        # Peers connected to this process
         # Format: {uid: (Peer WebSocketServerProtocol,
         #                remote_address,
         #                <'session'|room_id|None>)}
         self.peers = dict()
-        # Format: {caller_uid: callee_uid,
-        #          callee_uid: caller_uid}
-        # Bidirectional mapping between the two peers
-        self.sessions = dict()
-        # Format: {room_id: {peer1_id, peer2_id, peer3_id, ...}}
-        # Room dict with a set of peers in each room
-        self.rooms = dict()
+        # Format: {uid: other_uid}
+        # Cache of the other peer of the sessions of our peers
+        self.session_peers = dict()
+        # Format: {uid: (asyncio.Queue, writer asyncio.Task)}
+        # Messages to each peer are queued and sent by a writer task, so a
+        # slow peer can never stall the peers sending messages to it
+        self.send_queues = dict()
+        # Tasks closing peer connections, referenced until they are done
+        self.close_tasks = set()
 
         # Options
         self.addr = options.addr
@@ -43,6 +54,21 @@ class WebRTCSimpleServer(object):
         self.cert_path = options.cert_path
         self.disable_ssl = options.disable_ssl
         self.health_path = options.health
+        self.send_queue_size = options.send_queue_size
+        self.log_messages = options.log_messages
+        self.log_rate = options.log_rate
+        self.reuse_port = options.workers > 1
+        self.broker = options.broker
+        self.broker_backend = options.broker_backend
+
+        # Sessions and rooms of all the peers, see peer_directory.py
+        self.directory = None
+        self.exit_future = None
+
+        # Rate limiting of the relayed messages logging
+        self.log_window_start = 0
+        self.log_count = 0
+        self.log_skipped = 0
 
         # Certificate mtime, used to detect when to restart the server
         self.cert_mtime = -1
@@ -68,49 +94,110 @@ class WebRTCSimpleServer(object):
                 await ws.ping()
         return msg
 
-    async def cleanup_session(self, uid):
-        if uid in self.sessions:
-            other_id = self.sessions[uid]
-            del self.sessions[uid]
-            print("Cleaned up {} session".format(uid))
-            if other_id in self.sessions:
-                del self.sessions[other_id]
-                print("Also cleaned up {} session".format(other_id))
-                # If there was a session with this peer, also
-                # close the connection to reset its state.
-                if other_id in self.peers:
-                    print("Closing connection to {}".format(other_id))
-                    wso, oaddr, _ = self.peers[other_id]
-                    del self.peers[other_id]
-                    await wso.close()
-
-    async def cleanup_room(self, uid, room_id):
-        room_peers = self.rooms[room_id]
-        if uid not in room_peers:
+    def log_msg(self, fmt, *args):
+        '''
+        Log a relayed message if enabled, at most log_rate times per second.
+        The message is only formatted when it is actually logged.
+        '''
+        if not self.log_messages:
+            return
+        now = time.monotonic()
+        if now - self.log_window_start >= 1:
+            if self.log_skipped:
+                print('({} messages not logged)'.format(self.log_skipped))
+            self.log_window_start = now
+            self.log_count = 0
+            self.log_skipped = 0
+        if self.log_count >= self.log_rate:
+            self.log_skipped += 1
+            return
+        self.log_count += 1
+        print(fmt.format(*args))
+
+    async def peer_writer(self, ws, queue):
+        while True:
+            msg = await queue.get()
+            try:
+                await ws.send(msg)
+            except websockets.ConnectionClosed:
+                return
+
+    def add_peer(self, uid, ws):
+        '''
+        Make peer @uid reachable from this process, the messages sent to it
+        are queued until start_peer_writer() is called
+        '''
+        self.peers[uid] = [ws, ws.remote_address, None]
+        self.send_queues[uid] = (asyncio.Queue(maxsize=self.send_queue_size), None)
+
+    def start_peer_writer(self, uid):
+        queue, _ = self.send_queues[uid]
+        task = asyncio.create_task(self.peer_writer(self.peers[uid][0], queue))
+        self.send_queues[uid] = (queue, task)
+
+    def stop_peer_writer(self, uid):
+        if uid in self.send_queues:
+            _, task = self.send_queues.pop(uid)
+            if task is not None:
+                task.cancel()
+
+    def send(self, uid, msg):
+        '''
+        Queue @msg to be sent to peer @uid without waiting for it to be sent.
+        A peer that does not read its messages fast enough to keep its send
+        queue from filling up gets disconnected.
+        '''
+        if uid not in self.send_queues:
             return
-        room_peers.remove(uid)
-        for pid in room_peers:
-            wsp, paddr, _ = self.peers[pid]
-            msg = 'ROOM_PEER_LEFT {}'.format(uid)
-            print('room {}: {} -> {}: {}'.format(room_id, uid, pid, msg))
-            await wsp.send(msg)
-
-    async def remove_peer(self, uid):
-        await self.cleanup_session(uid)
+        queue, _ = self.send_queues[uid]
+        try:
+            queue.put_nowait(msg)
+        except asyncio.QueueFull:
+            print('Send queue of peer {!r} is full, disconnecting it'.format(uid))
+            # No more messages are queued for the peer from now on
+            self.stop_peer_writer(uid)
+            self.spawn_close(self.remove_peer(uid, code=1008, reason='peer too slow'))
+
+    def relay(self, uid, msg):
+        '''
+        Send @msg to peer @uid, forwarding it through the directory if the
+        peer is not connected to this process
+        '''
+        if uid in self.send_queues:
+            self.send(uid, msg)
+        else:
+            self.directory.deliver(uid, msg)
+
+    def close_peer(self, uid):
+        if uid in self.peers:
+            print("Closing connection to {}".format(uid))
+            ws, _, _ = self.peers.pop(uid)
+            self.session_peers.pop(uid, None)
+            self.stop_peer_writer(uid)
+            self.spawn_close(ws.close())
+
+    def spawn_close(self, coro):
+        task = asyncio.create_task(coro)
+        self.close_tasks.add(task)
+        task.add_done_callback(self.close_tasks.discard)
+
+    def set_status(self, uid, status):
+        if uid in self.peers:
+            self.peers[uid][2] = status
+
+    async def remove_peer(self, uid, code=1000, reason=''):
         if uid in self.peers:
-            ws, raddr, status = self.peers[uid]
-            if status and status != 'session':
-                await self.cleanup_room(uid, status)
-            del self.peers[uid]
-            await ws.close()
+            ws, raddr, status = self.peers.pop(uid)
+            self.session_peers.pop(uid, None)
+            self.stop_peer_writer(uid)
+            await self.directory.unregister(uid)
+            await ws.close(code=code, reason=reason)
             print("Disconnected from peer {!r} at {!r}".format(uid, raddr))
 
     ############### Handler functions ###############
 
     async def connection_handler(self, ws, uid):
         raddr = ws.remote_address
-        peer_status = None
-        self.peers[uid] = [ws, raddr, peer_status]
         print("Registered peer {!r} at {!r}".format(uid, raddr))
         while True:
             # Receive command, wait forever if necessary
@@ -121,36 +208,41 @@ class WebRTCSimpleServer(object):
             if peer_status is not None:
                 # We're in a session, route message to connected peer
                 if peer_status == 'session':
-                    other_id = self.sessions[uid]
-                    wso, oaddr, status = self.peers[other_id]
-                    assert(status == 'session')
-                    print("{} -> {}: {}".format(uid, other_id, msg))
-                    await wso.send(msg)
+                    other_id = self.session_peers.get(uid)
+                    if other_id is None:
+                        other_id = await self.directory.session_peer(uid)
+                        if other_id is None:
+                            continue
+                        self.session_peers[uid] = other_id
+                    self.log_msg("{} -> {}: {}", uid, other_id, msg)
+                    self.relay(other_id, msg)
                 # We're in a room, accept room-specific commands
                 elif peer_status:
+                    room_id = peer_status
                     # ROOM_PEER_MSG peer_id MSG
                     if msg.startswith('ROOM_PEER_MSG'):
                         _, other_id, msg = msg.split(maxsplit=2)
                         if other_id not in self.peers:
-                            await ws.send('ERROR peer {!r} not found'
-                                          ''.format(other_id))
+                            # Let the directory check the peer and forward
+                            # the message to the process it is connected to
+                            self.directory.room_msg(uid, other_id, room_id, msg)
                             continue
                         wso, oaddr, status = self.peers[other_id]
                         if status != room_id:
-                            await ws.send('ERROR peer {!r} is not in the room'
-                                          ''.format(other_id))
+                            self.send(uid, 'ERROR peer {!r} is not in the room'
+                                      ''.format(other_id))
                             continue
                         msg = 'ROOM_PEER_MSG {} {}'.format(uid, msg)
-                        print('room {}: {} -> {}: {}'.format(room_id, uid, other_id, msg))
-                        await wso.send(msg)
+                        self.log_msg('room {}: {} -> {}: {}', room_id, uid, other_id, msg)
+                        self.send(other_id, msg)
                     elif msg == 'ROOM_PEER_LIST':
-                        room_id = self.peers[peer_id][2]
-                        room_peers = ' '.join([pid for pid in self.rooms[room_id] if pid != peer_id])
+                        room_peers = await self.directory.room_peers(room_id)
+                        room_peers = ' '.join([pid for pid in room_peers if pid != uid])
                         msg = 'ROOM_PEER_LIST {}'.format(room_peers)
-                        print('room {}: -> {}: {}'.format(room_id, uid, msg))
-                        await ws.send(msg)
+                        self.log_msg('room {}: -> {}: {}', room_id, uid, msg)
+                        self.send(uid, msg)
                     else:
-                        await ws.send('ERROR invalid msg, already in room')
+                        self.send(uid, 'ERROR invalid msg, already in room')
                         continue
                 else:
                     raise AssertionError('Unknown peer status {!r}'.format(peer_status))
@@ -158,54 +250,24 @@ class WebRTCSimpleServer(object):
             elif msg.startswith('SESSION'):
                 print("{!r} command {!r}".format(uid, msg))
                 _, callee_id = msg.split(maxsplit=1)
-                if callee_id not in self.peers:
-                    await ws.send('ERROR peer {!r} not found'.format(callee_id))
-                    continue
-                if peer_status is not None:
-                    await ws.send('ERROR you are already in a session, reconnect '
-                                  'to the server to start a new session, or use'
-                                  'a ROOM for multi-peer sessions')
+                if not await self.directory.start_session(uid, callee_id):
                     continue
-                callee_status = self.peers[callee_id][2]
-                if callee_status is not None:
-                    await ws.send('ERROR peer {!r} busy'.format(callee_id))
-                    continue
-                await ws.send('SESSION_OK')
-                wsc = self.peers[callee_id][0]
-                print('Session from {!r} ({!r}) to {!r} ({!r})'
-                      ''.format(uid, raddr, callee_id, wsc.remote_address))
+                print('Session from {!r} ({!r}) to {!r}'
+                      ''.format(uid, raddr, callee_id))
                 # Register session
                 self.peers[uid][2] = peer_status = 'session'
-                self.sessions[uid] = callee_id
-                self.peers[callee_id][2] = 'session'
-                self.sessions[callee_id] = uid
+                self.session_peers[uid] = callee_id
             # Requested joining or creation of a room
             elif msg.startswith('ROOM'):
                 print('{!r} command {!r}'.format(uid, msg))
                 _, room_id = msg.split(maxsplit=1)
                 # Room name cannot be 'session', empty, or contain whitespace
                 if room_id == 'session' or room_id.split() != [room_id]:
-                    await ws.send('ERROR invalid room id {!r}'.format(room_id))
+                    self.send(uid, 'ERROR invalid room id {!r}'.format(room_id))
                     continue
-                if room_id in self.rooms:
-                    if uid in self.rooms[room_id]:
-                        raise AssertionError('How did we accept a ROOM command '
-                                             'despite already being in a room?')
-                else:
-                    # Create room if required
-                    self.rooms[room_id] = set()
-                room_peers = ' '.join([pid for pid in self.rooms[room_id]])
-                await ws.send('ROOM_OK {}'.format(room_peers))
+                await self.directory.join_room(uid, room_id)
                 # Enter room
                 self.peers[uid][2] = peer_status = room_id
-                self.rooms[room_id].add(uid)
-                for pid in self.rooms[room_id]:
-                    if pid == uid:
-                        continue
-                    wsp, paddr, _ = self.peers[pid]
-                    msg = 'ROOM_PEER_JOINED {}'.format(uid)
-                    print('room {}: {} -> {}: {}'.format(room_id, uid, pid, msg))
-                    await wsp.send(msg)
             else:
                 print('Ignoring unknown message {!r} from {!r}'.format(msg, uid))
 
@@ -219,11 +281,28 @@ class WebRTCSimpleServer(object):
         if hello != 'HELLO':
             await ws.close(code=1002, reason='invalid protocol')
             raise Exception("Invalid hello from {!r}".format(raddr))
-        if not uid or uid in self.peers or uid.split() != [uid]:  # no whitespace
+        if not uid or uid.split() != [uid] or uid in self.peers:  # no whitespace
+            await ws.close(code=1002, reason='invalid peer uid')
+            raise Exception("Invalid uid {!r} from {!r}".format(uid, raddr))
+        # The other peers can send messages to this one as soon as it is
+        # registered in the directory, so it must already be reachable
+        self.add_peer(uid, ws)
+        if not await self.directory.register(uid):
+            self.peers.pop(uid, None)
+            self.stop_peer_writer(uid)
             await ws.close(code=1002, reason='invalid peer uid')
             raise Exception("Invalid uid {!r} from {!r}".format(uid, raddr))
-        # Send back a HELLO
-        await ws.send('HELLO')
+        # Send back a HELLO, before any message queued meanwhile
+        try:
+            await ws.send('HELLO')
+        except websockets.ConnectionClosed:
+            await self.remove_peer(uid)
+            raise
+        if uid not in self.send_queues:
+            # Disconnected by the server while sending the HELLO
+            await self.remove_peer(uid)
+            raise Exception("Peer {!r} at {!r} disconnected during hello".format(uid, raddr))
+        self.start_peer_writer(uid)
         return uid
 
     def get_ssl_certs(self):
@@ -269,13 +348,24 @@ class WebRTCSimpleServer(object):
 
         sslctx = self.get_ssl_ctx()
 
+        if self.broker:
+            module, cls = self.broker_backend.split(':')
+            directory_cls = getattr(importlib.import_module(module), cls)
+            self.directory = directory_cls(self, self.broker)
+        else:
+            self.directory = PeerDirectory(self)
+        await self.directory.start()
+
+        # Let the worker processes of the sharded mode share the port
+        kwargs = {'reuse_port': True} if self.reuse_port else {}
+
         print("Listening on https://{}:{}".format(self.addr, self.port))
         # Websocket server
         wsd = websockets.serve(handler, self.addr, self.port, ssl=sslctx, process_request=self.health_check if self.health_path else None,
                                # Maximum number of messages that websockets will pop
                                # off the asyncio and OS buffers per connection. See:
                                # https://websockets.readthedocs.io/en/stable/api.html#websockets.protocol.WebSocketCommonProtocol
-                               max_queue=16)
+                               max_queue=16, **kwargs)
 
         logger = logging.getLogger('websockets')
         logger.setLevel(logging.INFO)
@@ -293,9 +383,11 @@ class WebRTCSimpleServer(object):
             print('Stopped.')
         finally:
             logger.removeHandler(handler)
+            await self.directory.stop()
             self.peers = dict()
-            self.sessions = dict()
-            self.rooms = dict()
+            self.session_peers = dict()
+            self.send_queues = dict()
+            self.close_tasks = set()
 
     def stop(self):
         if self.exit_future:
@@ -325,6 +417,52 @@ class WebRTCSimpleServer(object):
                 return
 
 
+def run_server(options):
+    while True:
+        r = WebRTCSimpleServer(options)
+        asyncio.run(r.run())
+        print('Restarting server...')
+
+
+def run_sharded(options):
+    '''
+    Run @options.workers server processes listening on the same port, sharing
+    their peers through a broker
+    '''
+    processes = []
+    with tempfile.TemporaryDirectory() as tmpdir:
+        if not options.broker:
+            options.broker = os.path.join(tmpdir, 'broker.sock')
+            broker = multiprocessing.Process(target=run_broker, args=(options.broker,), name='broker')
+            broker.start()
+            processes.append(broker)
+            while not os.path.exists(options.broker) and broker.is_alive():
+                time.sleep(0.01)
+
+        for i in range(options.workers):
+            worker = multiprocessing.Process(target=run_server, args=(options,), name='worker-{}'.format(i))
+            worker.start()
+            processes.append(worker)
+
+        # Make sure the processes are stopped along with us
+        signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(1))
+        try:
+            # The processes are not supposed to exit, stop everything if one does
+            multiprocessing.connection.wait([p.sentinel for p in processes])
+            for p in processes:
+                if not p.is_alive():
+                    print('Process {} exited with {}, stopping'.format(p.name, p.exitcode))
+        except KeyboardInterrupt:
+            pass
+        finally:
+            for p in processes:
+                p.terminate()
+            for p in processes:
+                p.join()
+
+    return 1
+
+
 def main():
     parser = argparse.ArgumentParser(formatter_class=argparse.ArgumentDefaultsHelpFormatter)
     # See: host, port in https://docs.python.org/3/library/asyncio-eventloop.html#asyncio.loop.create_server
@@ -334,15 +472,22 @@ def main():
     parser.add_argument('--cert-path', default=os.path.dirname(__file__))
     parser.add_argument('--disable-ssl', default=False, help='Disable ssl', action='store_true')
     parser.add_argument('--health', default='/health', help='Health check route')
+    parser.add_argument('--send-queue-size', default=256, type=int, help='Maximum number of messages queued for a peer before disconnecting it')
+    parser.add_argument('--log-messages', default=False, action='store_true', help='Log the messages relayed between peers')
+    parser.add_argument('--log-rate', default=20, type=int, help='Maximum number of relayed messages logged per second')
     parser.add_argument('--restart-on-cert-change', default=False, dest='cert_restart', action='store_true', help='Automatically restart if the SSL certificate changes')
+    parser.add_argument('--workers', default=1, type=int, help='Number of server processes sharing the port and the peers')
+    parser.add_argument('--broker', default=None, help='Address of the broker sharing the peers between the server processes '
+                        '(default: start one listening on a UNIX socket)')
+    parser.add_argument('--broker-backend', default='peer_directory:BrokerDirectory', help='MODULE:CLASS implementing the '
+                        'connection to the broker, see peer_directory.BrokerDirectory')
 
     options = parser.parse_args(sys.argv[1:])
 
     print('Starting server...')
-    while True:
-        r = WebRTCSimpleServer(options)
-        asyncio.run(r.run())
-        print('Restarting server...')
+    if options.workers > 1:
+        sys.exit(run_sharded(options))
+    run_server(options)
 
     print("Goodbye!")
 
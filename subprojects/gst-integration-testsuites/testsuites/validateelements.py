@@ -22,6 +22,9 @@
 The GstValidate default testsuite
 """
 
+import os
+import pickle
+
 import gi
 
 gi.require_version("Gst", "1.0")
@@ -29,8 +32,13 @@ gi.require_version("Gst", "1.0")
 from gi.repository import Gst  # noqa
 from gi.repository import GObject  # noqa
 
+from launcher import utils  # noqa
+
 TEST_MANAGER = "validate"
 
+# Bump when the way pipelines descriptions are generated changes
+CACHE_VERSION = 1
+
 KNOWN_ISSUES = {
     "validateelements.launch_pipeline.videocropbottom=2147483647.play_15s issues": {
         "tests": [
@@ -684,8 +692,8 @@ def pspec_is_numeric(prop):
                                GObject.TYPE_FLOAT]
 
 
-def get_pipe_and_populate(test_manager, klass, fname, prop, loop):
-    prop_value = Gst.ElementFactory.make(fname, None).get_property(prop.name)
+def get_pipe_and_populate(test_manager, klass, fname, element, prop, loop):
+    prop_value = element.get_property(prop.name)
 
     if prop.value_type == GObject.TYPE_BOOLEAN:
         if loop is 1:
@@ -726,23 +734,21 @@ def get_pipe_and_populate(test_manager, klass, fname, prop, loop):
     return (tname, cpipe)
 
 
-def setup_tests(test_manager, options):
-    print("Setting up tests to validate all elements")
+def load_cached_descriptions(cache_path, signature):
+    try:
+        with open(cache_path, 'rb') as f:
+            version, cached_signature, pipelines_descriptions = pickle.load(f)
+    except (OSError, EOFError, ValueError, pickle.UnpicklingError):
+        return None
+
+    if version != CACHE_VERSION or cached_signature != signature:
+        return None
+
+    return pipelines_descriptions
+
+
+def list_pipelines_descriptions(test_manager):
     pipelines_descriptions = []
-    test_manager.add_expected_issues(KNOWN_ISSUES)
-    test_manager.set_default_blacklist([
-        ("validateelements.launch_pipeline.videobox*",
-         "Those are broken pipelines."),
-        ("validateelements.launch_pipeline.frei0r*",
-         "video filter plugins"),
-        ("validateelements.launch_pipeline.smpte*",
-         "smpte cannot be tested with simple pipeline. Hence excluding"),
-        ("validateelements.launch_pipeline.glfilterbin*",
-         "glfilter bin doesnt launch."),
-        ("validateelements.launch_pipeline.audiomixmatrix*",
-         "Now deprecated and requires specific properties to be set."),
-    ])
-    valid_scenarios = ["play_15s"]
     Gst.init(None)
     factories = Gst.Registry.get().get_feature_list(Gst.ElementFactory)
     for element_factory in factories:
@@ -798,10 +804,40 @@ def setup_tests(test_manager, options):
                 while loop:
                     loop -= 1
                     description = get_pipe_and_populate(test_manager, klass,
-                                                        fname, prop, loop)
+                                                        fname, element, prop, loop)
                     if None is not description:
                         pipelines_descriptions.append(description)
 
+    return pipelines_descriptions
+
+
+def setup_tests(test_manager, options):
+    print("Setting up tests to validate all elements")
+    test_manager.add_expected_issues(KNOWN_ISSUES)
+    test_manager.set_default_blacklist([
+        ("validateelements.launch_pipeline.videobox*",
+         "Those are broken pipelines."),
+        ("validateelements.launch_pipeline.frei0r*",
+         "video filter plugins"),
+        ("validateelements.launch_pipeline.smpte*",
+         "smpte cannot be tested with simple pipeline. Hence excluding"),
+        ("validateelements.launch_pipeline.glfilterbin*",
+         "glfilter bin doesnt launch."),
+        ("validateelements.launch_pipeline.audiomixmatrix*",
+         "Now deprecated and requires specific properties to be set."),
+    ])
+    valid_scenarios = ["play_15s"]
+
+    # Instantiating all the elements is slow, only do it when the plugins
+    # changed since the last run.
+    cache_path = os.path.join(options.privatedir, "validateelements.dat")
+    signature = (utils.get_gst_plugins_files(os.environ), options.mute)
+    pipelines_descriptions = load_cached_descriptions(cache_path, signature)
+    if pipelines_descriptions is None:
+        pipelines_descriptions = list_pipelines_descriptions(test_manager)
+        with open(cache_path, 'wb') as f:
+            pickle.dump((CACHE_VERSION, signature, pipelines_descriptions), f)
+
     # No restriction about scenarios that are potentially used
     test_manager.add_scenarios(valid_scenarios)
     test_manager.add_generators(test_manager.GstValidatePipelineTestsGenerator
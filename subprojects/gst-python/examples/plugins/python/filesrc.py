@@ -23,7 +23,9 @@
 # Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor,
 # Boston, MA 02110-1301, USA.
 import gi
+import os
 import sys
+import mmap
 
 gi.require_version('Gst', '1.0')
 gi.require_version('GstBase', '1.0')
@@ -48,23 +50,25 @@ class FileSource(GstBase.BaseSrc):
 
     blocksize = 4096
     fd = None
+    data = b''
 
     def __init__(self, name):
         super().__init__()
-        self.curoffset = 0
         self.set_name(name)
 
     def set_property(self, name, value):
         if name == 'location':
             self.fd = open(value, 'rb')
+            # Empty files can't be mapped
+            if os.fstat(self.fd.fileno()).st_size:
+                self.data = mmap.mmap(self.fd.fileno(), 0, access=mmap.ACCESS_READ)
 
     def do_create(self, offset, size, wot):
-        if offset != self.curoffset:
-            self.fd.seek(offset, 0)
-        data = self.fd.read(self.blocksize)
+        # The buffers wrap the mapped file directly, the data is only read
+        # from the disk when accessed downstream
+        data = memoryview(self.data)[offset:offset + self.blocksize]
         if data:
-            self.curoffset += len(data)
-            return Gst.FlowReturn.OK, Gst.Buffer.new_wrapped(data)
+            return Gst.FlowReturn.OK, Gst.Buffer.new_wrapped_buffer(data)
         else:
             return Gst.FlowReturn.EOS, None
 
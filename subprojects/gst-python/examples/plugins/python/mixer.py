@@ -93,8 +93,8 @@ class Videomixer(GstBase.Aggregator):
 
         data = bdata.outimg.tobytes()
 
-        outbuf = Gst.Buffer.new_allocate(None, len(data), None)
-        outbuf.fill(0, data)
+        # Wrap the bytes of the image instead of copying them
+        outbuf = Gst.Buffer.new_wrapped_buffer(data)
         outbuf.pts = bdata.pts
         self.finish_buffer(outbuf)
 
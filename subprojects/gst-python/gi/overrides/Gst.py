@@ -23,6 +23,8 @@
 # SPDX-License-Identifier: LGPL-2.0-or-later
 
 import sys
+import asyncio
+import collections
 import inspect
 import itertools
 import weakref
@@ -414,11 +416,237 @@ class Pipeline(Gst.Pipeline):
     def __init__(self, name=None):
         Gst.Pipeline.__init__(self, name=name)
 
+    async def set_state_async(self, state):
+        '''
+        Sets the state of the pipeline and waits, without blocking the running
+        asyncio loop, for the state change to be completed.
+
+        @raises: GLib.Error if an error is posted while changing state
+        @returns: Gst.StateChangeReturn.SUCCESS if the pipeline reached
+            @state, Gst.StateChangeReturn.FAILURE otherwise
+        '''
+        bus = self.get_bus()
+        types = Gst.MessageType.STATE_CHANGED | Gst.MessageType.ERROR
+        watch = _AsyncBusWatch.get(bus)
+        # Subscribe before changing state so no message can be missed, the
+        # pending ones were posted before and are left to the bus iterators
+        queue = watch.subscribe(types, pending=False)
+        try:
+            ret = self.set_state(state)
+            if state == Gst.State.NULL:
+                # The messages posted until now are not relevant anymore
+                watch.drop_pending()
+            if ret != Gst.StateChangeReturn.ASYNC:
+                return ret
+
+            while True:
+                msg = await queue.get()
+                if msg.type == Gst.MessageType.ERROR:
+                    raise msg.parse_error()[0]
+
+                if msg.src != self:
+                    continue
+
+                _, new, pending = msg.parse_state_changed()
+                if pending == Gst.State.VOID_PENDING:
+                    if new == state:
+                        return Gst.StateChangeReturn.SUCCESS
+                    return Gst.StateChangeReturn.FAILURE
+        finally:
+            watch.unsubscribe(queue)
+
 
 Pipeline = override(Pipeline)
 __all__.append('Pipeline')
 
 
+# Maximum number of messages popped from a bus per loop iteration, so a busy
+# bus can not starve the other tasks of the loop
+_BUS_BATCH_SIZE = 64
+
+# Maximum number of messages no iterator was interested in kept for the next
+# ones, the oldest messages are dropped first
+_BUS_MAX_PENDING = 256
+
+
+class _AsyncBusWatch:
+    '''
+    Pops the messages of a bus from an asyncio loop when its fd is readable
+    and dispatches them to the queues subscribed to their type. Messages no
+    queue is subscribed to are kept until a queue interested in them gets
+    subscribed, the elements they were posted by being set to NULL, or the
+    loop being closed.
+    '''
+    # The watches of the buses of each loop, dropped with the loop
+    _watches = weakref.WeakKeyDictionary()
+
+    def __init__(self, bus, loop):
+        self.bus = bus
+        self.loop = loop
+        self.fd = bus.get_pollfd().fd
+        self.queues = []
+        self.pending = collections.deque(maxlen=_BUS_MAX_PENDING)
+
+    @classmethod
+    def get(cls, bus):
+        loop = asyncio.get_running_loop()
+        for closed in [other for other in cls._watches if other.is_closed()]:
+            del cls._watches[closed]
+
+        watches = cls._watches.setdefault(loop, {})
+        for idle_watch in [w for w in watches.values() if not w.queues]:
+            idle_watch.drop_pending(stale_only=True)
+
+        watch = watches.get(bus)
+        if watch is None:
+            watch = watches[bus] = cls(bus, loop)
+
+        return watch
+
+    def drop_pending(self, stale_only=False):
+        '''
+        Drops the pending messages, only the ones posted by elements since set
+        to NULL if @stale_only is True, and forgets the watch if it is idle.
+        '''
+        if stale_only:
+            self.pending = collections.deque(
+                (msg for msg in self.pending
+                 if not isinstance(msg.src, Gst.Element) or msg.src.current_state != Gst.State.NULL),
+                maxlen=_BUS_MAX_PENDING)
+        else:
+            self.pending.clear()
+
+        if not self.queues and not self.pending:
+            watches = self._watches.get(self.loop, {})
+            if watches.get(self.bus) is self:
+                del watches[self.bus]
+
+    def subscribe(self, types, pending=True):
+        '''
+        Returns a queue receiving the messages matching @types, starting with
+        the pending ones unless @pending is False.
+        '''
+        queue = asyncio.Queue()
+        if pending:
+            messages, self.pending = self.pending, collections.deque(maxlen=_BUS_MAX_PENDING)
+            for msg in messages:
+                if msg.type & types:
+                    queue.put_nowait(msg)
+                else:
+                    self.pending.append(msg)
+
+        if not self.queues:
+            self.loop.add_reader(self.fd, self._pop_messages)
+        self.queues.append((types, queue))
+
+        return queue
+
+    def unsubscribe(self, queue):
+        self.queues = [q for q in self.queues if q[1] is not queue]
+        if not self.queues:
+            self.loop.remove_reader(self.fd)
+            # Keep the watch, and its pending messages, for the next iterator
+            self.drop_pending(stale_only=True)
+
+    def _pop_messages(self):
+        for _ in range(_BUS_BATCH_SIZE):
+            msg = self.bus.pop()
+            if msg is None:
+                break
+
+            dispatched = False
+            for types, queue in self.queues:
+                if msg.type & types:
+                    queue.put_nowait(msg)
+                    dispatched = True
+
+            if not dispatched:
+                self.pending.append(msg)
+
+
+class Bus(Gst.Bus):
+    async def iter_async(self, types=Gst.MessageType.ANY):
+        '''
+        Asynchronously iterates over the messages matching @types, from the
+        running asyncio loop:
+
+            async for msg in bus.iter_async(Gst.MessageType.EOS | Gst.MessageType.ERROR):
+                ...
+
+        Messages are popped from the bus as soon as they are available. The
+        ones no iterator of the bus is interested in are kept, up to a limit,
+        for the iterators started later, including the ones posted while
+        awaiting Gst.Pipeline.set_state_async(), until the elements that
+        posted them are set to NULL.
+        '''
+        watch = _AsyncBusWatch.get(self)
+        queue = watch.subscribe(types)
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            watch.unsubscribe(queue)
+
+
+Bus = override(Bus)
+__all__.append('Bus')
+
+
+def _on_promise_changed(promise, future):
+    # Might be called from any thread, so get the result here and only
+    # resolve the future from its loop
+    result = promise.wait()
+    reply = promise.get_reply() if result == Gst.PromiseResult.REPLIED else None
+    future.get_loop().call_soon_threadsafe(_resolve_promise_future, future, result, reply)
+
+
+def _resolve_promise_future(future, result, reply):
+    if future.done():
+        return
+
+    if result == Gst.PromiseResult.REPLIED:
+        future.set_result(reply)
+    else:
+        future.cancel()
+
+
+class Promise(Gst.Promise):
+    @staticmethod
+    def new_async():
+        '''
+        Creates a promise that can be awaited from the running asyncio loop:
+
+            promise = Gst.Promise.new_async()
+            webrtcbin.emit('create-offer', None, promise)
+            reply = await promise
+
+        Awaiting the promise returns its reply, it raises
+        asyncio.CancelledError if the promise is interrupted or expired.
+        Cancelling the awaiting task interrupts the promise.
+        '''
+        future = asyncio.get_running_loop().create_future()
+        promise = Gst.Promise.new_with_change_func(_on_promise_changed, future)
+
+        def interrupt(future):
+            if future.cancelled():
+                promise.interrupt()
+        future.add_done_callback(interrupt)
+        promise._future = future
+
+        return promise
+
+    def __await__(self):
+        future = getattr(self, '_future', None)
+        if future is None:
+            raise TypeError("Only promises created with Gst.Promise.new_async() can be awaited")
+
+        return future.__await__()
+
+
+Promise = override(Promise)
+__all__.append('Promise')
+
+
 class Structure(Gst.Structure):
     def __new__(cls, *args, **kwargs):
         if not args:
@@ -973,6 +1201,18 @@ class Buffer(MiniObject, Gst.Buffer):
         mapinfo.__parent__ = None
         return _gi_gst.buffer_override_unmap(self, mapinfo)
 
+    @staticmethod
+    def new_wrapped_buffer(obj):
+        """
+        Creates a buffer wrapping the memory of @obj without copying it.
+
+        @obj can be any object supporting the buffer protocol, like bytes,
+        bytearray, memoryview, mmap or a contiguous NumPy array. A reference
+        to it is kept until the memory of the buffer is freed. The buffer is
+        read-only if @obj does not export writable memory.
+        """
+        return _gi_gst.buffer_new_wrapped_buffer(obj)
+
 
 Buffer = override(Buffer)
 __all__.append('Buffer')
@@ -996,6 +1236,150 @@ Memory = override(Memory)
 __all__.append('Memory')
 
 
+class MappedBuffer:
+    """
+    A buffer acquired from a Gst.BufferPool and mapped for writing, see
+    Gst.BufferPool.acquire_mapped().
+
+    The mapped memory is exposed as @array, a NumPy array or a memoryview,
+    which must not be used anymore once the buffer got unmapped, by leaving
+    the `with` block or calling unmap().
+    """
+
+    def __init__(self, buffer, info, array):
+        self.buffer = buffer
+        self.info = info
+        self.array = array
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, tb):
+        self.unmap()
+
+    def unmap(self):
+        if self.info is None:
+            return
+        info, self.info = self.info, None
+        self.array = None
+        if not self.buffer.unmap(info):
+            raise MapError('MappingError', 'Unmapping was not successful')
+
+
+__all__.append('MappedBuffer')
+
+
+class BufferPool(Gst.BufferPool):
+
+    def _configure(self, caps, size, min_buffers, max_buffers, allocator, params):
+        config = self.get_config()
+        BufferPool.config_set_params(config, caps, size, min_buffers, max_buffers)
+        BufferPool.config_set_allocator(config, allocator, params)
+        if self.set_config(config):
+            return True
+
+        # The pool may have adjusted the configuration, accept it as long as
+        # it is compatible with ours
+        config = self.get_config()
+        return BufferPool.config_validate_params(config, caps, size, min_buffers, max_buffers) \
+            and self.set_config(config)
+
+    @staticmethod
+    def decide_allocation(query, size=0, min_buffers=2, max_buffers=0):
+        """
+        Implementation of the decide_allocation virtual method of
+        GstBase.BaseSrc, GstBase.BaseTransform and GstBase.Aggregator
+        that always configures a pool, creating a new one if downstream
+        did not propose any, so the output buffers of Python elements are
+        recycled:
+
+            def do_decide_allocation(self, query):
+                return Gst.BufferPool.decide_allocation(query, frame_size)
+
+        GstBase.BaseSrc already creates a pool when downstream proposes a
+        buffer size, sources filling the buffers it allocates rarely need
+        this. It adds value for the GstBase.BaseTransform elements that are
+        not in place and for GstBase.Aggregator, whose output buffers are
+        otherwise often allocated from Python for each frame.
+
+        @size is used when downstream does not propose a larger size.
+        """
+        caps, _ = query.parse_allocation()
+
+        if query.get_n_allocation_params() > 0:
+            allocator, params = query.parse_nth_allocation_param(0)
+        else:
+            allocator, params = None, Gst.AllocationParams()
+
+        pool = None
+        if query.get_n_allocation_pools() > 0:
+            pool, pool_size, pool_min, pool_max = query.parse_nth_allocation_pool(0)
+            size = max(size, pool_size)
+            min_buffers = max(min_buffers, pool_min)
+            if pool_max:
+                max_buffers = max(pool_max, min_buffers)
+
+        if not size:
+            raise ValueError('No buffer size proposed by downstream, a size is required')
+
+        if pool is None or not BufferPool._configure(pool, caps, size, min_buffers, max_buffers,
+                                                     allocator, params):
+            pool = BufferPool.new()
+            if not BufferPool._configure(pool, caps, size, min_buffers, max_buffers, allocator, params):
+                return False
+
+        if query.get_n_allocation_params() > 0:
+            query.set_nth_allocation_param(0, allocator, params)
+        else:
+            query.add_allocation_param(allocator, params)
+
+        if query.get_n_allocation_pools() > 0:
+            query.set_nth_allocation_pool(0, pool, size, min_buffers, max_buffers)
+        else:
+            query.add_allocation_pool(pool, size, min_buffers, max_buffers)
+
+        return True
+
+    def acquire_mapped(self, dtype=None, shape=None, params=None):
+        """
+        Acquires a buffer from the pool, activating it if needed, and maps it
+        for writing. Returns a (Gst.FlowReturn, Gst.MappedBuffer) tuple, the
+        mapped buffer being None if no buffer could be acquired, for example
+        when the pool is flushing.
+
+        If @dtype is set, the mapped memory is exposed as a NumPy array of that
+        type, optionally with the given @shape, otherwise as a memoryview.
+        """
+        if not self.is_active() and not self.set_active(True):
+            return Gst.FlowReturn.ERROR, None
+
+        ret, buffer = self.acquire_buffer(params)
+        if ret != Gst.FlowReturn.OK:
+            return ret, None
+
+        info = buffer.map(Gst.MapFlags.WRITE)
+        if not info.__parent__:
+            return Gst.FlowReturn.ERROR, None
+
+        array = info.data
+        if dtype is not None:
+            import numpy
+
+            if shape is None:
+                shape = info.size // numpy.dtype(dtype).itemsize
+            try:
+                array = numpy.ndarray(shape=shape, dtype=dtype, buffer=info.data)
+            except Exception:
+                buffer.unmap(info)
+                raise
+
+        return Gst.FlowReturn.OK, MappedBuffer(buffer, info, array)
+
+
+BufferPool = override(BufferPool)
+__all__.append('BufferPool')
+
+
 def TIME_ARGS(time):
     if time == Gst.CLOCK_TIME_NONE:
         return "CLOCK_TIME_NONE"
@@ -1022,6 +1406,73 @@ Gst.error = _gi_gst.error
 Gst.fixme = _gi_gst.fixme
 Gst.memdump = _gi_gst.memdump
 
+
+class DebugCategory(Gst.DebugCategory):
+    """
+    A debug category usable from Python, messages are only formatted when the
+    level they are logged at is enabled for the category:
+
+        CAT = Gst.DebugCategory("myelement", 0, "My element")
+        CAT.debug("Got %d buffers", n_buffers, obj=self)
+        CAT.log(lambda: expensive_dump(self))
+    """
+
+    def __new__(cls, name, color=0, description=None):
+        _gi_gst.debug_category_new(name, color, description)
+        for category in Gst.debug_get_all_categories():
+            if category.get_name() == name:
+                return category
+
+        # Debugging disabled in GStreamer, logging will be a no-op
+        return super().__new__(cls)
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def is_enabled(self, level):
+        return int(level) <= int(self.get_threshold())
+
+    def debug_log(self, level, message, *args, obj=None):
+        _gi_gst.debug_category_log(self, int(level), obj, message, args)
+
+    def error(self, message, *args, obj=None):
+        _gi_gst.debug_category_log(self, _DEBUG_LEVEL_ERROR, obj, message, args)
+
+    def warning(self, message, *args, obj=None):
+        _gi_gst.debug_category_log(self, _DEBUG_LEVEL_WARNING, obj, message, args)
+
+    def fixme(self, message, *args, obj=None):
+        _gi_gst.debug_category_log(self, _DEBUG_LEVEL_FIXME, obj, message, args)
+
+    def info(self, message, *args, obj=None):
+        _gi_gst.debug_category_log(self, _DEBUG_LEVEL_INFO, obj, message, args)
+
+    def debug(self, message, *args, obj=None):
+        _gi_gst.debug_category_log(self, _DEBUG_LEVEL_DEBUG, obj, message, args)
+
+    def log(self, message, *args, obj=None):
+        _gi_gst.debug_category_log(self, _DEBUG_LEVEL_LOG, obj, message, args)
+
+    def trace(self, message, *args, obj=None):
+        _gi_gst.debug_category_log(self, _DEBUG_LEVEL_TRACE, obj, message, args)
+
+    def memdump(self, message, *args, obj=None):
+        _gi_gst.debug_category_log(self, _DEBUG_LEVEL_MEMDUMP, obj, message, args)
+
+
+# Resolved once so logging calls do not go through the enum machinery
+_DEBUG_LEVEL_ERROR = int(Gst.DebugLevel.ERROR)
+_DEBUG_LEVEL_WARNING = int(Gst.DebugLevel.WARNING)
+_DEBUG_LEVEL_FIXME = int(Gst.DebugLevel.FIXME)
+_DEBUG_LEVEL_INFO = int(Gst.DebugLevel.INFO)
+_DEBUG_LEVEL_DEBUG = int(Gst.DebugLevel.DEBUG)
+_DEBUG_LEVEL_LOG = int(Gst.DebugLevel.LOG)
+_DEBUG_LEVEL_TRACE = int(Gst.DebugLevel.TRACE)
+_DEBUG_LEVEL_MEMDUMP = int(Gst.DebugLevel.MEMDUMP)
+
+DebugCategory = override(DebugCategory)
+__all__.append('DebugCategory')
+
 # Make sure PyGst is not usable if GStreamer has not been initialized
 
 
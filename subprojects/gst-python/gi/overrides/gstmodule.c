@@ -671,16 +671,68 @@ _pygst_element_init (gpointer gclass, PyTypeObject * pyclass)
 
 #include <frameobject.h>
 
+#ifndef GST_DISABLE_GST_DEBUG
+/* Logs @message with the location of the Python code @depth frames above
+ * the current one */
+static void
+pygst_debug_log_message (GstDebugCategory * category, GstDebugLevel level,
+    GObject * object, const gchar * message, int depth)
+{
+  const gchar *function = NULL;
+  const gchar *filename = NULL;
+  int lineno = 0;
+  PyFrameObject *frame;
+  PyCodeObject *code = NULL;
+
+  frame = PyEval_GetFrame ();
+#if PY_VERSION_HEX < 0x030a0000
+  for (; frame && depth > 0; depth--)
+    frame = frame->f_back;
+
+  if (frame) {
+    code = frame->f_code;
+    Py_INCREF (code);
+    lineno = PyCode_Addr2Line (code, frame->f_lasti);
+  }
+#else
+  Py_XINCREF (frame);
+  for (; frame && depth > 0; depth--) {
+    PyFrameObject *back = PyFrame_GetBack (frame);
+
+    Py_DECREF (frame);
+    frame = back;
+  }
+
+  if (frame) {
+    code = PyFrame_GetCode (frame);
+    lineno = PyFrame_GetLineNumber (frame);
+    Py_DECREF (frame);
+  }
+#endif
+
+  /* The UTF-8 representations are cached by the code object strings, no
+   * need to copy them */
+  if (code) {
+    function = PyUnicode_AsUTF8 (code->co_name);
+    filename = PyUnicode_AsUTF8 (code->co_filename);
+    if (!function || !filename)
+      PyErr_Clear ();
+  }
+
+  /* gst_debug_log : category, level, file, function, line, object, format, va_list */
+  gst_debug_log (category, level, filename ? filename : "",
+      function ? function : "", lineno, object, "%s", message);
+
+  Py_XDECREF (code);
+}
+#endif
+
 static PyObject *
 pygst_debug_log (PyObject * pyobject, PyObject * string, GstDebugLevel level,
     gboolean isgstobject)
 {
 #ifndef GST_DISABLE_GST_DEBUG
   gchar *str;
-  gchar *function;
-  gchar *filename;
-  int lineno;
-  PyFrameObject *frame;
   GObject *object = NULL;
 
   if (!PyArg_ParseTuple (string, "s:gst.debug_log", &str)) {
@@ -688,51 +740,97 @@ pygst_debug_log (PyObject * pyobject, PyObject * string, GstDebugLevel level,
     return NULL;
   }
 
-  frame = PyEval_GetFrame ();
-  {
-#if PY_VERSION_HEX < 0x030a0000
-    PyCodeObject *code = frame->f_code;
-#else
-    PyCodeObject *code = PyFrame_GetCode (frame);
-#endif
-    PyObject *utf8;
-    const gchar *utf8_str;
+  /* Avoid looking at the frame when the message would be dropped anyway */
+  if (level > gst_debug_category_get_threshold (python_debug))
+    Py_RETURN_NONE;
 
-    utf8 = PyUnicode_AsUTF8String (code->co_name);
-    utf8_str = PyBytes_AS_STRING (utf8);
+  if (isgstobject)
+    object = G_OBJECT (pygobject_get (pyobject));
+  pygst_debug_log_message (python_debug, level, object, str, 0);
+#endif
+  Py_INCREF (Py_None);
+  return Py_None;
+}
 
-    function = g_strdup (utf8_str);
-    Py_DECREF (utf8);
+static PyObject *
+_wrap_gst_debug_category_new (PyObject * self, PyObject * args)
+{
+  const gchar *name;
+  const gchar *description = NULL;
+  guint color = 0;
 
-    utf8 = PyUnicode_AsUTF8String (code->co_filename);
-    utf8_str = PyBytes_AS_STRING (utf8);
+  if (!PyArg_ParseTuple (args, "s|Iz:debug_category_new", &name, &color,
+          &description))
+    return NULL;
 
-    filename = g_strdup (utf8_str);
-    Py_DECREF (utf8);
-#if PY_VERSION_HEX < 0x030a0000
-    lineno = PyCode_Addr2Line (frame->f_code, frame->f_lasti);
-#else
-    lineno = PyFrame_GetLineNumber (frame);
+#ifndef GST_DISABLE_GST_DEBUG
+  /* Returns the existing category if there is one with that name already */
+  _gst_debug_category_new (name, color, description);
 #endif
 
-#if PY_VERSION_HEX >= 0x030a0000
-    Py_DECREF (code);
-#endif
+  Py_RETURN_NONE;
+}
+
+/* debug_category_log (category, level, object, message, args)
+ *
+ * @message is only formatted, with @args or by calling it if it is callable,
+ * when the level is enabled for @category */
+static PyObject *
+_wrap_gst_debug_category_log (PyObject * self, PyObject * args)
+{
+#ifndef GST_DISABLE_GST_DEBUG
+  PyObject *py_category, *py_object, *message, *format_args;
+  PyObject *formatted, *str;
+  GstDebugCategory *category;
+  GObject *object = NULL;
+  const gchar *utf8;
+  int level;
+
+  if (!PyArg_ParseTuple (args, "OiOOO!:debug_category_log", &py_category,
+          &level, &py_object, &message, &PyTuple_Type, &format_args))
+    return NULL;
+
+  category = pyg_pointer_get (py_category, GstDebugCategory);
+  if (!category || level > (int) gst_debug_category_get_threshold (category))
+    Py_RETURN_NONE;
+
+  if (py_object != Py_None) {
+    if (!pygobject_check (py_object, &PyGObject_Type)) {
+      PyErr_SetString (PyExc_TypeError, "obj must be a GObject");
+      return NULL;
+    }
+    object = G_OBJECT (pygobject_get (py_object));
   }
 
+  if (PyCallable_Check (message)) {
+    formatted = PyObject_CallObject (message, NULL);
+  } else if (PyTuple_GET_SIZE (format_args)) {
+    formatted = PyNumber_Remainder (message, format_args);
+  } else {
+    Py_INCREF (message);
+    formatted = message;
+  }
 
-  /* gst_debug_log : category, level, file, function, line, object, format, va_list */
-  if (isgstobject)
-    object = G_OBJECT (pygobject_get (pyobject));
-  gst_debug_log (python_debug, level, filename, function, lineno, object,
-      "%s", str);
-  if (function)
-    g_free (function);
-  if (filename)
-    g_free (filename);
+  if (!formatted)
+    return NULL;
+
+  str = PyObject_Str (formatted);
+  Py_DECREF (formatted);
+  if (!str)
+    return NULL;
+
+  utf8 = PyUnicode_AsUTF8 (str);
+  if (!utf8) {
+    Py_DECREF (str);
+    return NULL;
+  }
+
+  /* Skip the DebugCategory method frame */
+  pygst_debug_log_message (category, level, object, utf8, 1);
+  Py_DECREF (str);
 #endif
-  Py_INCREF (Py_None);
-  return Py_None;
+
+  Py_RETURN_NONE;
 }
 
 static PyObject *
@@ -912,9 +1010,13 @@ _gst_memory_override_map (PyObject * self, PyObject * args)
   /* Extract GstMemory from Gst.Memory parameter */
   memory = GST_MEMORY_CAST (pygobject_get (py_memory));
 
-  /* Map the memory, fill out GstMapInfo */
+  /* Map the memory, fill out GstMapInfo. This can block, for example to
+   * synchronize the memory with a device, so let other threads run
+   * meanwhile */
   mapinfo = g_new0 (GstMapInfo, 1);
+  Py_BEGIN_ALLOW_THREADS;
   ok = gst_memory_map (memory, mapinfo, flags);
+  Py_END_ALLOW_THREADS;
   if (!ok) {
     g_free (mapinfo);
     goto err;
@@ -1340,7 +1442,9 @@ _gst_memory_override_unmap (PyObject * self, PyObject * args)
     memory = GST_MEMORY_CAST (pygobject_get (py_memory));
 
     /* Unmap the buffer, using reconstructed GstMapInfo */
+    Py_BEGIN_ALLOW_THREADS;
     gst_memory_unmap (memory, mapinfo);
+    Py_END_ALLOW_THREADS;
     g_free (mapinfo);
   }
 
@@ -1389,7 +1493,9 @@ _gst_buffer_override_map_range (PyObject * self, PyObject * args)
 
   /* Map the buffer, fill out GstMapInfo */
   mapinfo = g_new0 (GstMapInfo, 1);
+  Py_BEGIN_ALLOW_THREADS;
   ok = gst_buffer_map_range (buffer, idx, range, mapinfo, flags);
+  Py_END_ALLOW_THREADS;
   if (!ok) {
     g_free (mapinfo);
     goto err;
@@ -1630,7 +1736,9 @@ _gst_buffer_override_map (PyObject * self, PyObject * args)
 
   /* Map the buffer, fill out GstMapInfo */
   mapinfo = g_new0 (GstMapInfo, 1);
+  Py_BEGIN_ALLOW_THREADS;
   ok = gst_buffer_map (buffer, mapinfo, flags);
+  Py_END_ALLOW_THREADS;
   if (!ok) {
     g_free (mapinfo);
     goto err;
@@ -1669,13 +1777,59 @@ _gst_buffer_override_unmap (PyObject * self, PyObject * args)
     buffer = GST_BUFFER (pygobject_get (py_buffer));
 
     /* Unmap the buffer, using reconstructed GstMapInfo */
+    Py_BEGIN_ALLOW_THREADS;
     gst_buffer_unmap (buffer, mapinfo);
+    Py_END_ALLOW_THREADS;
     g_free (mapinfo);
   }
 
   return success;
 }
 
+static void
+_release_wrapped_buffer (gpointer user_data)
+{
+  Py_buffer *view = user_data;
+  PyGILState_STATE state;
+
+  /* The memory can be freed from any streaming thread */
+  state = PyGILState_Ensure ();
+  PyBuffer_Release (view);
+  PyGILState_Release (state);
+
+  g_free (view);
+}
+
+static PyObject *
+_gst_buffer_new_wrapped_buffer (PyObject * self, PyObject * args)
+{
+  PyObject *py_obj;
+  Py_buffer *view;
+  GstMemoryFlags flags = 0;
+  GstBuffer *buffer;
+
+  if (!PyArg_ParseTuple (args, "O", &py_obj))
+    return NULL;
+
+  /* Export the data writable if possible, so the buffer can be mapped for
+   * writing, and keep the view (and so a reference to the exporter) until
+   * the memory is freed */
+  view = g_new0 (Py_buffer, 1);
+  if (PyObject_GetBuffer (py_obj, view, PyBUF_WRITABLE) < 0) {
+    PyErr_Clear ();
+    if (PyObject_GetBuffer (py_obj, view, PyBUF_SIMPLE) < 0) {
+      g_free (view);
+      return NULL;
+    }
+    flags |= GST_MEMORY_FLAG_READONLY;
+  }
+
+  buffer = gst_buffer_new_wrapped_full (flags, view->buf, view->len, 0,
+      view->len, view, _release_wrapped_buffer);
+
+  return pyg_boxed_new (_gst_buffer_type, buffer, FALSE, TRUE);
+}
+
 /* *INDENT-OFF* */
 static PyMethodDef _gi_gst_functions[] = {
   {"trace", (PyCFunction) _wrap_gst_trace, METH_VARARGS, NULL},
@@ -1686,9 +1840,12 @@ static PyMethodDef _gi_gst_functions[] = {
   {"error", (PyCFunction) _wrap_gst_error, METH_VARARGS, NULL},
   {"fixme", (PyCFunction) _wrap_gst_fixme, METH_VARARGS, NULL},
   {"memdump", (PyCFunction) _wrap_gst_memdump, METH_VARARGS, NULL},
+  {"debug_category_new", (PyCFunction) _wrap_gst_debug_category_new, METH_VARARGS, NULL},
+  {"debug_category_log", (PyCFunction) _wrap_gst_debug_category_log, METH_VARARGS, NULL},
   {"buffer_override_map_range", (PyCFunction) _gst_buffer_override_map_range, METH_VARARGS, NULL},
   {"buffer_override_map", (PyCFunction) _gst_buffer_override_map, METH_VARARGS, NULL},
   {"buffer_override_unmap", (PyCFunction) _gst_buffer_override_unmap, METH_VARARGS, NULL},
+  {"buffer_new_wrapped_buffer", (PyCFunction) _gst_buffer_new_wrapped_buffer, METH_VARARGS, NULL},
   {"memory_override_map", (PyCFunction) _gst_memory_override_map, METH_VARARGS, NULL},
   {"memory_override_unmap", (PyCFunction) _gst_memory_override_unmap, METH_VARARGS, NULL},
 
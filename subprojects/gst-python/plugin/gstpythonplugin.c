@@ -25,6 +25,7 @@
 /* include this first, before NO_IMPORT_PYGOBJECT is defined */
 #include <pygobject.h>
 #include <gst/gst.h>
+#include <glib/gstdio.h>
 #include <Python.h>
 /*
  * We need to call dlopen() directly on macOS to workaround a macOS runtime
@@ -58,8 +59,405 @@ GST_DEBUG_CATEGORY_STATIC (pyplugindebug);
 
 #define GST_ORIGIN "http://gstreamer.freedesktop.org"
 
+/* Version of the format of the element metadata cache, bump it whenever the
+ * format changes */
+#define CACHE_VERSION 1
+#define CACHE_GROUP "gst-python"
+
+static GQuark cached_element_quark;
+
+typedef struct
+{
+  /* Cache of the elements registered by each Python file, see
+   * gst_python_plugin_cache_store () */
+  GKeyFile *cache;
+  gboolean cache_changed;
+
+  /* When scanning the plugins for the registry, the elements of the
+   * unchanged files are registered from the cache instead of importing them */
+  gboolean scanning;
+
+  /* Name of the modules already handled */
+  GHashTable *modules;
+} GstPythonPluginLoader;
+
+/* The factory of a Python element, as found in the cache */
+typedef struct
+{
+  gchar *factory_name;
+  guint rank;
+  GstStructure *metadata;
+  gchar **templates;
+  gchar **interfaces;
+  GstURIType uri_type;
+  gchar **uri_protocols;
+} GstPythonCachedElement;
+
+static gboolean
+gst_python_is_plugin_scanner (void)
+{
+  const gchar *prgname = g_get_prgname ();
+
+  return prgname && g_str_has_prefix (prgname, "gst-plugin-scanner");
+}
+
+static gchar *
+gst_python_plugin_cache_path (void)
+{
+  const gchar *registry;
+
+  /* Keep the cache next to the registry, if its location is customized */
+  registry = g_getenv ("GST_REGISTRY_1_0");
+  if (registry == NULL)
+    registry = g_getenv ("GST_REGISTRY");
+  if (registry)
+    return g_strconcat (registry, ".python-plugins", NULL);
+
+  return g_build_filename (g_get_user_cache_dir (),
+      "gstreamer-" GST_API_VERSION, "python-plugins.cache", NULL);
+}
+
+static GKeyFile *
+gst_python_plugin_cache_load (void)
+{
+  GKeyFile *cache = g_key_file_new ();
+  gchar *path = gst_python_plugin_cache_path ();
+
+  if (!g_key_file_load_from_file (cache, path, G_KEY_FILE_NONE, NULL) ||
+      g_key_file_get_integer (cache, CACHE_GROUP, "version",
+          NULL) != CACHE_VERSION) {
+    GST_DEBUG ("No valid element metadata cache at %s", path);
+    g_key_file_free (cache);
+    cache = g_key_file_new ();
+    g_key_file_set_integer (cache, CACHE_GROUP, "version", CACHE_VERSION);
+  }
+  g_free (path);
+
+  return cache;
+}
+
+static void
+gst_python_plugin_cache_save (GKeyFile * cache)
+{
+  gchar **groups, **group;
+  gchar *path, *dir;
+  GError *error = NULL;
+
+  /* Forget about the files that were removed */
+  groups = g_key_file_get_groups (cache, NULL);
+  for (group = groups; *group; group++) {
+    if (g_strcmp0 (*group, CACHE_GROUP)
+        && !g_file_test (*group, G_FILE_TEST_EXISTS))
+      g_key_file_remove_group (cache, *group, NULL);
+  }
+  g_strfreev (groups);
+
+  path = gst_python_plugin_cache_path ();
+  dir = g_path_get_dirname (path);
+  g_mkdir_with_parents (dir, 0755);
+  if (!g_key_file_save_to_file (cache, path, &error)) {
+    GST_INFO ("Couldn't save element metadata cache to %s: %s", path,
+        error->message);
+    g_clear_error (&error);
+  }
+  g_free (dir);
+  g_free (path);
+}
+
 static gboolean
-gst_python_plugin_load_file (GstPlugin * plugin, const char *name)
+gst_python_plugin_cache_is_valid (GKeyFile * cache, const gchar * path,
+    GStatBuf * st)
+{
+  return g_key_file_has_group (cache, path)
+      && g_key_file_get_int64 (cache, path, "mtime", NULL) == st->st_mtime
+      && g_key_file_get_int64 (cache, path, "size", NULL) == st->st_size;
+}
+
+/* Stores the element registered by the Python file at @path, if any, so it
+ * can be registered again by the next registry scans without importing
+ * the file as long as it does not change */
+static void
+gst_python_plugin_cache_store (GKeyFile * cache, const gchar * path,
+    GStatBuf * st, const gchar * facname, guint rank, GType type)
+{
+  GstElementFactory *factory;
+  const GList *walk;
+  gchar **keys, **key;
+  GstStructure *metadata;
+  GPtrArray *templates, *interfaces;
+  GType *ifaces;
+  guint n_ifaces, i;
+  gchar *str;
+
+  g_key_file_remove_group (cache, path, NULL);
+  g_key_file_set_int64 (cache, path, "mtime", st->st_mtime);
+  g_key_file_set_int64 (cache, path, "size", st->st_size);
+
+  if (facname == NULL)
+    return;
+
+  factory = gst_element_factory_find (facname);
+  if (factory == NULL) {
+    g_key_file_remove_group (cache, path, NULL);
+    return;
+  }
+
+  g_key_file_set_string (cache, path, "element", facname);
+  g_key_file_set_integer (cache, path, "rank", rank);
+
+  metadata = gst_structure_new_empty ("metadata");
+  keys = gst_element_factory_get_metadata_keys (factory);
+  for (key = keys; key && *key; key++)
+    gst_structure_set (metadata, *key, G_TYPE_STRING,
+        gst_element_factory_get_metadata (factory, *key), NULL);
+  g_strfreev (keys);
+  str = gst_structure_to_string (metadata);
+  g_key_file_set_string (cache, path, "metadata", str);
+  gst_structure_free (metadata);
+  g_free (str);
+
+  templates = g_ptr_array_new_with_free_func (g_free);
+  for (walk = gst_element_factory_get_static_pad_templates (factory); walk;
+      walk = walk->next) {
+    GstStaticPadTemplate *templ = walk->data;
+    GstStructure *s = gst_structure_new ("template",
+        "name", G_TYPE_STRING, templ->name_template,
+        "direction", GST_TYPE_PAD_DIRECTION, templ->direction,
+        "presence", GST_TYPE_PAD_PRESENCE, templ->presence,
+        "caps", G_TYPE_STRING, templ->static_caps.string, NULL);
+
+    g_ptr_array_add (templates, gst_structure_to_string (s));
+    gst_structure_free (s);
+  }
+  g_key_file_set_string_list (cache, path, "templates",
+      (const gchar * const *) templates->pdata, templates->len);
+  g_ptr_array_unref (templates);
+
+  interfaces = g_ptr_array_new ();
+  ifaces = g_type_interfaces (type, &n_ifaces);
+  for (i = 0; i < n_ifaces; i++)
+    g_ptr_array_add (interfaces, (gpointer) g_type_name (ifaces[i]));
+  g_key_file_set_string_list (cache, path, "interfaces",
+      (const gchar * const *) interfaces->pdata, interfaces->len);
+  g_ptr_array_unref (interfaces);
+  g_free (ifaces);
+
+  if (g_type_is_a (type, GST_TYPE_URI_HANDLER)) {
+    const gchar *const *protocols =
+        gst_element_factory_get_uri_protocols (factory);
+
+    g_key_file_set_integer (cache, path, "uri-type",
+        gst_element_factory_get_uri_type (factory));
+    g_key_file_set_string_list (cache, path, "uri-protocols", protocols,
+        protocols ? g_strv_length ((gchar **) protocols) : 0);
+  }
+
+  gst_object_unref (factory);
+}
+
+static void
+gst_python_cached_element_free (GstPythonCachedElement * element)
+{
+  g_free (element->factory_name);
+  if (element->metadata)
+    gst_structure_free (element->metadata);
+  g_strfreev (element->templates);
+  g_strfreev (element->interfaces);
+  g_strfreev (element->uri_protocols);
+  g_free (element);
+}
+
+static GstURIType
+gst_python_placeholder_get_uri_type (GType type)
+{
+  GstPythonCachedElement *element =
+      g_type_get_qdata (type, cached_element_quark);
+
+  return element->uri_type;
+}
+
+static const gchar *const *
+gst_python_placeholder_get_protocols (GType type)
+{
+  GstPythonCachedElement *element =
+      g_type_get_qdata (type, cached_element_quark);
+
+  return (const gchar * const *) element->uri_protocols;
+}
+
+static void
+gst_python_placeholder_uri_handler_init (gpointer g_iface,
+    gpointer iface_data)
+{
+  GstURIHandlerInterface *iface = g_iface;
+
+  iface->get_type = gst_python_placeholder_get_uri_type;
+  iface->get_protocols = gst_python_placeholder_get_protocols;
+}
+
+static void
+gst_python_placeholder_class_init (gpointer g_class, gpointer class_data)
+{
+  GstElementClass *klass = g_class;
+  GstPythonCachedElement *element = class_data;
+  gchar **templ;
+  gint i;
+
+  for (i = 0; i < gst_structure_n_fields (element->metadata); i++) {
+    const gchar *key = gst_structure_nth_field_name (element->metadata, i);
+
+    gst_element_class_add_metadata (klass, key,
+        gst_structure_get_string (element->metadata, key));
+  }
+
+  for (templ = element->templates; templ && *templ; templ++) {
+    GstStructure *s = gst_structure_from_string (*templ, NULL);
+    GstPadDirection direction;
+    GstPadPresence presence;
+    GstCaps *caps;
+
+    gst_structure_get (s, "direction", GST_TYPE_PAD_DIRECTION, &direction,
+        "presence", GST_TYPE_PAD_PRESENCE, &presence, NULL);
+    caps = gst_caps_from_string (gst_structure_get_string (s, "caps"));
+    gst_element_class_add_pad_template (klass,
+        gst_pad_template_new (gst_structure_get_string (s, "name"), direction,
+            presence, caps));
+    gst_caps_unref (caps);
+    gst_structure_free (s);
+  }
+}
+
+static GstPythonCachedElement *
+gst_python_cached_element_new (GKeyFile * cache, const gchar * path)
+{
+  GstPythonCachedElement *element = g_new0 (GstPythonCachedElement, 1);
+  gchar *metadata, **templ, **iface;
+
+  element->factory_name = g_key_file_get_string (cache, path, "element", NULL);
+  element->rank = g_key_file_get_integer (cache, path, "rank", NULL);
+  metadata = g_key_file_get_string (cache, path, "metadata", NULL);
+  if (metadata)
+    element->metadata = gst_structure_from_string (metadata, NULL);
+  g_free (metadata);
+  element->templates =
+      g_key_file_get_string_list (cache, path, "templates", NULL, NULL);
+  element->interfaces =
+      g_key_file_get_string_list (cache, path, "interfaces", NULL, NULL);
+  element->uri_type = g_key_file_get_integer (cache, path, "uri-type", NULL);
+  element->uri_protocols =
+      g_key_file_get_string_list (cache, path, "uri-protocols", NULL, NULL);
+
+  if (!element->factory_name || !element->metadata)
+    goto invalid;
+
+  for (templ = element->templates; templ && *templ; templ++) {
+    GstStructure *s = gst_structure_from_string (*templ, NULL);
+    gboolean valid = s && gst_structure_has_field (s, "direction")
+        && gst_structure_has_field (s, "presence")
+        && gst_structure_get_string (s, "name")
+        && gst_structure_get_string (s, "caps");
+
+    if (s)
+      gst_structure_free (s);
+    if (!valid)
+      goto invalid;
+  }
+
+  /* The interfaces can only be registered on the placeholder if their
+   * types are known without loading any library */
+  for (iface = element->interfaces; iface && *iface; iface++) {
+    if (!g_type_from_name (*iface))
+      goto invalid;
+  }
+
+  return element;
+
+invalid:
+  GST_DEBUG ("Invalid or unusable cache entry for %s", path);
+  gst_python_cached_element_free (element);
+  return NULL;
+}
+
+/* Registers the element cached for the Python file at @path with a
+ * placeholder type carrying the same metadata, pad templates and interfaces
+ * as the Python class, which is enough for the registry. The actual type is
+ * registered when the plugin is loaded to instantiate an element. */
+static gboolean
+gst_python_plugin_register_cached (GstPlugin * plugin, GKeyFile * cache,
+    const gchar * path)
+{
+  GstPythonCachedElement *element;
+  GTypeInfo info = { 0, };
+  GType type;
+  gchar *type_name;
+  gchar **iface;
+
+  if (!g_key_file_has_key (cache, path, "element", NULL)) {
+    GST_DEBUG ("%s doesn't contain any element", path);
+    return TRUE;
+  }
+
+  element = gst_python_cached_element_new (cache, path);
+  if (!element)
+    return FALSE;
+
+  type_name = g_strdup_printf ("GstPythonPlaceholder-%s",
+      element->factory_name);
+  if (g_type_from_name (type_name)) {
+    GST_WARNING ("Element %s registered twice", element->factory_name);
+    g_free (type_name);
+    gst_python_cached_element_free (element);
+    return FALSE;
+  }
+
+  info.class_size = sizeof (GstElementClass);
+  info.class_init = gst_python_placeholder_class_init;
+  info.class_data = element;
+  info.instance_size = sizeof (GstElement);
+  /* Placeholders can't be instantiated */
+  type = g_type_register_static (GST_TYPE_ELEMENT, type_name, &info,
+      G_TYPE_FLAG_ABSTRACT);
+  g_free (type_name);
+  if (type == 0) {
+    /* The factory name contains characters not allowed in type names */
+    GST_DEBUG ("Couldn't register a placeholder type for %s",
+        element->factory_name);
+    gst_python_cached_element_free (element);
+    return FALSE;
+  }
+  g_type_set_qdata (type, cached_element_quark, element);
+
+  for (iface = element->interfaces; iface && *iface; iface++) {
+    GType iface_type = g_type_from_name (*iface);
+    GInterfaceInfo iface_info = { NULL, };
+    GType *prerequisites;
+    guint n_prerequisites, i;
+
+    prerequisites = g_type_interface_prerequisites (iface_type,
+        &n_prerequisites);
+    for (i = 0; i < n_prerequisites; i++) {
+      if (!g_type_is_a (type, prerequisites[i])) {
+        GST_DEBUG ("Can't implement %s on the placeholder of %s", *iface,
+            element->factory_name);
+        g_free (prerequisites);
+        return FALSE;
+      }
+    }
+    g_free (prerequisites);
+
+    if (iface_type == GST_TYPE_URI_HANDLER)
+      iface_info.interface_init = gst_python_placeholder_uri_handler_init;
+    g_type_add_interface_static (type, iface_type, &iface_info);
+  }
+
+  GST_INFO ("Registering %s from the cache", element->factory_name);
+  return gst_element_register (plugin, element->factory_name, element->rank,
+      type);
+}
+
+static gboolean
+gst_python_plugin_load_file (GstPlugin * plugin, const char *name,
+    const gchar ** facname_out, guint * rank_out, GType * type_out)
 {
   PyObject *main_module, *main_locals;
   PyObject *elementfactory;
@@ -93,7 +491,9 @@ gst_python_plugin_load_file (GstPlugin * plugin, const char *name)
   if (!elementfactory) {
     GST_DEBUG ("python file doesn't contain __gstelementfactory__");
     PyErr_Clear ();
-    return FALSE;
+    /* Valid module without any element */
+    *facname_out = NULL;
+    return TRUE;
   }
 
   /* parse tuple : name, rank, gst.ElementClass */
@@ -126,12 +526,59 @@ gst_python_plugin_load_file (GstPlugin * plugin, const char *name)
   GST_INFO ("Valid plugin");
   Py_DECREF (elementfactory);
 
-  return gst_element_register (plugin, facname, rank,
-      pyg_type_from_object (class));
+  *facname_out = facname;
+  *rank_out = rank;
+  *type_out = pyg_type_from_object (class);
+  return gst_element_register (plugin, facname, rank, *type_out);
+}
+
+static void
+gst_python_plugin_load_path (GstPlugin * plugin, GstPythonPluginLoader * loader,
+    const gchar * path, const gchar * name)
+{
+  GStatBuf st;
+  gboolean cached;
+  const gchar *facname = NULL;
+  guint rank = 0;
+  GType type = G_TYPE_INVALID;
+
+  /* Only the first module of a given name can be imported */
+  if (!g_hash_table_add (loader->modules, g_strdup (name)))
+    return;
+
+  if (g_stat (path, &st) != 0) {
+    GST_DEBUG ("Couldn't stat %s", path);
+    return;
+  }
+
+  cached = gst_python_plugin_cache_is_valid (loader->cache, path, &st);
+  if (cached && loader->scanning) {
+    if (gst_python_plugin_register_cached (plugin, loader->cache, path))
+      return;
+
+    /* Unusable entry, the file has to be imported and cached again */
+    g_key_file_remove_group (loader->cache, path, NULL);
+    loader->cache_changed = TRUE;
+    cached = FALSE;
+  }
+
+  if (!Py_IsInitialized ()) {
+    GST_WARNING ("Couldn't register %s from the cache, it will be imported "
+        "by the next registry scan", path);
+    return;
+  }
+
+  if (gst_python_plugin_load_file (plugin, name, &facname, &rank, &type)
+      && !cached) {
+    gst_python_plugin_cache_store (loader->cache, path, &st, facname, rank,
+        type);
+    loader->cache_changed = TRUE;
+  }
 }
 
 static gboolean
-gst_python_load_directory (GstPlugin * plugin, const gchar * path)
+gst_python_load_directory (GstPlugin * plugin, GstPythonPluginLoader * loader,
+    const gchar * path)
 {
   GDir *dir;
   const gchar *file;
@@ -149,7 +596,10 @@ gst_python_load_directory (GstPlugin * plugin, const gchar * path)
     if (g_str_has_suffix (file, ".py")) {
       gsize len = strlen (file) - 3;
       gchar *name = g_strndup (file, len);
-      gst_python_plugin_load_file (plugin, name);
+      gchar *filename = g_build_filename (path, file, NULL);
+
+      gst_python_plugin_load_path (plugin, loader, filename, name);
+      g_free (filename);
       g_free (name);
     }
   }
@@ -157,34 +607,68 @@ gst_python_load_directory (GstPlugin * plugin, const gchar * path)
   return TRUE;
 }
 
+/* Whether all the elements of the Python files in @dirs can be registered
+ * from the cache, in which case Python doesn't even need to be initialized */
 static gboolean
-gst_python_plugin_load (GstPlugin * plugin)
+gst_python_plugin_is_cached (GstPythonPluginLoader * loader, GPtrArray * dirs)
 {
-  PyObject *sys_path;
-  const gchar *plugin_path;
   gboolean ret = TRUE;
+  guint i;
+
+  for (i = 0; ret && i < dirs->len; i++) {
+    GDir *dir = g_dir_open (g_ptr_array_index (dirs, i), 0, NULL);
+    const gchar *file;
+
+    if (!dir)
+      continue;
+
+    while (ret && (file = g_dir_read_name (dir))) {
+      gchar *path;
+      GStatBuf st;
+
+      if (!g_str_has_suffix (file, ".py"))
+        continue;
+
+      path = g_build_filename (g_ptr_array_index (dirs, i), file, NULL);
+      if (g_stat (path, &st) != 0
+          || !gst_python_plugin_cache_is_valid (loader->cache, path, &st)) {
+        GST_DEBUG ("%s changed since it was cached", path);
+        ret = FALSE;
+      } else if (g_key_file_has_key (loader->cache, path, "element", NULL)) {
+        GstPythonCachedElement *element =
+            gst_python_cached_element_new (loader->cache, path);
+
+        if (element)
+          gst_python_cached_element_free (element);
+        else
+          ret = FALSE;
+      }
+      g_free (path);
+    }
+    g_dir_close (dir);
+  }
 
-  sys_path = PySys_GetObject ("path");
+  return ret;
+}
 
-  /* Mimic the order in which the registry is checked in core */
+/* Mimic the order in which the registry is checked in core */
+static GPtrArray *
+gst_python_plugin_get_directories (void)
+{
+  GPtrArray *dirs = g_ptr_array_new_with_free_func (g_free);
+  const gchar *plugin_path;
+  gchar **list;
+  gint i;
 
   /* 1. check env_variable GST_PLUGIN_PATH */
   plugin_path = g_getenv ("GST_PLUGIN_PATH_1_0");
   if (plugin_path == NULL)
     plugin_path = g_getenv ("GST_PLUGIN_PATH");
   if (plugin_path) {
-    char **list;
-    int i;
-
     GST_DEBUG ("GST_PLUGIN_PATH set to %s", plugin_path);
     list = g_strsplit (plugin_path, G_SEARCHPATH_SEPARATOR_S, 0);
-    for (i = 0; list[i]; i++) {
-      gchar *sysdir = g_build_filename (list[i], "python", NULL);
-      PyList_Insert (sys_path, 0, PyUnicode_FromString (sysdir));
-      gst_python_load_directory (plugin, sysdir);
-      g_free (sysdir);
-    }
-
+    for (i = 0; list[i]; i++)
+      g_ptr_array_add (dirs, g_build_filename (list[i], "python", NULL));
     g_strfreev (list);
   }
 
@@ -193,47 +677,55 @@ gst_python_plugin_load (GstPlugin * plugin)
   if (plugin_path == NULL)
     plugin_path = g_getenv ("GST_PLUGIN_SYSTEM_PATH");
   if (plugin_path == NULL) {
-    char *home_plugins;
-
     /* 2.a. Scan user and system-wide plugin directory */
     GST_DEBUG ("GST_PLUGIN_SYSTEM_PATH not set");
 
     /* plugins in the user's home directory take precedence over
      * system-installed ones */
-    home_plugins = g_build_filename (g_get_home_dir (),
-        ".gstreamer-" GST_API_VERSION, "plugins", "python", NULL);
-    PyList_Insert (sys_path, 0, PyUnicode_FromString (home_plugins));
-    gst_python_load_directory (plugin, home_plugins);
-    g_free (home_plugins);
+    g_ptr_array_add (dirs, g_build_filename (g_get_home_dir (),
+            ".gstreamer-" GST_API_VERSION, "plugins", "python", NULL));
 
     /* add the main (installed) library path */
-    PyList_Insert (sys_path, 0, PyUnicode_FromString (PLUGINDIR "/python"));
-    gst_python_load_directory (plugin, PLUGINDIR "/python");
+    g_ptr_array_add (dirs, g_strdup (PLUGINDIR "/python"));
   } else {
-    gchar **list;
-    gint i;
-
     /* 2.b. Scan GST_PLUGIN_SYSTEM_PATH */
     GST_DEBUG ("GST_PLUGIN_SYSTEM_PATH set to %s", plugin_path);
     list = g_strsplit (plugin_path, G_SEARCHPATH_SEPARATOR_S, 0);
-    for (i = 0; list[i]; i++) {
-      gchar *sysdir;
+    for (i = 0; list[i]; i++)
+      g_ptr_array_add (dirs, g_build_filename (list[i], "python", NULL));
+    g_strfreev (list);
+  }
 
-      sysdir = g_build_filename (list[i], "python", NULL);
+  return dirs;
+}
 
-      PyList_Insert (sys_path, 0, PyUnicode_FromString (sysdir));
-      gst_python_load_directory (plugin, sysdir);
-      g_free (sysdir);
-    }
-    g_strfreev (list);
+static gboolean
+gst_python_plugin_load (GstPlugin * plugin, GstPythonPluginLoader * loader,
+    GPtrArray * dirs)
+{
+  PyObject *sys_path = NULL;
+  guint i;
+
+  if (Py_IsInitialized ())
+    sys_path = PySys_GetObject ("path");
+
+  for (i = 0; i < dirs->len; i++) {
+    const gchar *dir = g_ptr_array_index (dirs, i);
+
+    if (sys_path)
+      PyList_Insert (sys_path, 0, PyUnicode_FromString (dir));
+    gst_python_load_directory (plugin, loader, dir);
   }
 
+  if (loader->cache_changed)
+    gst_python_plugin_cache_save (loader->cache);
 
-  return ret;
+  return TRUE;
 }
 
 static gboolean
-plugin_init (GstPlugin * plugin)
+gst_python_plugin_init_python (GstPlugin * plugin,
+    GstPythonPluginLoader * loader, GPtrArray * dirs)
 {
   PyGILState_STATE state = 0;
   PyObject *gi, *require_version, *args, *gst, *pyplugin;
@@ -241,16 +733,6 @@ plugin_init (GstPlugin * plugin)
   gpointer has_python = NULL;
   const gchar *override_path;
 
-  GST_DEBUG_CATEGORY_INIT (pyplugindebug, "pyplugin", 0,
-      "Python plugin loader");
-
-  gst_plugin_add_dependency_simple (plugin,
-      "HOME/.gstreamer-" GST_API_VERSION
-      "/plugins/python:GST_PLUGIN_SYSTEM_PATH/python:GST_PLUGIN_PATH/python",
-      PLUGINDIR "/python:HOME/.gstreamer-" GST_API_VERSION "/plugins/python:"
-      "GST_PLUGIN_SYSTEM_PATH/python:GST_PLUGIN_PATH/python", NULL,
-      GST_PLUGIN_DEPENDENCY_FLAG_NONE);
-
   GST_LOG ("Checking to see if libpython is already loaded");
   if (gstpy_module_symbol (gstpy_module_open (NULL),
           "_Py_NoneStruct", &has_python) && has_python) {
@@ -341,7 +823,7 @@ plugin_init (GstPlugin * plugin)
     }
   }
 
-  gst_python_plugin_load (plugin);
+  gst_python_plugin_load (plugin, loader, dirs);
 
   if (we_initialized) {
     /* We need to release the GIL since we're going back to C land */
@@ -351,6 +833,48 @@ plugin_init (GstPlugin * plugin)
   return TRUE;
 }
 
+static gboolean
+plugin_init (GstPlugin * plugin)
+{
+  GstPythonPluginLoader loader = { NULL, };
+  GPtrArray *dirs;
+  gboolean ret;
+
+  GST_DEBUG_CATEGORY_INIT (pyplugindebug, "pyplugin", 0,
+      "Python plugin loader");
+
+  gst_plugin_add_dependency_simple (plugin,
+      "HOME/.gstreamer-" GST_API_VERSION
+      "/plugins/python:GST_PLUGIN_SYSTEM_PATH/python:GST_PLUGIN_PATH/python",
+      PLUGINDIR "/python:HOME/.gstreamer-" GST_API_VERSION "/plugins/python:"
+      "GST_PLUGIN_SYSTEM_PATH/python:GST_PLUGIN_PATH/python", NULL,
+      GST_PLUGIN_DEPENDENCY_FLAG_NONE);
+
+  cached_element_quark =
+      g_quark_from_static_string ("gst-python-cached-element");
+
+  dirs = gst_python_plugin_get_directories ();
+  loader.cache = gst_python_plugin_cache_load ();
+  loader.scanning = gst_python_is_plugin_scanner ();
+  loader.modules = g_hash_table_new_full (g_str_hash, g_str_equal, g_free,
+      NULL);
+
+  if (loader.scanning && gst_python_plugin_is_cached (&loader, dirs)) {
+    /* Registry scan with nothing changed since the last one, no need to
+     * initialize Python and import the modules */
+    GST_INFO ("Registering all the Python elements from the cache");
+    ret = gst_python_plugin_load (plugin, &loader, dirs);
+  } else {
+    ret = gst_python_plugin_init_python (plugin, &loader, dirs);
+  }
+
+  g_hash_table_unref (loader.modules);
+  g_key_file_free (loader.cache);
+  g_ptr_array_unref (dirs);
+
+  return ret;
+}
+
 GST_PLUGIN_DEFINE (GST_VERSION_MAJOR,
     GST_VERSION_MINOR, python,
     "loader for plugins written in python",
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+#
+# Compares a Python source allocating a new buffer for each frame with one
+# acquiring its buffers from a pool as NumPy views, see
+# Gst.BufferPool.decide_allocation() and Gst.BufferPool.acquire_mapped().
+#
+# Requires numpy, run it from the development environment:
+#
+#   python3 testsuite/benchmarks/bufferpool.py --frames 2000
+#
+
+import sys
+import time
+import argparse
+
+import gi
+
+gi.require_version('Gst', '1.0')
+gi.require_version('GstBase', '1.0')
+from gi.repository import Gst, GObject, GstBase  # noqa
+
+import numpy as np  # noqa
+
+
+class BenchSrc(GstBase.BaseSrc):
+    __gstmetadata__ = ('BenchSrc', 'Source', 'Buffer allocation benchmark source', 'GStreamer')
+
+    __gsttemplates__ = (
+        Gst.PadTemplate.new('src', Gst.PadDirection.SRC, Gst.PadPresence.ALWAYS,
+                            Gst.Caps.new_any()),
+    )
+
+    mode = 'allocate'
+    width = 1920
+    height = 1080
+
+    def __init__(self):
+        super().__init__()
+        self.frame = 0
+
+    def do_get_caps(self, filter):
+        return Gst.Caps.from_string('video/x-raw,format=GRAY8,width={},height={},framerate=0/1'.format(
+            self.width, self.height))
+
+    def do_decide_allocation(self, query):
+        if self.mode == 'pool':
+            return Gst.BufferPool.decide_allocation(query, self.width * self.height)
+        return True
+
+    def do_create(self, offset, size, buf):
+        self.frame += 1
+        if self.mode == 'pool':
+            ret, mapped = self.get_buffer_pool().acquire_mapped(np.uint8, (self.height, self.width))
+            if ret != Gst.FlowReturn.OK:
+                return ret, None
+            with mapped:
+                mapped.array[:] = self.frame & 0xff
+            return Gst.FlowReturn.OK, mapped.buffer
+
+        buf = Gst.Buffer.new_allocate(None, self.width * self.height, None)
+        with buf.map(Gst.MapFlags.WRITE) as info:
+            array = np.ndarray(shape=(self.height, self.width), dtype=np.uint8, buffer=info.data)
+            array[:] = self.frame & 0xff
+        return Gst.FlowReturn.OK, buf
+
+
+def run(mode, options):
+    src = BenchSrc()
+    src.mode = mode
+    src.width = options.width
+    src.height = options.height
+    src.set_property('num-buffers', options.frames)
+
+    pipeline = Gst.Pipeline()
+    sink = Gst.ElementFactory.make('fakesink')
+    sink.set_property('sync', False)
+    pipeline.add(src, sink)
+    src.link(sink)
+
+    start = time.perf_counter()
+    pipeline.set_state(Gst.State.PLAYING)
+    msg = pipeline.get_bus().timed_pop_filtered(Gst.CLOCK_TIME_NONE,
+                                                Gst.MessageType.EOS | Gst.MessageType.ERROR)
+    elapsed = time.perf_counter() - start
+    pipeline.set_state(Gst.State.NULL)
+
+    if msg.type == Gst.MessageType.ERROR:
+        err, debug = msg.parse_error()
+        print('{}: error: {} ({})'.format(mode, err, debug))
+        return 1
+
+    print('{:>8}: {} {}x{} frames in {:.3f}s ({:.0f} frames/s)'.format(
+        mode, options.frames, options.width, options.height, elapsed, options.frames / elapsed))
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument('--frames', default=1000, type=int, help='Number of frames to produce')
+    parser.add_argument('--width', default=1920, type=int, help='Width of the frames')
+    parser.add_argument('--height', default=1080, type=int, help='Height of the frames')
+    options = parser.parse_args()
+
+    Gst.init(None)
+    GObject.type_register(BenchSrc)
+
+    return max(run(mode, options) for mode in ('allocate', 'pool'))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
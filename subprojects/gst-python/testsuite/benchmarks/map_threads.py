@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+#
+# Runs an increasing number of pipelines in parallel, each with a Python
+# transform element mapping every buffer, and reports how the throughput
+# scales with the number of streaming threads.
+#
+# Buffer and memory map/unmap release the GIL, so the map calls of one
+# stream do not stall the Python elements of the other ones.
+#
+#   python3 testsuite/benchmarks/map_threads.py --pipelines 8
+#
+
+import sys
+import time
+import argparse
+
+import gi
+
+gi.require_version('Gst', '1.0')
+gi.require_version('GstBase', '1.0')
+from gi.repository import Gst, GObject, GstBase  # noqa
+
+
+class MapBench(GstBase.BaseTransform):
+    __gstmetadata__ = ('MapBench', 'Filter', 'Buffer mapping benchmark element', 'GStreamer')
+
+    __gsttemplates__ = (
+        Gst.PadTemplate.new('src', Gst.PadDirection.SRC, Gst.PadPresence.ALWAYS,
+                            Gst.Caps.new_any()),
+        Gst.PadTemplate.new('sink', Gst.PadDirection.SINK, Gst.PadPresence.ALWAYS,
+                            Gst.Caps.new_any()),
+    )
+
+    maps_per_buffer = 1
+
+    def __init__(self):
+        super().__init__()
+        self.set_in_place(True)
+
+    def do_transform_ip(self, buf):
+        for _ in range(self.maps_per_buffer):
+            with buf.map(Gst.MapFlags.READ | Gst.MapFlags.WRITE) as info:
+                info.data[0] = info.data[-1]
+        return Gst.FlowReturn.OK
+
+
+def run(n_pipelines, options):
+    desc = ('videotestsrc num-buffers={} pattern={} ! video/x-raw,format=RGBA,width={},height={} '
+            '! mapbench ! fakesink sync=false').format(
+                options.buffers, options.pattern, options.width, options.height)
+    pipelines = [Gst.parse_launch(desc) for _ in range(n_pipelines)]
+
+    start = time.perf_counter()
+    for pipeline in pipelines:
+        pipeline.set_state(Gst.State.PLAYING)
+
+    res = 0
+    for pipeline in pipelines:
+        msg = pipeline.get_bus().timed_pop_filtered(Gst.CLOCK_TIME_NONE,
+                                                    Gst.MessageType.EOS | Gst.MessageType.ERROR)
+        if msg.type == Gst.MessageType.ERROR:
+            err, debug = msg.parse_error()
+            print('error: {} ({})'.format(err, debug))
+            res = 1
+    elapsed = time.perf_counter() - start
+
+    for pipeline in pipelines:
+        pipeline.set_state(Gst.State.NULL)
+
+    total = n_pipelines * options.buffers
+    return res, total / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument('--pipelines', default=4, type=int, help='Maximum number of parallel pipelines')
+    parser.add_argument('--buffers', default=500, type=int, help='Number of buffers per pipeline')
+    parser.add_argument('--maps', default=4, type=int, help='Number of times each buffer is mapped')
+    parser.add_argument('--width', default=1280, type=int, help='Width of the frames')
+    parser.add_argument('--height', default=720, type=int, help='Height of the frames')
+    parser.add_argument('--pattern', default='solid-color', help='videotestsrc pattern')
+    options = parser.parse_args()
+
+    Gst.init(None)
+    GObject.type_register(MapBench)
+    Gst.Element.register(None, 'mapbench', Gst.Rank.NONE, MapBench)
+    MapBench.maps_per_buffer = options.maps
+
+    res = 0
+    baseline = None
+    for n_pipelines in range(1, options.pipelines + 1):
+        ret, rate = run(n_pipelines, options)
+        res = max(res, ret)
+        if baseline is None:
+            baseline = rate
+        print('{:>3} pipelines: {:8.0f} buffers/s, {:.2f}x the throughput of 1 pipeline'.format(
+            n_pipelines, rate, rate / baseline))
+
+    return res
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -17,6 +17,8 @@
 # License along with this library; if not, write to the Free Software
 # Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301  USA
 import overrides_hack
+import asyncio
+import gc
 import sys
 from common import TestCase, unittest
 from gi.repository import Gst
@@ -265,6 +267,150 @@ class TestBin(TestCase):
         self.assertEqual(Gst.ElementFactory.make("bin", None).sinkpads, [])
 
 
+class TestDebugCategory(TestCase):
+
+    def test_new(self):
+        Gst.init(None)
+        cat = Gst.DebugCategory("pytestcat", 0, "Python test category")
+        self.assertIsInstance(cat, Gst.DebugCategory)
+        self.assertEqual(cat.get_name(), "pytestcat")
+        self.assertEqual(cat.get_description(), "Python test category")
+
+        # Registering the same name again gives the existing category
+        self.assertEqual(Gst.DebugCategory("pytestcat").get_description(),
+                         "Python test category")
+
+    def test_lazy_formatting(self):
+        Gst.init(None)
+        cat = Gst.DebugCategory("pytestlazycat")
+        called = []
+
+        cat.set_threshold(Gst.DebugLevel.WARNING)
+        self.assertFalse(cat.is_enabled(Gst.DebugLevel.DEBUG))
+        cat.debug(lambda: called.append(True))
+        self.assertEqual(called, [])
+
+        cat.set_threshold(Gst.DebugLevel.DEBUG)
+        self.assertTrue(cat.is_enabled(Gst.DebugLevel.DEBUG))
+        cat.debug(lambda: called.append(True) or "message")
+        self.assertEqual(called, [True])
+
+    def test_format_args(self):
+        Gst.init(None)
+        cat = Gst.DebugCategory("pytestformatcat")
+
+        cat.set_threshold(Gst.DebugLevel.NONE)
+        # Not formatted, so a bad format string goes unnoticed
+        cat.info("%d", "not a number")
+
+        cat.set_threshold(Gst.DebugLevel.INFO)
+        cat.info("%d buffers on %s", 2, "pad", obj=Gst.Bin())
+        with self.assertRaises(TypeError):
+            cat.info("%d", "not a number")
+        with self.assertRaises(TypeError):
+            cat.info("message", obj=42)
+
+
+class TestAsyncio(TestCase):
+
+    def test_bus_iter_async(self):
+        Gst.init(None)
+        pipeline = Gst.parse_launch("fakesrc num-buffers=10 ! fakesink")
+
+        async def run():
+            ret = await pipeline.set_state_async(Gst.State.PLAYING)
+            self.assertEqual(ret, Gst.StateChangeReturn.SUCCESS)
+            async for msg in pipeline.get_bus().iter_async(Gst.MessageType.EOS | Gst.MessageType.ERROR):
+                return msg.type
+
+        try:
+            self.assertEqual(asyncio.run(asyncio.wait_for(run(), 10)), Gst.MessageType.EOS)
+        finally:
+            pipeline.set_state(Gst.State.NULL)
+
+    def test_bus_iter_async_pending(self):
+        Gst.init(None)
+        bus = Gst.Bus.new()
+
+        async def wait_eos():
+            async for msg in bus.iter_async(Gst.MessageType.EOS):
+                return msg
+
+        async def run():
+            eos = asyncio.ensure_future(wait_eos())
+            await asyncio.sleep(0)
+            bus.post(Gst.Message.new_application(None, Gst.Structure.new_empty("app")))
+            bus.post(Gst.Message.new_eos(None))
+            await eos
+
+            # Popped while waiting for EOS but kept for this iterator
+            async for msg in bus.iter_async(Gst.MessageType.APPLICATION):
+                return msg.get_structure().get_name()
+
+        self.assertEqual(asyncio.run(asyncio.wait_for(run(), 10)), "app")
+
+    def test_bus_iter_async_pipeline_freed(self):
+        Gst.init(None)
+
+        async def run():
+            finalized = asyncio.get_running_loop().create_future()
+            pipeline = Gst.parse_launch("fakesrc num-buffers=10 ! fakesink")
+            pipeline.weak_ref(finalized.set_result, True)
+
+            await pipeline.set_state_async(Gst.State.PLAYING)
+            # Leaves the other messages pending
+            async for msg in pipeline.get_bus().iter_async(Gst.MessageType.EOS):
+                break
+            await pipeline.set_state_async(Gst.State.NULL)
+
+            del pipeline, msg
+            gc.collect()
+            return finalized.done()
+
+        self.assertTrue(asyncio.run(asyncio.wait_for(run(), 10)))
+
+    def test_bus_iter_async_loop_closed(self):
+        Gst.init(None)
+        finalized = []
+        pipeline = Gst.parse_launch("fakesrc num-buffers=10 ! fakesink")
+        pipeline.weak_ref(finalized.append, True)
+
+        async def run():
+            await pipeline.set_state_async(Gst.State.PLAYING)
+            async for msg in pipeline.get_bus().iter_async(Gst.MessageType.EOS):
+                return msg.type
+
+        try:
+            self.assertEqual(asyncio.run(asyncio.wait_for(run(), 10)), Gst.MessageType.EOS)
+        finally:
+            pipeline.set_state(Gst.State.NULL)
+
+        del pipeline
+        gc.collect()
+        self.assertEqual(finalized, [True])
+
+    def test_promise(self):
+        Gst.init(None)
+
+        async def run():
+            promise = Gst.Promise.new_async()
+            promise.reply(Gst.Structure.new_empty("reply"))
+            return await promise
+
+        self.assertEqual(asyncio.run(run()).get_name(), "reply")
+
+    def test_promise_interrupted(self):
+        Gst.init(None)
+
+        async def run():
+            promise = Gst.Promise.new_async()
+            promise.interrupt()
+            await promise
+
+        with self.assertRaises(asyncio.CancelledError):
+            asyncio.run(run())
+
+
 class TestBuffer(TestCase):
 
     def test_set_metas(self):
@@ -310,6 +456,83 @@ class TestBuffer(TestCase):
         with self.assertRaises(ValueError):
             info.data[0]
 
+    def test_new_wrapped_buffer(self):
+        Gst.init(None)
+        data = bytearray(b'\x01\x02\x03\x04')
+        buf = Gst.Buffer.new_wrapped_buffer(data)
+        self.assertEqual(buf.get_size(), 4)
+        with buf.map(Gst.MapFlags.READ | Gst.MapFlags.WRITE) as info:
+            self.assertEqual(bytes(info.data), b'\x01\x02\x03\x04')
+            info.data[0] = 42
+        # No copy was made
+        self.assertEqual(data[0], 42)
+
+        # The exporter can't be resized while the buffer is alive
+        with self.assertRaises(BufferError):
+            data.append(5)
+        del buf
+        data.append(5)
+
+    def test_new_wrapped_buffer_readonly(self):
+        Gst.init(None)
+        buf = Gst.Buffer.new_wrapped_buffer(memoryview(b'abcd')[1:3])
+        self.assertEqual(buf.extract_dup(0, buf.get_size()), b'bc')
+        self.assertTrue(buf.peek_memory(0).mini_object.flags & Gst.MemoryFlags.READONLY)
+
+        with self.assertRaises(TypeError):
+            Gst.Buffer.new_wrapped_buffer(42)
+
+
+class TestBufferPool(TestCase):
+
+    def test_decide_allocation_new_pool(self):
+        Gst.init(None)
+        query = Gst.Query.new_allocation(Gst.Caps("foo/bar"), True)
+        with self.assertRaises(ValueError):
+            Gst.BufferPool.decide_allocation(query)
+
+        self.assertTrue(Gst.BufferPool.decide_allocation(query, 16))
+        self.assertEqual(query.get_n_allocation_pools(), 1)
+        self.assertEqual(query.get_n_allocation_params(), 1)
+        pool, size, min_buffers, max_buffers = query.parse_nth_allocation_pool(0)
+        self.assertIsNotNone(pool)
+        self.assertEqual((size, min_buffers, max_buffers), (16, 2, 0))
+
+    def test_decide_allocation_proposed_pool(self):
+        Gst.init(None)
+        proposed = Gst.BufferPool.new()
+        query = Gst.Query.new_allocation(Gst.Caps("foo/bar"), True)
+        query.add_allocation_pool(proposed, 32, 3, 0)
+
+        self.assertTrue(Gst.BufferPool.decide_allocation(query, 16))
+        self.assertEqual(query.get_n_allocation_pools(), 1)
+        pool, size, min_buffers, max_buffers = query.parse_nth_allocation_pool(0)
+        self.assertEqual(pool, proposed)
+        self.assertEqual((size, min_buffers, max_buffers), (32, 3, 0))
+
+    def test_acquire_mapped(self):
+        Gst.init(None)
+        query = Gst.Query.new_allocation(Gst.Caps("foo/bar"), True)
+        self.assertTrue(Gst.BufferPool.decide_allocation(query, 4, 1, 1))
+        pool = query.parse_nth_allocation_pool(0)[0]
+
+        ret, mapped = pool.acquire_mapped()
+        self.assertEqual(ret, Gst.FlowReturn.OK)
+        with mapped:
+            mapped.array[:] = b'abcd'
+        self.assertIsNone(mapped.array)
+        self.assertEqual(mapped.buffer.extract_dup(0, 4), b'abcd')
+
+        # The buffer goes back to the pool once released
+        buf = mapped.buffer
+        del mapped
+        del buf
+        ret, mapped = pool.acquire_mapped()
+        self.assertEqual(ret, Gst.FlowReturn.OK)
+        mapped.unmap()
+        self.assertEqual(mapped.buffer.extract_dup(0, 4), b'abcd')
+        pool.set_active(False)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -18,8 +18,13 @@
 # License along with this library; if not, write to the Free Software
 # Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301  USA
 
-from gi.repository import Gst
+from gi.repository import GLib, Gst
 import gi
+import os
+import sys
+import json
+import tempfile
+import subprocess
 from common import TestCase, unittest
 import overrides_hack
 overrides_hack
@@ -28,6 +33,33 @@ overrides_hack
 gi.require_version("Gst", "1.0")
 
 
+# Scans the plugins into a new registry and prints what it knows about the
+# test element, then checks the element can still be instantiated
+SCAN_SCRIPT = """
+import gi
+import json
+import overrides_hack
+gi.require_version("Gst", "1.0")
+from gi.repository import Gst
+
+Gst.init(None)
+factory = Gst.ElementFactory.find("test_identity_py")
+res = {
+    "long-name": factory.get_metadata("long-name"),
+    "caps": [t.get_caps().to_string() for t in factory.get_static_pad_templates()],
+    "uri-type": int(factory.get_uri_type()),
+    "uri-protocols": list(factory.get_uri_protocols()),
+}
+
+p = Gst.parse_launch("fakesrc num-buffers=1 ! test_identity_py name=id ! fakesink")
+p.set_state(Gst.State.PLAYING)
+p.get_state(Gst.CLOCK_TIME_NONE)
+p.set_state(Gst.State.NULL)
+res["transformed"] = p.get_by_name("id").transformed
+print(json.dumps(res))
+"""
+
+
 class TestPlugin(TestCase):
     def testLoad(self):
         Gst.init(None)
@@ -40,6 +72,68 @@ class TestPlugin(TestCase):
 
         del p
 
+    def testMetadataCache(self):
+        Gst.init(None)
+        registry = os.environ.get("GST_REGISTRY")
+        if not registry:
+            self.skipTest("Needs a custom registry location")
+
+        factory = Gst.ElementFactory.find("test_identity_py")
+        self.assertIsNotNone(factory)
+
+        # The metadata of the elements is cached next to the registry, so the
+        # next registry scans don't need to import the modules
+        cache = GLib.KeyFile()
+        cache.load_from_file(registry + ".python-plugins", GLib.KeyFileFlags.NONE)
+        groups, _ = cache.get_groups()
+        path = [group for group in groups if group.endswith("identity.py")][0]
+        self.assertEqual(cache.get_string(path, "element"), "test_identity_py")
+        self.assertEqual(cache.get_integer(path, "size"), os.stat(path).st_size)
+        self.assertEqual(len(cache.get_string_list(path, "templates")),
+                         len(factory.get_static_pad_templates()))
+
+    def testRegisterFromCache(self):
+        Gst.init(None)
+        registry = os.environ.get("GST_REGISTRY")
+        if not registry:
+            self.skipTest("Needs a custom registry location")
+        if not Gst.Registry.fork_is_enabled():
+            self.skipTest("The cache is only used by the plugin scanner")
+
+        cache = GLib.KeyFile()
+        cache.load_from_file(registry + ".python-plugins", GLib.KeyFileFlags.NONE)
+        groups, _ = cache.get_groups()
+        path = [group for group in groups if group.endswith("identity.py")][0]
+
+        # Only the cache knows about those, so they can only be found in the
+        # new registry if the element was registered without importing it
+        metadata = Gst.Structure.from_string(cache.get_string(path, "metadata"))[0]
+        metadata.set_value("long-name", "Cached Identity")
+        cache.set_string(path, "metadata", metadata.to_string())
+        template = Gst.Structure.from_string(
+            'template, name=(string)src, direction=(GstPadDirection)src, '
+            'presence=(GstPadPresence)always, caps=(string)"test/x-cached"')[0]
+        cache.set_string_list(path, "templates", [template.to_string()])
+        cache.set_string_list(path, "interfaces", ["GstURIHandler"])
+        cache.set_integer(path, "uri-type", int(Gst.URIType.SRC))
+        cache.set_string_list(path, "uri-protocols", ["pycached"])
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            new_registry = os.path.join(tmpdir, "registry")
+            cache.save_to_file(new_registry + ".python-plugins")
+
+            env = dict(os.environ, GST_REGISTRY=new_registry)
+            env.pop("GST_REGISTRY_1_0", None)
+            out = subprocess.check_output([sys.executable, "-c", SCAN_SCRIPT], env=env,
+                                          cwd=os.path.dirname(os.path.abspath(__file__)))
+
+        res = json.loads(out.decode().splitlines()[-1])
+        self.assertEqual(res["long-name"], "Cached Identity")
+        self.assertEqual(res["caps"], ["test/x-cached"])
+        self.assertEqual(res["uri-type"], int(Gst.URIType.SRC))
+        self.assertEqual(res["uri-protocols"], ["pycached"])
+        self.assertTrue(res["transformed"])
+
 
 if __name__ == "__main__":
     unittest.main()